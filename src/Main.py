@@ -1,4 +1,5 @@
 import os
+import multiprocessing
 import platform
 import shutil
 import tempfile
@@ -17,6 +18,7 @@ from utils.update_checker import UpdateChecker
 from utils.settings_manager import SettingsManager
 from utils.utilities import Utilities
 from utils.fnf_utilities import FnfUtilities
+from utils.version import APP_VERSION
 from parsers.xml_parser import XmlParser
 from parsers.txt_parser import TxtParser
 from parsers.unknown_parser import UnknownParser
@@ -55,6 +57,7 @@ class TextureAtlasExtractorApp:
         menubar (tk.Menu): The main menu bar.
         variable_delay (tk.BooleanVar): A flag to enable or disable variable delay between frames.
         fnf_idle_loop (tk.BooleanVar): A flag to set loop delay to 0 for idle animations in FNF.
+        gif_backend (tk.StringVar): The GIF encoder to use, "Wand" (ImageMagick) or "Pillow" (numpy/Pillow).
         scrollbar_png (tk.Scrollbar): Scrollbar for the PNG listbox.
         listbox_png (tk.Listbox): Listbox for PNG files.
         scrollbar_xml (tk.Scrollbar): Scrollbar for the data listbox.
@@ -151,7 +154,7 @@ class TextureAtlasExtractorApp:
 
     def __init__(self, root):
         self.root = root
-        self.current_version = "1.9.5.1"
+        self.current_version = APP_VERSION
         self.app_config = AppConfig()
         self.settings_manager = SettingsManager()
         self.temp_dir = tempfile.mkdtemp()
@@ -246,6 +249,15 @@ class TextureAtlasExtractorApp:
         advanced_menu.add_checkbutton(
             label="FNF: Set loop delay on idle animations to 0", variable=self.fnf_idle_loop
         )
+        self.gif_backend = tk.StringVar(value=defaults.get("gif_backend", "Wand"))
+        gif_backend_menu = tk.Menu(advanced_menu, tearoff=0)
+        gif_backend_menu.add_radiobutton(
+            label="Wand (ImageMagick)", variable=self.gif_backend, value="Wand"
+        )
+        gif_backend_menu.add_radiobutton(
+            label="Pillow (faster)", variable=self.gif_backend, value="Pillow"
+        )
+        advanced_menu.add_cascade(label="GIF encoder", menu=gif_backend_menu)
         self.menubar.add_cascade(label="Advanced", menu=advanced_menu)
 
         options_menu = tk.Menu(self.menubar, tearoff=0)
@@ -557,21 +569,10 @@ class TextureAtlasExtractorApp:
             label.config(text=directory)
             if variable == self.input_dir:
                 self.clear_filelist()
-                processed_files = set()
-
-                for filename in os.listdir(directory):
-                    if filename.endswith(".xml") or filename.endswith(".txt"):
-                        base_name = os.path.splitext(filename)[0]
-                        png_filename = base_name + ".png"
-                        if os.path.isfile(os.path.join(directory, png_filename)):
-                            self.listbox_png.insert(tk.END, png_filename)
-                            processed_files.add(png_filename)
-
-                for filename in os.listdir(directory):
-                    if (filename.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.webp')) 
-                        and filename not in processed_files):
-                        self.listbox_png.insert(tk.END, filename)
-                
+
+                for filename in Utilities.list_spritesheets(directory):
+                    self.listbox_png.insert(tk.END, filename)
+
                 self.listbox_png.bind("<<ListboxSelect>>", self.on_select_spritesheet)
                 self.listbox_png.bind("<Double-1>", self.on_double_click_spritesheet)
                 self.listbox_data.bind("<Double-1>", self.on_double_click_animation)
@@ -809,6 +810,7 @@ class TextureAtlasExtractorApp:
             replace_rules=self.replace_rules,
             var_delay=self.variable_delay.get(),
             fnf_idle_loop=self.fnf_idle_loop.get(),
+            gif_backend=self.gif_backend.get(),
         )
         print("Global settings updated:", self.settings_manager.global_settings)
 
@@ -1459,6 +1461,9 @@ class TextureAtlasExtractorApp:
                     widgets["optimize"].config(state="normal")
 
 if __name__ == "__main__":
+    # Needed for the process pool execution mode in compiled builds.
+    multiprocessing.freeze_support()
+
     try:
         parser = argparse.ArgumentParser(description="TextureAtlas to GIF and Frames")
         parser.add_argument("--update", action="store_true", help="Run in update mode")
@@ -0,0 +1,175 @@
+import os
+import numpy as np
+from PIL import Image, ImageDraw
+
+
+class SyntheticAtlasGenerator:
+    """
+    Generates reproducible spritesheets for benchmarking, in every layout the app can read.
+
+    The frames are simple drawn shapes that move and change color from frame to frame, so
+    animations are not made of identical frames. The same parameters and seed always produce
+    byte-identical files.
+
+    Usage (from the src directory):
+        python -m benchmarks.atlas_generator OUTPUT_DIR --frames 120 --frame-size 96
+
+    Attributes:
+        frame_count (int): The total number of frames in each spritesheet.
+        frame_size (int): The width and height of a frame before trimming.
+        animation_count (int): The number of animations the frames are split into.
+        seed (int): Seed of the random generator.
+
+    Methods:
+        make_frames() -> list:
+            Returns (name, RGBA image) tuples for all frames.
+        write_sparrow(directory, name="sparrow", rotated_ratio=0.25) -> str:
+            Writes a Sparrow XML spritesheet with trimmed and rotated frames.
+        write_txt(directory, name="textpacker") -> str:
+            Writes a TextPacker TXT spritesheet.
+        write_keyed(directory, name="keyed", background=(255, 0, 255)) -> str:
+            Writes a spritesheet without metadata on a solid background color.
+        write_all(directory) -> dict:
+            Writes all three spritesheets and returns their image paths by kind.
+    """
+
+    PADDING = 2
+    KEYED_SPACING = 6
+
+    def __init__(self, frame_count=60, frame_size=64, animation_count=4, seed=0):
+        self.frame_count = max(1, int(frame_count))
+        self.frame_size = max(8, int(frame_size))
+        self.animation_count = max(1, min(int(animation_count), self.frame_count))
+        self.seed = seed
+
+    def make_frames(self):
+        rng = np.random.default_rng(self.seed)
+        size = self.frame_size
+        frames_per_animation = -(-self.frame_count // self.animation_count)
+        frames = []
+
+        for index in range(self.frame_count):
+            animation, frame = divmod(index, frames_per_animation)
+            base_color = rng.integers(40, 256, 3)
+            image = Image.new("RGBA", (size, size))
+            draw = ImageDraw.Draw(image)
+
+            # Leave a transparent border of varying width so trimming has something to remove.
+            margin = size // 8 + frame % 4
+            offset = (frame * 3) % max(1, size // 6)
+            box = (margin + offset, margin, size - margin - 1, size - margin // 2 - 1)
+            draw.ellipse(box, fill=tuple(int(c) for c in base_color) + (255,))
+            draw.rectangle(
+                (box[0] + size // 6, box[1] + size // 6, box[0] + size // 3, box[1] + size // 3),
+                fill=(int(base_color[2]), int(base_color[0]), int(base_color[1]), 160),
+            )
+            frames.append((f"anim{animation} {frame:04d}", image))
+        return frames
+
+    def write_sparrow(self, directory, name="sparrow", rotated_ratio=0.25):
+        rng = np.random.default_rng(self.seed + 1)
+        entries = []
+        for frame_name, image in self.make_frames():
+            bbox = image.getbbox() or (0, 0, 1, 1)
+            trimmed = image.crop(bbox)
+            rotated = bool(rng.random() < rotated_ratio)
+            if rotated:
+                # Sparrow stores rotated sprites turned 90 degrees clockwise.
+                trimmed = trimmed.transpose(Image.Transpose.ROTATE_270)
+            entries.append((frame_name, trimmed, bbox, rotated, image.size))
+
+        atlas, positions = self._pack([entry[1] for entry in entries], self.PADDING)
+        lines = [
+            '<?xml version="1.0" encoding="utf-8"?>',
+            f'<TextureAtlas imagePath="{name}.png">',
+        ]
+        for (frame_name, trimmed, bbox, rotated, frame_size), (x, y) in zip(entries, positions):
+            attributes = (
+                f'name="{frame_name}" x="{x}" y="{y}" width="{trimmed.width}" height="{trimmed.height}" '
+                f'frameX="{-bbox[0]}" frameY="{-bbox[1]}" '
+                f'frameWidth="{frame_size[0]}" frameHeight="{frame_size[1]}"'
+            )
+            if rotated:
+                attributes += ' rotated="true"'
+            lines.append(f"    <SubTexture {attributes}/>")
+        lines.append("</TextureAtlas>")
+
+        return self._save(directory, name, atlas, ".xml", "\n".join(lines) + "\n")
+
+    def write_txt(self, directory, name="textpacker"):
+        images = [image for _, image in self.make_frames()]
+        names = [frame_name for frame_name, _ in self.make_frames()]
+        atlas, positions = self._pack(images, self.PADDING)
+        lines = [
+            f"{frame_name} = {x} {y} {image.width} {image.height}"
+            for frame_name, image, (x, y) in zip(names, images, positions)
+        ]
+        return self._save(directory, name, atlas, ".txt", "\n".join(lines) + "\n")
+
+    def write_keyed(self, directory, name="keyed", background=(255, 0, 255)):
+        frames = []
+        for _, image in self.make_frames():
+            # Only fully opaque sprites survive keying unchanged.
+            opaque = Image.new("RGBA", image.size, background + (0,))
+            opaque.paste(image.convert("RGB"), mask=image.getchannel("A").point(lambda a: 255 if a else 0))
+            frames.append(opaque.crop(opaque.getchannel("A").getbbox() or (0, 0, 1, 1)))
+
+        atlas, _ = self._pack(frames, self.KEYED_SPACING)
+        keyed = Image.new("RGBA", atlas.size, background + (255,))
+        keyed.alpha_composite(atlas)
+        return self._save(directory, name, keyed.convert("RGB"), None, None)
+
+    def write_all(self, directory):
+        return {
+            "sparrow": self.write_sparrow(directory),
+            "txt": self.write_txt(directory),
+            "keyed": self.write_keyed(directory),
+        }
+
+    @staticmethod
+    def _pack(images, padding):
+        # Shelf packing into a roughly square atlas.
+        total_area = sum((image.width + padding) * (image.height + padding) for image in images)
+        atlas_width = max(max(image.width for image in images) + padding, int(total_area**0.5 * 1.2))
+
+        positions = []
+        x = y = shelf_height = 0
+        for image in images:
+            if x + image.width > atlas_width:
+                x = 0
+                y += shelf_height + padding
+                shelf_height = 0
+            positions.append((x, y))
+            x += image.width + padding
+            shelf_height = max(shelf_height, image.height)
+
+        atlas = Image.new("RGBA", (atlas_width, y + shelf_height))
+        for image, position in zip(images, positions):
+            atlas.paste(image, position)
+        return atlas, positions
+
+    @staticmethod
+    def _save(directory, name, atlas, metadata_extension, metadata):
+        os.makedirs(directory, exist_ok=True)
+        image_path = os.path.join(directory, f"{name}.png")
+        atlas.save(image_path)
+        if metadata_extension:
+            with open(os.path.join(directory, name + metadata_extension), "w", encoding="utf-8") as f:
+                f.write(metadata)
+        return image_path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write synthetic benchmark spritesheets")
+    parser.add_argument("output_dir")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--frame-size", type=int, default=64)
+    parser.add_argument("--animations", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generator = SyntheticAtlasGenerator(args.frames, args.frame_size, args.animations, args.seed)
+    for kind, path in generator.write_all(args.output_dir).items():
+        print(f"{kind}: {path}")
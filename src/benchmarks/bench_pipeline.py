@@ -0,0 +1,301 @@
+"""
+Times every stage of the extraction pipeline on synthetic spritesheets.
+
+Usage (from the src directory):
+    python -m benchmarks.bench_pipeline --frames 240 --frame-size 96 --output report.json
+    python -m benchmarks.bench_pipeline --frames 240 --frame-size 96 --baseline report.json
+
+The spritesheets are generated with SyntheticAtlasGenerator, so two runs with the same
+parameters time the same work and their reports can be compared stage by stage.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy
+import PIL
+
+from benchmarks.atlas_generator import SyntheticAtlasGenerator
+from core.atlas_processor import AtlasProcessor
+from core.extraction_metrics import ExtractionMetrics
+from core.frame_exporter import FrameExporter
+from core.sprite_processor import SpriteProcessor
+from parsers.unknown_parser import UnknownParser
+
+try:
+    from core.animation_exporter import AnimationExporter
+    from core.animation_processor import AnimationProcessor
+except ImportError as e:
+    # Wand needs ImageMagick; without it only the stages that do not export animations run.
+    AnimationExporter = AnimationProcessor = None
+    ANIMATION_IMPORT_ERROR = str(e)
+else:
+    ANIMATION_IMPORT_ERROR = None
+
+
+class PipelineBenchmark:
+    """
+    Benchmarks the extraction stages on the spritesheets of a SyntheticAtlasGenerator.
+
+    Every stage runs over all animations of a spritesheet and is repeated; the report keeps
+    the fastest and the median run, in seconds. Stages that cannot run (e.g. the Wand GIF
+    encoder without ImageMagick) are reported with a "skipped" reason instead of timings.
+
+    Attributes:
+        REPORT_VERSION (int): Incremented when the report layout changes.
+        SHEETS (tuple): The generated spritesheet kinds.
+
+    Methods:
+        export_settings(**overrides) -> dict:
+            Returns the settings passed to the exporters.
+        time_stage(function, repeat) -> dict:
+            Runs a function repeatedly and returns its timings.
+        run(generator, repeat=3, work_dir=None) -> dict:
+            Benchmarks all spritesheets and returns the report.
+        compare(report, baseline) -> list:
+            Returns (sheet, stage, baseline seconds, seconds, speedup) rows for two reports.
+    """
+
+    REPORT_VERSION = 1
+    SHEETS = ("sparrow", "txt", "keyed")
+
+    @staticmethod
+    def export_settings(**overrides):
+        settings = {
+            "fps": 24,
+            "delay": 250,
+            "period": 0,
+            "scale": 1.0,
+            "threshold": 0.5,
+            "frame_format": "PNG",
+            "frame_scale": 1.0,
+            "crop_option": "Animation based",
+            "prefix": "",
+            "filename_format": "Standardized",
+            "replace_rules": [],
+            "var_delay": False,
+            "fnf_idle_loop": False,
+            "compression_settings": {},
+        }
+        settings.update(overrides)
+        return settings
+
+    @staticmethod
+    def time_stage(function, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        return {
+            "min": round(min(timings), 6),
+            "median": round(statistics.median(timings), 6),
+        }
+
+    @staticmethod
+    def run(generator, repeat=3, work_dir=None):
+        own_dir = work_dir is None
+        work_dir = work_dir or tempfile.mkdtemp(prefix="tatgf_bench_")
+        try:
+            sheet_paths = generator.write_all(os.path.join(work_dir, "input"))
+            results = {}
+            for sheet in PipelineBenchmark.SHEETS:
+                output_dir = os.path.join(work_dir, "output", sheet)
+                # The app prints a line per frame; keep that out of the terminal and the timings.
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    results[sheet] = PipelineBenchmark._run_sheet(
+                        sheet_paths[sheet], output_dir, repeat
+                    )
+        finally:
+            if own_dir:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+        return {
+            "report_version": PipelineBenchmark.REPORT_VERSION,
+            "benchmark": "pipeline",
+            "app_version": PipelineBenchmark._app_version(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+                "cpu_count": os.cpu_count(),
+                "numpy": numpy.__version__,
+                "pillow": PIL.__version__,
+            },
+            "parameters": {
+                "frames": generator.frame_count,
+                "frame_size": generator.frame_size,
+                "animations": generator.animation_count,
+                "seed": generator.seed,
+                "repeat": repeat,
+            },
+            "results": results,
+        }
+
+    @staticmethod
+    def compare(report, baseline):
+        rows = []
+        for sheet, stages in report["results"].items():
+            for stage, timings in stages["stages"].items():
+                old = baseline.get("results", {}).get(sheet, {}).get("stages", {}).get(stage, {})
+                if "min" in timings and "min" in old:
+                    speedup = old["min"] / timings["min"] if timings["min"] else float("inf")
+                    rows.append((sheet, stage, old["min"], timings["min"], speedup))
+        return rows
+
+    @staticmethod
+    def _run_sheet(atlas_path, output_dir, repeat):
+        base, _ = os.path.splitext(atlas_path)
+        metadata_path = next(
+            (base + ext for ext in (".xml", ".txt") if os.path.exists(base + ext)), None
+        )
+        keying_action = None if metadata_path else "key_background"
+        stages = {}
+
+        def parse():
+            processor = AtlasProcessor(atlas_path, metadata_path, None, keying_action)
+            processor.atlas.load()
+            return processor
+
+        if metadata_path is None:
+            stages["parse_unknown_image"] = PipelineBenchmark.time_stage(
+                lambda: UnknownParser.parse_unknown_image(atlas_path, None, keying_action), repeat
+            )
+        stages["parse"] = PipelineBenchmark.time_stage(parse, repeat)
+
+        atlas_processor = parse()
+        sprite_processor = SpriteProcessor(atlas_processor.atlas, atlas_processor.sprites)
+        stages["process_sprites"] = PipelineBenchmark.time_stage(
+            sprite_processor.process_sprites, repeat
+        )
+
+        animations = sprite_processor.process_sprites()
+        stages["materialize_frames"] = PipelineBenchmark.time_stage(
+            lambda: [SpriteProcessor.materialize_frames(d) for d in animations.values()], repeat
+        )
+
+        frames = {
+            name: SpriteProcessor.materialize_frames(sorted(d, key=lambda x: x.name))
+            for name, d in animations.items()
+        }
+        frame_count = sum(len(image_tuples) for image_tuples in frames.values())
+        settings = PipelineBenchmark.export_settings()
+        is_unknown = metadata_path is None
+
+        if AnimationProcessor is not None:
+            scale_image = AnimationProcessor(
+                {}, atlas_path, output_dir, None, PipelineBenchmark._app_version()
+            ).scale_image
+        else:
+            scale_image = PipelineBenchmark._scale_image
+
+        def save_frames():
+            exporter = FrameExporter(output_dir, PipelineBenchmark._app_version(), scale_image)
+            for name, image_tuples in frames.items():
+                exporter.save_frames(
+                    image_tuples,
+                    range(len(image_tuples)),
+                    "bench",
+                    name,
+                    settings["scale"],
+                    settings,
+                    is_unknown,
+                )
+
+        stages["save_frames"] = PipelineBenchmark.time_stage(save_frames, repeat)
+
+        animation_stages = {
+            "save_gif": {"animation_format": "GIF", "gif_backend": "Wand"},
+            "save_gif_pillow": {"animation_format": "GIF", "gif_backend": "Pillow"},
+            "save_webp": {"animation_format": "WebP"},
+            "save_apng": {"animation_format": "APNG"},
+        }
+        for stage, overrides in animation_stages.items():
+            if AnimationExporter is None:
+                stages[stage] = {"skipped": ANIMATION_IMPORT_ERROR}
+                continue
+
+            animation_settings = PipelineBenchmark.export_settings(**overrides)
+
+            def save_animations():
+                exporter = AnimationExporter(
+                    output_dir, PipelineBenchmark._app_version(), scale_image, ExtractionMetrics()
+                )
+                for name, image_tuples in frames.items():
+                    exporter.save_animations(image_tuples, "bench", name, animation_settings)
+
+            try:
+                stages[stage] = PipelineBenchmark.time_stage(save_animations, repeat)
+            except Exception as e:
+                stages[stage] = {"skipped": f"{type(e).__name__}: {e}"}
+
+        for timings in stages.values():
+            if timings.get("min"):
+                timings["frames_per_second"] = round(frame_count / timings["min"], 1)
+
+        return {
+            "atlas_size": list(atlas_processor.atlas.size),
+            "sprites": len(atlas_processor.sprites),
+            "animations": len(frames),
+            "frames": frame_count,
+            "stages": stages,
+        }
+
+    @staticmethod
+    def _scale_image(img, size):
+        from PIL import Image
+
+        if size < 0:
+            img = img.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+        return img.resize((round(img.width * abs(size)), round(img.height * abs(size))), Image.NEAREST)
+
+    @staticmethod
+    def _app_version():
+        from core.cli import APP_VERSION
+
+        return APP_VERSION
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the extraction pipeline")
+    parser.add_argument("--frames", type=int, default=120, help="Frames per spritesheet")
+    parser.add_argument("--frame-size", type=int, default=64, help="Frame width and height in pixels")
+    parser.add_argument("--animations", type=int, default=4, help="Animations per spritesheet")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage, the fastest is reported")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--baseline", help="A previous JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    generator = SyntheticAtlasGenerator(args.frames, args.frame_size, args.animations, args.seed)
+    report = PipelineBenchmark.run(generator, max(1, args.repeat))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("parameters") != report["parameters"]:
+            print("Warning: the baseline was run with different parameters", file=sys.stderr)
+        print(f"{'sheet':<8} {'stage':<20} {'baseline':>10} {'current':>10} {'speedup':>8}", file=sys.stderr)
+        for sheet, stage, old, new, speedup in PipelineBenchmark.compare(report, baseline):
+            print(f"{sheet:<8} {stage:<20} {old:>10.4f} {new:>10.4f} {speedup:>7.2f}x", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import time
+import numpy as np
+
+# Import our own modules
+from utils.region_labeler import RegionLabeler
+
+
+class RegionLabelingBenchmark:
+    """
+    Compares RegionLabeler against the previous flood-fill implementation of
+    UnknownParser._find_connected_regions on a synthetic sprite mask.
+
+    Usage (from the src directory):
+        python -m benchmarks.bench_region_labeling --size 1024 --sprites 400
+
+    Methods:
+        make_mask(size, sprites, seed=0) -> numpy.ndarray:
+            Builds a square mask with randomly placed filled ellipses and rings.
+        legacy_find_regions(mask) -> list:
+            The flood fill + bounding box implementation used before RegionLabeler.
+        run(size, sprites, skip_legacy=False) -> dict:
+            Times both implementations and checks that they return the same regions.
+    """
+
+    @staticmethod
+    def make_mask(size, sprites, seed=0):
+        rng = np.random.default_rng(seed)
+        mask = np.zeros((size, size), dtype=bool)
+        yy, xx = np.mgrid[0:size, 0:size]
+        max_radius = max(4, size // int(np.sqrt(sprites) * 2 + 1))
+
+        for _ in range(sprites):
+            cy, cx = rng.integers(0, size, 2)
+            ry, rx = rng.integers(2, max_radius + 1, 2)
+            y0, y1 = max(0, cy - ry), min(size, cy + ry + 1)
+            x0, x1 = max(0, cx - rx), min(size, cx + rx + 1)
+            dist = ((yy[y0:y1, x0:x1] - cy) / ry) ** 2 + ((xx[y0:y1, x0:x1] - cx) / rx) ** 2
+            if rng.random() < 0.3:
+                mask[y0:y1, x0:x1] |= (dist <= 1.0) & (dist >= 0.6)
+            else:
+                mask[y0:y1, x0:x1] |= dist <= 1.0
+        return mask
+
+    @staticmethod
+    def legacy_find_regions(mask):
+        height, width = mask.shape
+        visited = np.zeros_like(mask, dtype=bool)
+        regions = []
+
+        for start_y in range(height):
+            for start_x in range(width):
+                if not mask[start_y, start_x] or visited[start_y, start_x]:
+                    continue
+                stack = [(start_y, start_x)]
+                region = []
+                while stack:
+                    y, x = stack.pop()
+                    if y < 0 or y >= height or x < 0 or x >= width or visited[y, x] or not mask[y, x]:
+                        continue
+                    visited[y, x] = True
+                    region.append((y, x))
+                    stack.extend([(y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)])
+
+                y_coords = [coord[0] for coord in region]
+                x_coords = [coord[1] for coord in region]
+                regions.append(
+                    (
+                        min(x_coords),
+                        min(y_coords),
+                        max(x_coords) - min(x_coords) + 1,
+                        max(y_coords) - min(y_coords) + 1,
+                        len(region),
+                    )
+                )
+        return regions
+
+    @staticmethod
+    def run(size, sprites, skip_legacy=False):
+        mask = RegionLabelingBenchmark.make_mask(size, sprites)
+        result = {"size": size, "sprites": sprites, "opaque_pixels": int(mask.sum())}
+
+        start = time.perf_counter()
+        regions = RegionLabeler.find_regions(mask, connectivity=4)
+        result["labeler_seconds"] = time.perf_counter() - start
+        result["regions"] = len(regions)
+
+        start = time.perf_counter()
+        RegionLabeler.find_regions(mask, connectivity=8)
+        result["labeler_8_connectivity_seconds"] = time.perf_counter() - start
+
+        if not skip_legacy:
+            start = time.perf_counter()
+            legacy_regions = RegionLabelingBenchmark.legacy_find_regions(mask)
+            result["legacy_seconds"] = time.perf_counter() - start
+            result["identical"] = [tuple(r) for r in regions.tolist()] == legacy_regions
+            result["speedup"] = result["legacy_seconds"] / max(result["labeler_seconds"], 1e-9)
+
+        return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark connected-region labeling")
+    parser.add_argument("--size", type=int, default=1024, help="Width and height of the mask")
+    parser.add_argument("--sprites", type=int, default=400, help="Number of shapes drawn in the mask")
+    parser.add_argument(
+        "--skip-legacy", action="store_true", help="Only time RegionLabeler (for very large sizes)"
+    )
+    args = parser.parse_args()
+
+    for key, value in RegionLabelingBenchmark.run(args.size, args.sprites, args.skip_legacy).items():
+        print(f"{key}: {value:.4f}" if isinstance(value, float) else f"{key}: {value}")
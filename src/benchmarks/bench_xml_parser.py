@@ -0,0 +1,123 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+import numpy as np
+
+# Import our own modules
+from core.sprite_processor import SpriteProcessor
+from parsers.xml_parser import XmlParser
+
+
+class XmlParserBenchmark:
+    """
+    Compares the streaming XmlParser.parse_xml_data against the previous ElementTree
+    implementation on a large synthetic Sparrow XML file.
+
+    Usage (from the src directory):
+        python -m benchmarks.bench_xml_parser --sprites 50000
+
+    Methods:
+        write_xml(path, sprites, seed=0):
+            Writes a Sparrow XML file with trimmed and rotated SubTextures.
+        legacy_parse_xml_data(file_path) -> list:
+            The ET.parse + dict per sprite implementation used before SpriteTable.
+        run(sprites) -> dict:
+            Times and measures the peak memory of both parsers and checks that they return the same sprites.
+    """
+
+    @staticmethod
+    def write_xml(path, sprites, seed=0):
+        rng = np.random.default_rng(seed)
+        values = rng.integers(0, 4096, (sprites, 4))
+        sizes = rng.integers(16, 256, (sprites, 2))
+        rotated = rng.random(sprites) < 0.25
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('<?xml version="1.0" encoding="utf-8"?>\n<TextureAtlas imagePath="bench.png">\n')
+            for index in range(sprites):
+                x, y, trim_x, trim_y = values[index] % (4096, 4096, 16, 16)
+                width, height = sizes[index]
+                f.write(
+                    f'    <SubTexture name="animation{index // 24} {index % 24:04d}" x="{x}" y="{y}" '
+                    f'width="{width}" height="{height}" frameX="{-trim_x}" frameY="{-trim_y}" '
+                    f'frameWidth="{width + 2 * trim_x}" frameHeight="{height + 2 * trim_y}"'
+                    + (' rotated="true"' if rotated[index] else "")
+                    + "/>\n"
+                )
+            f.write("</TextureAtlas>\n")
+
+    @staticmethod
+    def legacy_parse_xml_data(file_path):
+        tree = ET.parse(file_path)
+        xml_root = tree.getroot()
+        sprites = [
+            {
+                "name": sprite.get("name"),
+                "x": int(sprite.get("x")),
+                "y": int(sprite.get("y")),
+                "width": int(sprite.get("width")),
+                "height": int(sprite.get("height")),
+                "frameX": int(sprite.get("frameX", 0)),
+                "frameY": int(sprite.get("frameY", 0)),
+                "frameWidth": int(sprite.get("frameWidth", sprite.get("width"))),
+                "frameHeight": int(sprite.get("frameHeight", sprite.get("height"))),
+                "rotated": sprite.get("rotated", "false") == "true",
+            }
+            for sprite in xml_root.findall("SubTexture")
+        ]
+        return sprites
+
+    @staticmethod
+    def _measure(function, *args, repeat=3):
+        seconds = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function(*args)
+            seconds = min(seconds, time.perf_counter() - start)
+
+        # Memory is measured in a separate run, tracemalloc slows the parsers down.
+        tracemalloc.start()
+        result = function(*args)
+        # The peak covers the parse itself, the current size what the result keeps alive.
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, seconds, current / 2**20, peak / 2**20
+
+    @staticmethod
+    def run(sprites):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "bench.xml")
+            XmlParserBenchmark.write_xml(path, sprites)
+            result = {"sprites": sprites, "file_mb": os.path.getsize(path) / 2**20}
+
+            table, seconds, retained, peak = XmlParserBenchmark._measure(XmlParser.parse_xml_data, path)
+            result.update(streaming_seconds=seconds, streaming_retained_mb=retained, streaming_peak_mb=peak)
+
+            legacy, seconds, retained, peak = XmlParserBenchmark._measure(
+                XmlParserBenchmark.legacy_parse_xml_data, path
+            )
+            result.update(legacy_seconds=seconds, legacy_retained_mb=retained, legacy_peak_mb=peak)
+
+        start = time.perf_counter()
+        SpriteProcessor(None, table).process_sprites()
+        result["process_sprites_table_seconds"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        SpriteProcessor(None, legacy).process_sprites()
+        result["process_sprites_dicts_seconds"] = time.perf_counter() - start
+
+        result["identical"] = list(table) == legacy
+        result["speedup"] = result["legacy_seconds"] / max(result["streaming_seconds"], 1e-9)
+        return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Sparrow XML parsing")
+    parser.add_argument("--sprites", type=int, default=50000, help="Number of SubTextures in the XML file")
+    args = parser.parse_args()
+
+    for key, value in XmlParserBenchmark.run(args.sprites).items():
+        print(f"{key}: {value:.4f}" if isinstance(value, float) else f"{key}: {value}")
@@ -1,11 +1,17 @@
+import io
 import os
 import numpy
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from PIL import Image
 from PIL.PngImagePlugin import PngInfo
 from wand.color import Color
 from wand.image import Image as WandImg
 
 # Import our own modules
+from core.extraction_metrics import ExtractionMetrics
+from core.frame_stack import FrameStack
+from core.gif_encoder import GifEncoder
 from utils.utilities import Utilities
 
 
@@ -13,6 +19,9 @@ class AnimationExporter:
     """
     Exports animations (GIF, WebP, APNG) from a sequence of image frames.
 
+    The frames are handled as a FrameStack: the images passed to the save_* methods can be a
+    FrameStack or a list of PIL images, which is stacked first.
+
     Attributes:
         output_dir (str):
             Directory where exported animations will be saved.
@@ -20,26 +29,61 @@ class AnimationExporter:
             Version string to include in metadata.
         scale_image_func (str):
             Function to scale images before saving.
+        saved_files (list):
+            Paths of the animation files written so far, in the order they were saved.
+        metrics (ExtractionMetrics):
+            Collects the crop, encode and write timings and the written bytes.
+        encode_workers (int):
+            The maximum number of formats encoded in parallel, 1 unless the caller grants more of its CPU budget.
 
     Methods:
-        save_animations(image_tuples, spritesheet_name, animation_name, settings) -> int
+        save_animations(image_tuples, spritesheet_name, animation_name, settings, frame_stack=None) -> int
             Processes and saves the animation in the specified format (GIF, WebP, or APNG).
+            The frames are stacked into a FrameStack unless one is passed. The animation_format
+            setting can be a list of formats: the frames are cropped and scaled once and the
+            encoders of all formats run in parallel. The filename_suffix setting is appended to the
+            file name. Returns the number of requested formats.
+        merge_identical_frames(images, durations, frame_ids) -> tuple
+            Merges consecutive frames with the same identity, adding up their durations.
         remove_dups(animation)
             Removes duplicate frames from a Wand animation, merging delays as needed.
-        save_gif(images, filename, fps, delay, period, scale, threshold, settings)
-            Saves the animation as a GIF file.
+        prepare_preview(image_tuples, settings) -> tuple
+            Returns the (frames, durations) that save_animations would encode for the animation format,
+            as RGBA images and milliseconds, or None when there is nothing to show. GIF frames are
+            thresholded, cropped and scaled like the GIF encoders do, but not reduced to 256 colors.
+            Combines the three preview stages below, which can also be run and cached separately.
+        crop_preview_frames(image_tuples, settings) -> tuple
+            Returns the cropped (and for GIF, thresholded) frames and the number of source frames merged into each.
+        scale_preview_frames(frames, settings) -> list
+            Scales the frames of crop_preview_frames to the final RGBA preview images.
+        get_preview_durations(frame_count, groups, settings) -> list
+            Returns the preview frame durations in milliseconds for the merged frame groups.
+        get_gif_durations(frame_count, fps, delay, period, settings) -> list
+            Returns the GIF frame durations in milliseconds.
+        get_webp_durations(frame_count, fps, delay, period, settings) -> list
+            Returns the WebP frame durations in milliseconds.
+        get_apng_durations(frame_count, fps, delay, period, settings) -> list
+            Returns the APNG frame durations in milliseconds.
+        save_gif(images, filename, fps, delay, period, scale, threshold, settings, frame_ids=None)
+            Saves the animation as a GIF file with Wand. Identical source frames are merged before encoding.
+            The frames are thresholded and trimmed with numpy; Wand quantizes and encodes them.
+        save_gif_pillow(images, filename, fps, delay, period, scale, threshold, settings, frame_ids=None)
+            Saves the animation as a GIF file with numpy and Pillow, used when the gif_backend setting is "Pillow".
         save_webp(images, filename, fps, delay, period, scale, settings)
             Saves the animation as a WebP file.
         save_apng(images, filename, fps, delay, period, scale, settings)
             Saves the animation as an APNG file.
     """
 
-    def __init__(self, output_dir, current_version, scale_image_func):
+    def __init__(self, output_dir, current_version, scale_image_func, metrics=None, encode_workers=None):
         self.output_dir = output_dir
         self.current_version = current_version
         self.scale_image = scale_image_func
+        self.saved_files = []
+        self.metrics = metrics if metrics is not None else ExtractionMetrics()
+        self.encode_workers = max(1, int(encode_workers or 1))
 
-    def save_animations(self, image_tuples, spritesheet_name, animation_name, settings):
+    def save_animations(self, image_tuples, spritesheet_name, animation_name, settings, frame_stack=None):
         anims_generated = 0
 
         fps = settings.get("fps")
@@ -47,18 +91,13 @@ class AnimationExporter:
         period = settings.get("period")
         scale = settings.get("scale")
         threshold = settings.get("threshold")
-        animation_format = settings.get("animation_format")
-
-        images = [img[1] for img in image_tuples]
-        sizes = [frame.size for frame in images]
-        max_size = tuple(map(max, zip(*sizes)))
-        min_size = tuple(map(min, zip(*sizes)))
+        animation_formats = Utilities.format_list(settings.get("animation_format"))
 
-        if max_size != min_size:
-            for index, frame in enumerate(images):
-                new_frame = Image.new("RGBA", max_size)
-                new_frame.paste(frame)
-                images[index] = new_frame
+        if frame_stack is None:
+            with self.metrics.stage("crop"):
+                frame_stack = FrameStack.from_image_tuples(image_tuples)
+        images = frame_stack
+        frame_ids = frame_stack.frame_ids
 
         filename = settings.get("filename")
 
@@ -70,64 +109,212 @@ class AnimationExporter:
                 settings.get("filename_format"),
                 settings.get("replace_rules"),
             )
+        filename += settings.get("filename_suffix", "")
+
+        # WebP and APNG encode the same cropped and scaled frames, they are prepared once.
+        final_images = None
+        encoders = []
+        for animation_format in animation_formats:
+            if animation_format == "GIF":
+                save_gif = self.save_gif_pillow if settings.get("gif_backend") == "Pillow" else self.save_gif
+                encoders.append(
+                    partial(save_gif, images, filename, fps, delay, period, scale, threshold, settings, frame_ids)
+                )
+            elif animation_format in ("WebP", "APNG"):
+                if final_images is None:
+                    final_images = self._crop_and_scale_frames(images, scale, settings)
+                    if final_images is None:
+                        final_images = []
+                if not final_images:
+                    continue
+                write = self._write_webp if animation_format == "WebP" else self._write_apng
+                encoders.append(partial(write, final_images, filename, fps, delay, period, settings))
+
+        self._run_encoders(encoders, self.encode_workers)
+        anims_generated += len(animation_formats)
+        return anims_generated
+
+    @staticmethod
+    def _run_encoders(encoders, max_workers=1):
+        if len(encoders) <= 1 or max_workers <= 1:
+            for encoder in encoders:
+                encoder()
+            return
+        # The encoders spend most of their time in C code that releases the GIL.
+        with ThreadPoolExecutor(max_workers=min(len(encoders), max_workers)) as executor:
+            for future in [executor.submit(encoder) for encoder in encoders]:
+                future.result()
+
+    def prepare_preview(self, image_tuples, settings):
+        cropped = self.crop_preview_frames(image_tuples, settings)
+        if cropped is None:
+            return None
+        frames, groups = cropped
+        frames = self.scale_preview_frames(frames, settings)
+        if frames is None:
+            return None
+        return frames, self.get_preview_durations(len(image_tuples), groups, settings)
+
+    def crop_preview_frames(self, image_tuples, settings):
+        animation_format = settings.get("animation_format")
+        if animation_format not in ("GIF", "WebP", "APNG"):
+            return None
+
+        with self.metrics.stage("crop"):
+            images = FrameStack.from_image_tuples(image_tuples)
 
         if animation_format == "GIF":
-            self.save_gif(images, filename, fps, delay, period, scale, threshold, settings)
-        elif animation_format == "WebP":
-            self.save_webp(images, filename, fps, delay, period, scale, settings)
-        elif animation_format == "APNG":
-            self.save_apng(images, filename, fps, delay, period, scale, settings)
+            return self._threshold_gif_frames(
+                images, settings.get("threshold"), settings, images.frame_ids
+            )
 
-        anims_generated += 1
-        return anims_generated
+        cropped_images = self._crop_frames(images, settings)
+        if cropped_images is None:
+            return None
+        return cropped_images, [1] * len(cropped_images)
 
-    def save_webp(self, images, filename, fps, delay, period, scale, settings):
-        min_x, min_y, max_x, max_y = float("inf"), float("inf"), 0, 0
+    def scale_preview_frames(self, frames, settings):
+        scale = settings.get("scale")
+        if settings.get("animation_format") != "GIF":
+            return [self.scale_image(frame, scale) for frame in frames]
 
-        for frame in images:
-            bbox = frame.getbbox()
-            if bbox is None:
-                continue
-            min_x = min(min_x, bbox[0])
-            min_y = min(min_y, bbox[1])
-            max_x = max(max_x, bbox[2])
-            max_y = max(max_y, bbox[3])
+        with self.metrics.stage("scale"):
+            frames = GifEncoder.sample(frames, scale)
+        if frames.shape[1] == 0 or frames.shape[2] == 0:
+            return None
+        return [Image.fromarray(frame) for frame in frames]
 
-        if min_x > max_x:
-            return
+    def get_preview_durations(self, frame_count, groups, settings):
+        fps = settings.get("fps")
+        delay = settings.get("delay")
+        period = settings.get("period")
+        animation_format = settings.get("animation_format")
 
-        final_images = []
-        if settings.get("crop_option") == "None":
-            final_images = list(map(lambda x: self.scale_image(x, scale), images))
+        if animation_format == "GIF":
+            durations = self.get_gif_durations(frame_count, fps, delay, period, settings)
+        elif animation_format == "WebP":
+            durations = self.get_webp_durations(frame_count, fps, delay, period, settings)
         else:
-            for frame in images:
-                cropped_frame = frame.crop((min_x, min_y, max_x, max_y))
-                final_images.append(self.scale_image(cropped_frame, scale))
-
+            durations = self.get_apng_durations(frame_count, fps, delay, period, settings)
+
+        # Frames merged into one preview frame are shown for their combined duration.
+        merged_durations = []
+        position = 0
+        for count in groups:
+            merged_durations.append(int(sum(durations[position : position + count])))
+            position += count
+        return merged_durations
+
+    @staticmethod
+    def _frame_stack(images, frame_ids=None):
+        if isinstance(images, FrameStack):
+            return images
+        return FrameStack.from_images(images, frame_ids)
+
+    def _merged_frames(self, images, durations, frame_ids):
+        stack = self._frame_stack(images, frame_ids)
+        if frame_ids is None:
+            return stack, durations
+        kept, durations = self.merge_identical_frames(range(len(stack)), durations, frame_ids)
+        if len(kept) == len(stack):
+            return stack, durations
+        return stack.select(kept), durations
+
+    def _crop_frames(self, images, settings):
+        with self.metrics.stage("crop"):
+            stack = self._frame_stack(images)
+            crop_box = stack.union_bbox()
+            if crop_box is None:
+                return None
+
+            if settings.get("crop_option") == "None":
+                return stack.to_images()
+            return stack.to_images(crop_box)
+
+    def _crop_and_scale_frames(self, images, scale, settings):
+        with self.metrics.stage("crop"):
+            stack = self._frame_stack(images)
+            crop_box = stack.union_bbox()
+            if crop_box is None:
+                return None
+
+            if settings.get("crop_option") == "None":
+                height, width = stack.frames.shape[1:3]
+                crop_box = (0, 0, width, height)
+            with self.metrics.stage("scale"):
+                return [
+                    stack.scaled_image(index, crop_box, scale, self.scale_image)
+                    for index in range(len(stack))
+                ]
+
+    def get_webp_durations(self, frame_count, fps, delay, period, settings):
         durations = []
-        var_delay = settings.get("var_delay")
-        if var_delay:
-            for index in range(len(final_images)):
+        if settings.get("var_delay"):
+            for index in range(frame_count):
                 durations.append(round((index + 1) * 1000 / fps) - round(index * 1000 / fps))
         else:
-            durations = [round(1000 / fps)] * len(final_images)
+            durations = [round(1000 / fps)] * frame_count
 
         durations[-1] += delay
         durations[-1] += max(period - sum(durations), 0)
+        return durations
+
+    def get_apng_durations(self, frame_count, fps, delay, period, settings):
+        durations = []
+        if settings.get("var_delay"):
+            for index in range(frame_count):
+                start_time = int(round((index + 1) * 1000 / fps))
+                end_time = int(round(index * 1000 / fps))
+                durations.append(start_time - end_time)
+        else:
+            durations = [int(round(1000 / fps))] * frame_count
+
+        durations[-1] += int(delay)
+        durations[-1] += max(int(round(period)) - sum(durations), 0)
+        return durations
+
+    def save_webp(self, images, filename, fps, delay, period, scale, settings):
+        final_images = self._crop_and_scale_frames(images, scale, settings)
+        if final_images is None:
+            return
+        self._write_webp(final_images, filename, fps, delay, period, settings)
+
+    def _write_webp(self, final_images, filename, fps, delay, period, settings):
+        durations = self.get_webp_durations(len(final_images), fps, delay, period, settings)
 
         webp_filename = os.path.join(self.output_dir, f"{filename}.webp")
 
-        final_images[0].save(
-            webp_filename,
-            save_all=True,
-            append_images=final_images[1:],
-            disposal=2,
-            duration=durations,
-            loop=0,
-            lossless=True,
-        )
+        with self.metrics.stage("encode"):
+            buffer = io.BytesIO()
+            # Image.save stores its options on the image; the formats may be encoded in parallel.
+            final_images[0].copy().save(
+                buffer,
+                format="WEBP",
+                save_all=True,
+                append_images=final_images[1:],
+                disposal=2,
+                duration=durations,
+                loop=0,
+                lossless=True,
+            )
+        self.metrics.write_file(webp_filename, buffer.getvalue())
+        self.saved_files.append(webp_filename)
         print(f"Saved WEBP animation: {webp_filename}")
 
+    @staticmethod
+    def merge_identical_frames(images, durations, frame_ids):
+        merged_images = []
+        merged_durations = []
+        previous_id = None
+        for image, duration, frame_id in zip(images, durations, frame_ids):
+            if merged_images and frame_id == previous_id:
+                merged_durations[-1] += duration
+                continue
+            merged_images.append(image)
+            merged_durations.append(duration)
+            previous_id = frame_id
+        return merged_images, merged_durations
+
     def remove_dups(self, animation):
         animation.iterator_reset()
 
@@ -140,48 +327,51 @@ class AnimationExporter:
                 animation.iterator_set(index - 1)
                 animation.delay += delay
 
-    def save_gif(self, images, filename, fps, delay, period, scale, threshold, settings):
+    def get_gif_durations(self, frame_count, fps, delay, period, settings):
         durations = []
         if settings.get("var_delay"):
-            for index in range(len(images)):
+            for index in range(frame_count):
                 durations.append(round((index + 1) * 1000 / fps, -1) - round(index * 1000 / fps, -1))
         else:
-            durations = [round(1000 / fps, -1)] * len(images)
+            durations = [round(1000 / fps, -1)] * frame_count
         durations[-1] += delay
         durations[-1] += max(round(period, -1) - sum(durations), 0)
+        return durations
+
+    def save_gif(self, images, filename, fps, delay, period, scale, threshold, settings, frame_ids=None):
+        durations = self.get_gif_durations(len(images), fps, delay, period, settings)
+        stack, durations = self._merged_frames(images, durations, frame_ids)
 
-        width, height = images[0].size
-        left, upper, right, lower = width, height, 0, 0
-        with WandImg(width=width, height=height) as animation:
+        # Threshold and trim every frame at once instead of letting ImageMagick do it per frame.
+        with self.metrics.stage("crop"):
+            opaque = stack.threshold(threshold)
+            crop_box = stack.union_bbox(mask=opaque)
+            if crop_box is None:
+                print(f"Warning: No frames to save for GIF: {filename}.gif")
+                return
+            left, upper, right, lower = crop_box
+            frames = stack.binarize(opaque)
+            frame_boxes = stack.bboxes(opaque)
+
+        height, width = frames.shape[1:3]
+        with self.metrics.stage("encode"), WandImg(width=width, height=height) as animation:
             animation.image_remove()
-            for index, pil_frame in enumerate(images):
-                arr = numpy.array(pil_frame)
+            for index, frame_box in enumerate(frame_boxes):
+                if frame_box is None:
+                    # Empty frames keep the full canvas, fully transparent.
+                    frame_box = (0, 0, width, height)
+                frame_left, frame_upper, frame_right, frame_lower = frame_box
+                arr = numpy.ascontiguousarray(
+                    frames[index, frame_upper:frame_lower, frame_left:frame_right]
+                )
                 with WandImg.from_array(arr) as wand_frame:
-                    if threshold == 1:
-                        wand_frame.negate(channel="alpha")
-                        wand_frame.threshold(0, channel="alpha")
-                        wand_frame.negate(channel="alpha")
-                    else:
-                        wand_frame.threshold(threshold, channel="alpha")
-
                     wand_frame.background_color = Color("None")
-                    wand_frame.alpha_channel = "background"
-                    wand_frame.trim(color="None")
+                    wand_frame.page = (width, height, frame_left, frame_upper)
                     wand_frame.delay = int(durations[index] / 10)
                     wand_frame.dispose = "background"
-
-                    if wand_frame.size > (1, 1) or wand_frame[0][0].alpha > 0:
-                        left = min(wand_frame.page_x, left)
-                        upper = min(wand_frame.page_y, upper)
-                        right = max(wand_frame.page_x + wand_frame.width, right)
-                        lower = max(wand_frame.page_y + wand_frame.height, lower)
-                    else:
-                        wand_frame.sample(width=width, height=height)
                     animation.sequence.append(wand_frame)
-            if left > right:
-                print(f"Warning: No frames to save for GIF: {filename}.gif")
-                return
-            self.remove_dups(animation)
+            if frame_ids is None:
+                self.remove_dups(animation)
             animation.iterator_reset()
             for i in range(len(animation.sequence)):
                 animation.iterator_set(i)
@@ -209,45 +399,76 @@ class AnimationExporter:
             animation.options["comment"] = (
                 f"GIF generated by: TextureAtlas to GIF and Frames v{self.current_version}"
             )
-            animation.save(filename=gif_filename)
+            self.metrics.write_file(gif_filename, animation.make_blob("gif"))
 
+            self.saved_files.append(gif_filename)
             print(f"Saved GIF animation: {gif_filename}")
 
-    def save_apng(self, images, filename, fps, delay, period, scale, settings):
-        min_x, min_y, max_x, max_y = float("inf"), float("inf"), 0, 0
+    def save_gif_pillow(self, images, filename, fps, delay, period, scale, threshold, settings, frame_ids=None):
+        durations = self.get_gif_durations(len(images), fps, delay, period, settings)
+        stack, durations = self._merged_frames(images, durations, frame_ids)
 
-        for frame in images:
-            bbox = frame.getbbox()
-            if bbox is None:
-                continue
-            min_x = min(min_x, bbox[0])
-            min_y = min(min_y, bbox[1])
-            max_x = max(max_x, bbox[2])
-            max_y = max(max_y, bbox[3])
+        with self.metrics.stage("crop"):
+            frames = stack.frames
+            opaque = stack.threshold(threshold)
 
-        if min_x > max_x:
+            crop_box = stack.union_bbox(mask=opaque)
+            if crop_box is None:
+                print(f"Warning: No frames to save for GIF: {filename}.gif")
+                return
+            if settings.get("crop_option") != "None":
+                left, upper, right, lower = crop_box
+                frames = frames[:, upper:lower, left:right]
+                opaque = opaque[:, upper:lower, left:right]
+
+        with self.metrics.stage("encode"):
+            palette, indexed_frames = GifEncoder.build_palette(frames, opaque)
+            indexed_frames, delays = GifEncoder.merge_repeated(
+                indexed_frames, [int(duration / 10) for duration in durations]
+            )
+        with self.metrics.stage("scale"):
+            indexed_frames = GifEncoder.sample(indexed_frames, scale)
+        if indexed_frames.shape[1] == 0 or indexed_frames.shape[2] == 0:
+            print(f"Warning: No frames to save for GIF: {filename}.gif")
             return
 
-        final_images = []
-        if settings.get("crop_option") == "None":
-            final_images = list(map(lambda x: self.scale_image(x, scale), images))
-        else:
-            for frame in images:
-                cropped_frame = frame.crop((min_x, min_y, max_x, max_y))
-                final_images.append(self.scale_image(cropped_frame, scale))
+        gif_filename = os.path.join(self.output_dir, f"{filename}.gif")
+        with self.metrics.stage("encode"):
+            data = GifEncoder.encode(
+                indexed_frames,
+                delays,
+                palette,
+                f"GIF generated by: TextureAtlas to GIF and Frames v{self.current_version}",
+            )
+        self.metrics.write_file(gif_filename, data)
 
-        durations = []
-        var_delay = settings.get("var_delay")
-        if var_delay:
-            for index in range(len(images)):
-                start_time = int(round((index + 1) * 1000 / fps))
-                end_time = int(round(index * 1000 / fps))
-                durations.append(start_time - end_time)
-        else:
-            durations = [int(round(1000 / fps))] * len(final_images)
+        self.saved_files.append(gif_filename)
+        print(f"Saved GIF animation: {gif_filename}")
 
-        durations[-1] += int(delay)
-        durations[-1] += max(int(round(period)) - sum(durations), 0)
+    def _threshold_gif_frames(self, images, threshold, settings, frame_ids):
+        stack, counts = self._merged_frames(images, [1] * len(images), frame_ids)
+
+        with self.metrics.stage("crop"):
+            opaque = stack.threshold(threshold)
+
+            crop_box = stack.union_bbox(mask=opaque)
+            if crop_box is None:
+                return None
+            frames = stack.binarize(opaque)
+            if settings.get("crop_option") != "None":
+                left, upper, right, lower = crop_box
+                frames = frames[:, upper:lower, left:right]
+
+            return GifEncoder.merge_repeated(frames, counts)
+
+    def save_apng(self, images, filename, fps, delay, period, scale, settings):
+        final_images = self._crop_and_scale_frames(images, scale, settings)
+        if final_images is None:
+            return
+        self._write_apng(final_images, filename, fps, delay, period, settings)
+
+    def _write_apng(self, final_images, filename, fps, delay, period, settings):
+        durations = self.get_apng_durations(len(final_images), fps, delay, period, settings)
 
         apng_filename = os.path.join(self.output_dir, f"{filename}.png")
 
@@ -256,14 +477,19 @@ class AnimationExporter:
             "Comment", f"APNG generated by TextureAtlas to GIF and Frames v{self.current_version}"
         )
 
-        final_images[0].save(
-            apng_filename,
-            save_all=True,
-            append_images=final_images[1:],
-            duration=durations,
-            loop=0,
-            format="PNG",
-            disposal=2,
-            pnginfo=metadata,
-        )
+        with self.metrics.stage("encode"):
+            buffer = io.BytesIO()
+            # Image.save stores its options on the image; the formats may be encoded in parallel.
+            final_images[0].copy().save(
+                buffer,
+                save_all=True,
+                append_images=final_images[1:],
+                duration=durations,
+                loop=0,
+                format="PNG",
+                disposal=2,
+                pnginfo=metadata,
+            )
+        self.metrics.write_file(apng_filename, buffer.getvalue())
+        self.saved_files.append(apng_filename)
         print(f"Saved APNG animation: {apng_filename}")
@@ -0,0 +1,261 @@
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+# Import our own modules
+from core.atlas_processor import AtlasProcessor
+from core.sprite_processor import SpriteProcessor
+from core.frame_selector import FrameSelector
+from core.animation_exporter import AnimationExporter
+from utils.utilities import Utilities
+
+
+class AnimationPreview:
+    """
+    An animation prepared for the preview window, held in memory.
+
+    The frames are the cropped, scaled and thresholded images the exporter would encode, so the
+    preview needs no encode/decode round trip. The animation is only encoded when save() is
+    called, e.g. to open it in an external program.
+
+    Attributes:
+        animation_name (str): The name of the previewed animation.
+        animation_format (str): The animation format the frames were prepared for.
+        frames (list): The RGBA frames as PIL images.
+        durations (list): The duration of every frame in milliseconds.
+        saved_path (str): The encoded file once save() was called, or None.
+
+    Methods:
+        save(directory=None) -> str:
+            Encodes the animation once and returns the file path, or None. Without a directory,
+            the file is written to a temporary directory owned by the preview.
+        cleanup():
+            Removes the encoded file and its temporary directory.
+    """
+
+    def __init__(self, animation_name, animation_format, frames, durations, exporter, image_tuples, spritesheet_name, settings):
+        self.animation_name = animation_name
+        self.animation_format = animation_format
+        self.frames = frames
+        self.durations = durations
+        self.saved_path = None
+        self._temp_dir = None
+        self._exporter = exporter
+        self._image_tuples = image_tuples
+        self._spritesheet_name = spritesheet_name
+        self._settings = settings
+
+    def save(self, directory=None):
+        if self.saved_path and os.path.isfile(self.saved_path):
+            return self.saved_path
+
+        if directory is None:
+            if self._temp_dir is None:
+                self._temp_dir = tempfile.mkdtemp(prefix="tatgf_preview_")
+            directory = self._temp_dir
+        self._exporter.output_dir = directory
+        saved_count = len(self._exporter.saved_files)
+        self._exporter.save_animations(
+            self._image_tuples, self._spritesheet_name, self.animation_name, self._settings
+        )
+        if len(self._exporter.saved_files) > saved_count:
+            self.saved_path = self._exporter.saved_files[-1]
+        return self.saved_path
+
+    def cleanup(self):
+        if self._temp_dir is not None:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+            self._temp_dir = None
+        self.saved_path = None
+
+
+class PreviewSession:
+    """
+    Renders previews of one animation, caching the result of every stage between renders.
+
+    The stages are: the raw frame crops from the atlas, the frame selection (indices and
+    frame_selection), the cropped and thresholded frames, and the scaled frames. Every stage is
+    keyed by the settings it depends on and is only recomputed when those settings (or an
+    earlier stage) change. Durations are cheap and always recomputed, so editing the FPS, delay
+    or period never touches pixels, and editing the scale reuses the cropped frames.
+
+    Sessions are shared per animation through for_animation(); the least recently used ones are
+    dropped once more than MAX_SESSIONS exist, since each holds the frames of its animation.
+
+    Attributes:
+        MAX_SESSIONS (int): The maximum number of cached sessions.
+        STAGES (tuple): The names of the cached stages, in pipeline order.
+        atlas_path (str): The spritesheet image.
+        metadata_path (str): The spritesheet metadata file.
+        animation_name (str): The previewed animation, or None for the first one in the spritesheet.
+        recomputed (list): The names of the stages recomputed by the last render.
+
+    Methods:
+        for_animation(atlas_path, metadata_path, animation_name=None) -> PreviewSession:
+            Returns the shared session of an animation.
+        render(settings_manager, current_version, settings) -> AnimationPreview:
+            Returns the preview for the given override settings, or None when there is nothing to show.
+        clear_sessions():
+            Drops all shared sessions.
+    """
+
+    MAX_SESSIONS = 4
+    STAGES = ("frames", "selection", "crop", "scale")
+
+    _sessions = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, atlas_path, metadata_path, animation_name=None):
+        self.atlas_path = atlas_path
+        self.metadata_path = metadata_path
+        self.animation_name = animation_name
+        self.recomputed = []
+        self._keys = {}
+        self._results = {}
+
+    @classmethod
+    def for_animation(cls, atlas_path, metadata_path, animation_name=None):
+        key = (os.path.abspath(atlas_path), metadata_path and os.path.abspath(metadata_path), animation_name)
+        with cls._lock:
+            session = cls._sessions.get(key)
+            if session is None:
+                session = cls(atlas_path, metadata_path, animation_name)
+                cls._sessions[key] = session
+                while len(cls._sessions) > cls.MAX_SESSIONS:
+                    cls._sessions.popitem(last=False)
+            else:
+                cls._sessions.move_to_end(key)
+            return session
+
+    @classmethod
+    def clear_sessions(cls):
+        with cls._lock:
+            cls._sessions.clear()
+
+    def render(self, settings_manager, current_version, settings):
+        self.recomputed = []
+
+        loaded = self._stage("frames", self._file_key(), self._load_frames)
+        if loaded is None:
+            return None
+        animation_name, raw_tuples = loaded
+
+        spritesheet_name = os.path.basename(self.atlas_path)
+        preview_settings = settings_manager.get_settings(
+            spritesheet_name, f"{spritesheet_name}/{animation_name}"
+        )
+        merged_settings = {**preview_settings, **settings}
+
+        # The preview shows the first of the selected formats.
+        animation_formats = Utilities.format_list(merged_settings.get("animation_format", "GIF"))
+        animation_format = animation_formats[0] if animation_formats else "GIF"
+        merged_settings["animation_format"] = animation_format
+        # And the first of the selected scales.
+        scales = Utilities.scale_list(merged_settings.get("scale"))
+        merged_settings["scale"] = scales[0] if scales else 1.0
+
+        indices = merged_settings.get("indices")
+        selection_key = (tuple(indices) if indices else None, merged_settings.get("frame_selection"))
+        image_tuples = self._stage(
+            "selection", selection_key, lambda: self._select_frames(raw_tuples, merged_settings)
+        )
+        if not image_tuples:
+            return None
+
+        exporter = AnimationExporter(
+            None,
+            current_version,
+            lambda img, size: img.resize(
+                (round(img.width * abs(size)), round(img.height * abs(size))), Image.NEAREST
+            ),
+        )
+
+        # WebP and APNG frames are cropped the same way, GIF frames are also thresholded.
+        is_gif = animation_format == "GIF"
+        crop_key = (
+            is_gif,
+            merged_settings.get("threshold") if is_gif else None,
+            merged_settings.get("crop_option"),
+        )
+        cropped = self._stage(
+            "crop", crop_key, lambda: exporter.crop_preview_frames(image_tuples, merged_settings)
+        )
+        if cropped is None:
+            return None
+        cropped_frames, groups = cropped
+
+        frames = self._stage(
+            "scale",
+            merged_settings.get("scale"),
+            lambda: exporter.scale_preview_frames(cropped_frames, merged_settings),
+        )
+        if frames is None:
+            return None
+
+        durations = exporter.get_preview_durations(len(image_tuples), groups, merged_settings)
+        return AnimationPreview(
+            animation_name,
+            animation_format,
+            frames,
+            durations,
+            exporter,
+            image_tuples,
+            spritesheet_name,
+            merged_settings,
+        )
+
+    def _stage(self, name, key, compute):
+        if name in self._results and self._keys.get(name) == key:
+            return self._results[name]
+
+        # Everything after a recomputed stage depends on it.
+        for later in self.STAGES[self.STAGES.index(name) + 1 :]:
+            self._keys.pop(later, None)
+            self._results.pop(later, None)
+
+        result = compute()
+        self._keys[name] = key
+        self._results[name] = result
+        self.recomputed.append(name)
+        return result
+
+    def _file_key(self):
+        key = []
+        for path in (self.atlas_path, self.metadata_path):
+            try:
+                stat = os.stat(path)
+                key.append((stat.st_mtime_ns, stat.st_size))
+            except (OSError, TypeError):
+                key.append(None)
+        return tuple(key)
+
+    def _load_frames(self):
+        atlas_processor = AtlasProcessor(self.atlas_path, self.metadata_path)
+        sprite_processor = SpriteProcessor(atlas_processor.atlas, atlas_processor.sprites)
+        animations = sprite_processor.process_sprites()
+
+        animation_name = self.animation_name
+        if animation_name:
+            descriptors = animations.get(animation_name, [])
+        elif animations:
+            animation_name = next(iter(animations))
+            descriptors = animations[animation_name]
+        else:
+            return None
+        return animation_name, SpriteProcessor.materialize_frames(descriptors)
+
+    @staticmethod
+    def _select_frames(image_tuples, settings):
+        indices = settings.get("indices")
+        if indices:
+            indices = list(filter(lambda i: ((i < len(image_tuples)) & (i >= 0)), indices))
+            image_tuples = [image_tuples[i] for i in indices]
+
+        single_frame = FrameSelector.is_single_frame(image_tuples)
+        kept_frames = FrameSelector.get_kept_frames(settings, single_frame, image_tuples)
+
+        kept_frame_indices = FrameSelector.get_kept_frame_indices(kept_frames, image_tuples)
+        return [img for idx, img in enumerate(image_tuples) if idx in kept_frame_indices]
@@ -3,40 +3,73 @@ import os
 
 # Import our own modules
 from core.frame_selector import FrameSelector
+from core.sprite_processor import SpriteProcessor
 from core.frame_exporter import FrameExporter
 from core.animation_exporter import AnimationExporter
+from core.frame_stack import FrameStack
+from core.output_cache import OutputCache
+from core.extraction_metrics import ExtractionMetrics
+from utils.utilities import Utilities
 
 
 class AnimationProcessor:
     """
     A class to process animations from a texture atlas.
 
+    The scale and frame_scale settings can be lists of scales. Each animation is then cropped
+    and deduplicated once and exported at every scale, into a subfolder per scale (e.g. "2x")
+    or, when the scale_naming setting is "Suffix", with the scale appended to the file names
+    (e.g. "@2x").
+
     Attributes:
-        animations (dict): A dictionary containing animation names and their corresponding image tuples.
+        animations (dict): A dictionary mapping animation names to their FrameDescriptor lists.
+            Frames are materialized one animation at a time.
         atlas_path (str): The path to the texture atlas.
         output_dir (str): The directory where the output frames and animations will be saved.
         settings_manager (SettingsManager): Manages global, animation-specific, and spritesheet-specific settings.
         current_version (str): The current version of the application.
+        output_cache (OutputCache): Optional cache manifest used to skip animations whose outputs are up to date.
+        source_digest (str): Hash of the atlas and metadata bytes, combined with each animation's settings to form its cache key.
+        processed_animations (list): Names of the animations handled (exported or skipped) by the last process_animations call.
+        metrics (ExtractionMetrics): Collects the per-animation timings and counts.
+        encode_workers (int): The encoding threads the exporters may use, 1 by default.
 
     Methods:
         process_animations(is_unknown_spritesheet=False):
             Processes the animations and saves the frames and animations. 
             is_unknown_spritesheet parameter determines whether to apply extra cropping for unknown spritesheets.
+            Animations that are up to date in the output cache are skipped.
         scale_image(img, size):
             Scales the image by the given size factor, optionally flipping it horizontally.
     """
 
-    def __init__(self, animations, atlas_path, output_dir, settings_manager, current_version):
+    def __init__(
+        self,
+        animations,
+        atlas_path,
+        output_dir,
+        settings_manager,
+        current_version,
+        output_cache=None,
+        source_digest=None,
+        metrics=None,
+        encode_workers=None,
+    ):
         self.animations = animations
         self.atlas_path = atlas_path
         self.output_dir = output_dir
         self.settings_manager = settings_manager
         self.current_version = current_version
+        self.output_cache = output_cache
+        self.source_digest = source_digest
+        self.processed_animations = []
+        self.metrics = metrics if metrics is not None else ExtractionMetrics(os.path.basename(atlas_path))
+        self.encode_workers = max(1, int(encode_workers or 1))
         self.frame_exporter = FrameExporter(
-            self.output_dir, self.current_version, self.scale_image
+            self.output_dir, self.current_version, self.scale_image, self.metrics, self.encode_workers
         )
         self.animation_exporter = AnimationExporter(
-            self.output_dir, self.current_version, self.scale_image
+            self.output_dir, self.current_version, self.scale_image, self.metrics, self.encode_workers
         )
 
     def process_animations(self, is_unknown_spritesheet=False):
@@ -45,21 +78,46 @@ class AnimationProcessor:
 
         spritesheet_name = os.path.split(self.atlas_path)[1]
 
-        for animation_name, image_tuples in self.animations.items():
+        for animation_name, descriptors in self.animations.items():
             print(f"Processing animation: {animation_name}")
 
             settings = self.settings_manager.get_settings(
                 spritesheet_name, f"{spritesheet_name}/{animation_name}"
             )
-            scale = settings.get("scale")
-            image_tuples.sort(key=lambda x: x[0])
+            self.processed_animations.append(animation_name)
+            self.metrics.start_animation(animation_name)
+
+            cache_key = None
+            if self.output_cache is not None:
+                cache_key = OutputCache.hash_values(
+                    self.source_digest,
+                    self.current_version,
+                    animation_name,
+                    is_unknown_spritesheet,
+                    settings,
+                )
+                if self.output_cache.is_fresh(animation_name, cache_key):
+                    print(f"Skipping unchanged animation: {animation_name}")
+                    self.metrics.finish_animation(cached=True)
+                    continue
+
+            animation_frames_start = frames_generated
+            animation_anims_start = anims_generated
+            frame_files_start = len(self.frame_exporter.saved_files)
+            anim_files_start = len(self.animation_exporter.saved_files)
+
+            descriptors = sorted(descriptors, key=lambda x: x.name)
 
             indices = settings.get("indices")
             if indices:
                 indices = list(
-                    filter(lambda i: ((i < len(image_tuples)) & (i >= 0)), indices)
+                    filter(lambda i: ((i < len(descriptors)) & (i >= 0)), indices)
                 )
-                image_tuples = [image_tuples[i] for i in indices]
+                descriptors = [descriptors[i] for i in indices]
+
+            # Only this animation's frames are held in memory; they are dropped before the next one.
+            with self.metrics.stage("crop"):
+                image_tuples = SpriteProcessor.materialize_frames(descriptors)
             single_frame = FrameSelector.is_single_frame(image_tuples)
 
             kept_frames = FrameSelector.get_kept_frames(
@@ -72,25 +130,86 @@ class AnimationProcessor:
             if settings.get("fnf_idle_loop") and "idle" in animation_name.lower():
                 settings["delay"] = 0
 
-            if settings.get("frame_format") != "None":
-                frames_generated += self.frame_exporter.save_frames(
-                    image_tuples,
-                    kept_frame_indices,
-                    spritesheet_name,
+            # Both exporters crop from the same stacked frames.
+            export_frames = bool(Utilities.format_list(settings.get("frame_format", "PNG")))
+            export_animation = not single_frame and bool(
+                Utilities.format_list(settings.get("animation_format"))
+            )
+            frame_stack = None
+            if image_tuples and (export_frames or export_animation):
+                with self.metrics.stage("crop"):
+                    frame_stack = FrameStack.from_image_tuples(image_tuples)
+                # The stack holds the pixels from here on, the tuples only keep views of it.
+                image_tuples = [
+                    (name, frame_stack.frame(index), source_rect, frame_id)
+                    for index, (name, _, source_rect, frame_id) in enumerate(image_tuples)
+                ]
+
+            # Every scale is produced from the same cropped and deduplicated frames.
+            scales = Utilities.scale_list(settings.get("scale")) or [1.0]
+            frame_scales = Utilities.scale_list(settings.get("frame_scale", scales)) or scales
+            multi_scale = len(scales) > 1 or len(frame_scales) > 1
+
+            if export_frames:
+                for frame_scale in frame_scales:
+                    self.frame_exporter.output_dir = self._scale_output_dir(settings, frame_scale, multi_scale)
+                    frames_generated += self.frame_exporter.save_frames(
+                        image_tuples,
+                        kept_frame_indices,
+                        spritesheet_name,
+                        animation_name,
+                        frame_scale,
+                        self._scale_settings(settings, "frame_scale", frame_scale, multi_scale),
+                        is_unknown_spritesheet,
+                        frame_stack,
+                    )
+
+            if export_animation:
+                for scale in scales:
+                    self.animation_exporter.output_dir = self._scale_output_dir(settings, scale, multi_scale)
+                    anims_generated += self.animation_exporter.save_animations(
+                        image_tuples,
+                        spritesheet_name,
+                        animation_name,
+                        self._scale_settings(settings, "scale", scale, multi_scale),
+                        frame_stack,
+                    )
+
+            self.frame_exporter.output_dir = self.output_dir
+            self.animation_exporter.output_dir = self.output_dir
+
+            if self.output_cache is not None:
+                self.output_cache.record(
                     animation_name,
-                    scale,
-                    settings,
-                    is_unknown_spritesheet,
+                    cache_key,
+                    self.frame_exporter.saved_files[frame_files_start:]
+                    + self.animation_exporter.saved_files[anim_files_start:],
+                    frames_generated - animation_frames_start,
+                    anims_generated - animation_anims_start,
                 )
 
-            animation_format = settings.get("animation_format")
-            if not single_frame and animation_format != "None":
-                anims_generated += self.animation_exporter.save_animations(
-                    image_tuples, spritesheet_name, animation_name, settings
-                )
+            self.metrics.finish_animation(
+                frames_generated - animation_frames_start,
+                anims_generated - animation_anims_start,
+            )
+            del image_tuples, frame_stack
 
         return frames_generated, anims_generated
 
+    def _scale_settings(self, settings, key, scale, multi_scale):
+        scale_settings = dict(settings)
+        scale_settings[key] = scale
+        if multi_scale and settings.get("scale_naming") == "Suffix":
+            scale_settings["filename_suffix"] = f"@{Utilities.scale_label(scale)}"
+        return scale_settings
+
+    def _scale_output_dir(self, settings, scale, multi_scale):
+        if not multi_scale or settings.get("scale_naming") == "Suffix":
+            return self.output_dir
+        scale_dir = os.path.join(self.output_dir, Utilities.scale_label(scale))
+        os.makedirs(scale_dir, exist_ok=True)
+        return scale_dir
+
     def scale_image(self, img, size):
         if size < 0:
             img = img.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
@@ -98,4 +217,5 @@ class AnimationProcessor:
         new_height_float = img.height * abs(size)
         new_width = round(new_width_float)
         new_height = round(new_height_float)
-        return img.resize((new_width, new_height), Image.NEAREST)
+        with self.metrics.stage("scale"):
+            return img.resize((new_width, new_height), Image.NEAREST)
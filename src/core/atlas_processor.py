@@ -1,9 +1,9 @@
-from PIL import Image
-
 # Import our own modules
+from parsers.metadata_cache import MetadataCache
 from parsers.txt_parser import TxtParser
 from parsers.xml_parser import XmlParser
 from parsers.unknown_parser import UnknownParser
+from utils.atlas_cache import AtlasCache
 
 
 class AtlasProcessor:
@@ -13,8 +13,9 @@ class AtlasProcessor:
     Attributes:
         atlas_path (str): The file path to the texture atlas image.
         metadata_path (str): The file path to the metadata file.
-        atlas (PIL.Image.Image): The opened texture atlas image.
-        sprites (list): The parsed sprite data from the metadata file.
+        atlas (PIL.Image.Image): The decoded RGBA texture atlas image, shared through the AtlasCache.
+        sprites (list): The parsed sprite data from the metadata file, shared through the MetadataCache.
+        keying_action (str): Optional background handling choice forwarded to the unknown spritesheet parser.
 
     Methods:
         open_atlas_and_parse_metadata():
@@ -23,30 +24,33 @@ class AtlasProcessor:
                 tuple: A tuple containing the opened atlas image and the parsed sprite data.
     """
 
-    def __init__(self, atlas_path, metadata_path, parent_window=None):
+    def __init__(self, atlas_path, metadata_path, parent_window=None, keying_action=None):
         self.atlas_path = atlas_path
         self.metadata_path = metadata_path
         self.parent_window = parent_window
+        self.keying_action = keying_action
         self.atlas, self.sprites = self.open_atlas_and_parse_metadata()
 
     def open_atlas_and_parse_metadata(self):
         print(f"Opening atlas: {self.atlas_path}")
-        atlas = Image.open(self.atlas_path)
+        atlas = AtlasCache.get(self.atlas_path)
 
         # Check if metadata_path is None or points to an image file (unknown spritesheet)
         if (self.metadata_path is None or 
             self.metadata_path.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.webp'))):
             print(f"Parsing unknown spritesheet: {self.atlas_path}")
-            processed_atlas, sprites = UnknownParser.parse_unknown_image(self.atlas_path, self.parent_window)
+            processed_atlas, sprites = UnknownParser.parse_unknown_image(
+                self.atlas_path, self.parent_window, self.keying_action
+            )
             if processed_atlas is not None:
                 atlas = processed_atlas
 
         elif self.metadata_path.endswith(".xml"):
             print(f"Parsing XML metadata: {self.metadata_path}")
-            sprites = XmlParser.parse_xml_data(self.metadata_path)
+            sprites = MetadataCache.get_sprites(self.metadata_path, XmlParser.parse_xml_data)
         elif self.metadata_path.endswith(".txt"):
             print(f"Parsing TXT metadata: {self.metadata_path}")
-            sprites = TxtParser.parse_txt_packer(self.metadata_path)
+            sprites = MetadataCache.get_sprites(self.metadata_path, TxtParser.parse_txt_packer)
         else:
             raise ValueError(f"Unsupported metadata file format: {self.metadata_path}")
         return atlas, sprites
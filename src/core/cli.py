@@ -0,0 +1,285 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+
+# Import our own modules
+from core.extraction_metrics import JsonLinesEventLog
+from utils.app_config import AppConfig
+from utils.dependencies_checker import DependenciesChecker
+from utils.settings_manager import SettingsManager
+from utils.utilities import Utilities
+from utils.version import APP_VERSION
+
+
+class CommandLineInterface:
+    """
+    Headless command-line front end for batch extraction, usable without a display.
+
+    Usage (from the src directory):
+        python -m core.cli extract INPUT_DIR OUTPUT_DIR [--format GIF] [--fps 24] [--workers N]
+
+    Settings are resolved in this order, later entries winning:
+        1. The app's extraction and compression defaults (or an app config file given with --app-config).
+        2. The "global" section of the --settings JSON file.
+        3. Options given on the command line.
+    The "spritesheets" and "animations" sections of the --settings file hold per-spritesheet
+    (keyed by image filename) and per-animation (keyed by "image.png/animation") overrides.
+
+    When the run is finished a JSON object with the run statistics is written to stdout.
+    All progress messages go to stderr. The exit code is 0 on success, 1 if any spritesheet
+    failed and 2 for invalid arguments.
+
+    Methods:
+        build_parser() -> argparse.ArgumentParser:
+            Builds the argument parser for the command line.
+        build_settings_manager(args, app_config=None) -> SettingsManager:
+            Creates a SettingsManager from the defaults, the settings file and the command line options.
+        configure_imagemagick():
+            Points Wand at the bundled ImageMagick when no system install is available, without any popups.
+        extract(args) -> int:
+            Runs a batch extraction and prints the statistics.
+        main(argv=None) -> int:
+            Entry point for the command line.
+    """
+
+    CLI_SETTING_OPTIONS = {
+        "animation_format": "format",
+        "frame_format": "frame_format",
+        "fps": "fps",
+        "delay": "delay",
+        "period": "period",
+        "scale": "scale",
+        "frame_scale": "frame_scale",
+        "scale_naming": "scale_naming",
+        "threshold": "threshold",
+        "crop_option": "crop",
+        "frame_selection": "frame_selection",
+        "filename_format": "filename_format",
+        "prefix": "prefix",
+        "var_delay": "var_delay",
+        "fnf_idle_loop": "fnf_idle_loop",
+        "gif_backend": "gif_backend",
+    }
+
+    @staticmethod
+    def build_parser():
+        parser = argparse.ArgumentParser(
+            prog="python -m core.cli",
+            description="TextureAtlas to GIF and Frames - headless batch extractor",
+        )
+        subparsers = parser.add_subparsers(dest="command", required=True)
+
+        extract = subparsers.add_parser(
+            "extract", help="Extract every spritesheet in a directory"
+        )
+        extract.add_argument("input_dir", help="Directory containing the spritesheets")
+        extract.add_argument("output_dir", help="Directory to write the frames and animations to")
+        extract.add_argument(
+            "--files",
+            nargs="+",
+            help="Only extract these spritesheet image filenames (default: all in input_dir)",
+        )
+        extract.add_argument(
+            "--settings", help="JSON file with 'global', 'spritesheets' and 'animations' settings"
+        )
+        extract.add_argument(
+            "--app-config", help="App config file to read the extraction and compression defaults from"
+        )
+        extract.add_argument(
+            "--format",
+            nargs="+",
+            choices=["None", "GIF", "WebP", "APNG"],
+            help="Animation format, or several to export each animation in all of them",
+        )
+        extract.add_argument(
+            "--frame-format",
+            nargs="+",
+            choices=["None", "AVIF", "BMP", "DDS", "PNG", "TGA", "TIFF", "WebP"],
+            help="Frame format, or several to save each frame in all of them",
+        )
+        extract.add_argument("--fps", type=float, help="Animation frame rate")
+        extract.add_argument("--delay", type=int, help="Loop delay in milliseconds")
+        extract.add_argument("--period", type=int, help="Minimum animation period in milliseconds")
+        extract.add_argument(
+            "--scale", type=float, nargs="+", help="Animation scale, or several to export every scale"
+        )
+        extract.add_argument(
+            "--frame-scale", type=float, nargs="+", help="Frame scale, or several to export every scale"
+        )
+        extract.add_argument(
+            "--scale-naming",
+            choices=["Subfolder", "Suffix"],
+            help="With several scales, write each scale to a subfolder (e.g. 2x/) or add a suffix (e.g. @2x)",
+        )
+        extract.add_argument("--threshold", type=float, help="GIF alpha threshold (0-1)")
+        extract.add_argument(
+            "--crop", choices=["None", "Frame based", "Animation based"], help="Crop option"
+        )
+        extract.add_argument("--frame-selection", help="Frame selection, e.g. 'All' or 'No duplicates'")
+        extract.add_argument("--filename-format", help="Filename format")
+        extract.add_argument("--prefix", help="Filename prefix")
+        extract.add_argument(
+            "--var-delay", action="store_true", default=None, help="Use variable frame delays"
+        )
+        extract.add_argument(
+            "--fnf-idle-loop",
+            action="store_true",
+            default=None,
+            help="Set the loop delay of idle animations to 0",
+        )
+        extract.add_argument(
+            "--gif-backend",
+            choices=["Wand", "Pillow"],
+            help="GIF encoder: Wand (ImageMagick) or Pillow (numpy/Pillow only)",
+        )
+        extract.add_argument("--workers", type=int, help="Number of spritesheets processed at once")
+        extract.add_argument(
+            "--memory-limit",
+            type=int,
+            help="Memory budget in MB for spritesheets processed at once (0 for no limit)",
+        )
+        extract.add_argument(
+            "--processes",
+            action="store_true",
+            help="Run the workers as separate processes instead of threads",
+        )
+        extract.add_argument(
+            "--metrics-log",
+            help="Append per-spritesheet and per-animation timing events to this JSON-lines file",
+        )
+        extract.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Re-export everything, ignoring the output cache of previous runs",
+        )
+        extract.add_argument(
+            "--background",
+            choices=["key_background", "exclude_background", "skip"],
+            default="key_background",
+            help="Background handling for spritesheets without metadata",
+        )
+        return parser
+
+    @staticmethod
+    def build_settings_manager(args, app_config=None):
+        if app_config is not None:
+            extraction_defaults = app_config.get_extraction_defaults()
+            compression_defaults = app_config.get_compression_defaults()
+        else:
+            extraction_defaults = dict(AppConfig.DEFAULTS["extraction_defaults"])
+            compression_defaults = AppConfig.DEFAULTS["compression_defaults"]
+
+        global_settings = {
+            "prefix": "",
+            "replace_rules": [],
+            "var_delay": extraction_defaults.pop("variable_delay", False),
+        }
+        global_settings.update(extraction_defaults)
+        global_settings["compression_settings"] = {
+            f"{format_name}_{key}": value
+            for format_name, values in compression_defaults.items()
+            for key, value in values.items()
+        }
+
+        spritesheet_settings = {}
+        animation_settings = {}
+        if args.settings:
+            with open(args.settings, "r", encoding="utf-8") as f:
+                settings_file = json.load(f)
+            global_settings.update(settings_file.get("global", {}))
+            spritesheet_settings = settings_file.get("spritesheets", {})
+            animation_settings = settings_file.get("animations", {})
+
+        for setting_key, arg_name in CommandLineInterface.CLI_SETTING_OPTIONS.items():
+            value = getattr(args, arg_name, None)
+            if value is not None:
+                global_settings[setting_key] = value
+
+        settings_manager = SettingsManager()
+        settings_manager.set_global_settings(**global_settings)
+        for spritesheet_name, settings in spritesheet_settings.items():
+            settings_manager.set_spritesheet_settings(spritesheet_name, **settings)
+        for animation_name, settings in animation_settings.items():
+            settings_manager.set_animation_settings(animation_name, **settings)
+        return settings_manager
+
+    @staticmethod
+    def configure_imagemagick():
+        if DependenciesChecker.check_imagemagick():
+            return
+        if platform.system() == "Windows":
+            try:
+                DependenciesChecker.configure_imagemagick()
+            except Exception as e:
+                print(f"Failed to configure bundled ImageMagick: {e}")
+
+    @staticmethod
+    def extract(args):
+        from core.extractor import Extractor
+
+        app_config = AppConfig(args.app_config) if args.app_config else None
+        settings_manager = CommandLineInterface.build_settings_manager(args, app_config)
+
+        spritesheet_list = args.files or Utilities.list_spritesheets(args.input_dir)
+        os.makedirs(args.output_dir, exist_ok=True)
+
+        extractor = Extractor(None, APP_VERSION, settings_manager, app_config=app_config)
+        extractor.background_choices = {filename: args.background for filename in spritesheet_list}
+        if args.no_cache:
+            extractor.use_output_cache = False
+
+        metrics_log = None
+        if args.metrics_log:
+            metrics_log = JsonLinesEventLog(args.metrics_log)
+            extractor.add_observer(metrics_log)
+
+        def on_progress(completed, total):
+            print(f"[CLI] {completed}/{total} spritesheets processed")
+
+        def on_error(error):
+            print(f"[CLI] Error: {error}")
+            return True
+
+        try:
+            stats = extractor.run_batch(
+                args.input_dir,
+                args.output_dir,
+                spritesheet_list,
+                progress_callback=on_progress,
+                error_callback=on_error,
+                max_workers=args.workers,
+                execution_mode="processes" if args.processes else None,
+                memory_limit_mb=args.memory_limit,
+            )
+        finally:
+            if metrics_log is not None:
+                metrics_log.close()
+        stats["spritesheets_total"] = len(spritesheet_list)
+        return stats
+
+    @staticmethod
+    def main(argv=None):
+        parser = CommandLineInterface.build_parser()
+        args = parser.parse_args(argv)
+
+        if not os.path.isdir(args.input_dir):
+            parser.error(f"input directory does not exist: {args.input_dir}")
+
+        stdout = sys.stdout
+        # The pipeline reports progress with print(), keep stdout clean for the statistics.
+        with contextlib.redirect_stdout(sys.stderr):
+            CommandLineInterface.configure_imagemagick()
+            if args.command == "extract":
+                stats = CommandLineInterface.extract(args)
+
+        stats["duration"] = round(stats["duration"], 3)
+        json.dump(stats, stdout, indent=4)
+        stdout.write("\n")
+        return 1 if stats["sprites_failed"] or stats["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(CommandLineInterface.main())
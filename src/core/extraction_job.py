@@ -0,0 +1,154 @@
+import os
+import time
+import xml.etree.ElementTree as ET
+
+# Import our own modules
+from core.atlas_processor import AtlasProcessor
+from core.sprite_processor import SpriteProcessor
+from core.animation_processor import AnimationProcessor
+from core.exception_handler import ExceptionHandler
+from core.output_cache import OutputCache
+from core.extraction_metrics import ExtractionMetrics
+from parsers.background_analysis_cache import BackgroundAnalysisCache
+from utils.atlas_cache import AtlasCache
+
+
+class ExtractionJob:
+    """
+    A self-contained description of the work needed to extract a single spritesheet.
+
+    Jobs only hold plain data (paths, a settings snapshot and strings), so they can be
+    pickled and sent to a worker process as well as run directly on a worker thread.
+
+    Attributes:
+        atlas_path (str): The file path to the texture atlas image.
+        metadata_path (str): The file path to the XML/TXT metadata file, or None for unknown spritesheets.
+        output_dir (str): The directory where frames and animations for this spritesheet are written.
+        settings_manager (SettingsManager): The settings used for this spritesheet, usually a snapshot.
+        current_version (str): The current version of the application.
+        keying_action (str): Optional background handling choice for unknown spritesheets.
+        settings_key (str): Hash of the application version and the resolved settings, combined with
+            the hash of the atlas and metadata bytes into the cache key of the whole spritesheet.
+            None disables the output cache.
+        event_sink (callable): Receives the ExtractionMetrics events as they happen. Only usable on
+            the thread backend; without it the events are returned with the result.
+        background_analysis (BackgroundAnalysis): The background analysis of an unknown spritesheet made
+            by the pre-scan, or None. Stored in the BackgroundAnalysisCache of the worker before parsing.
+        encode_workers (int): The encoding threads the job may use, its share of the batch's CPU threads.
+            1 by default.
+        submitted_at (float): time.time() at which the job was queued, used to report the queue wait.
+
+    Methods:
+        run(parent_window=None) -> dict:
+            Extracts the spritesheet and returns a dict with the frames_generated,
+            anims_generated and sprites_failed counts, and the collected metrics events.
+            The atlas is dropped from the AtlasCache once the job is done.
+            "skipped" is True when the output cache shows the outputs are unchanged.
+    """
+
+    def __init__(
+        self,
+        atlas_path,
+        metadata_path,
+        output_dir,
+        settings_manager,
+        current_version,
+        keying_action=None,
+        settings_key=None,
+        event_sink=None,
+        background_analysis=None,
+        encode_workers=1,
+    ):
+        self.atlas_path = atlas_path
+        self.metadata_path = metadata_path
+        self.output_dir = output_dir
+        self.settings_manager = settings_manager
+        self.current_version = current_version
+        self.keying_action = keying_action
+        self.settings_key = settings_key
+        self.event_sink = event_sink
+        self.background_analysis = background_analysis
+        self.encode_workers = encode_workers
+        self.submitted_at = None
+
+    def run(self, parent_window=None):
+        frames_generated = 0
+        anims_generated = 0
+        sprites_failed = 0
+
+        atlas_key = source_digest = output_cache = None
+        if self.settings_key:
+            source_digest = OutputCache.source_digest(
+                self.atlas_path, self.metadata_path, self.keying_action
+            )
+            atlas_key = OutputCache.hash_values(source_digest, self.settings_key)
+            output_cache = OutputCache(self.output_dir)
+            if output_cache.is_atlas_fresh(atlas_key):
+                AtlasCache.discard(self.atlas_path)
+                return {
+                    "frames_generated": 0,
+                    "anims_generated": 0,
+                    "sprites_failed": 0,
+                    "skipped": True,
+                    "events": [],
+                }
+
+        metrics = ExtractionMetrics(os.path.basename(self.atlas_path), self.event_sink)
+        queue_wait = time.time() - self.submitted_at if self.submitted_at else 0.0
+        metrics.start_spritesheet(queue_wait)
+
+        try:
+            is_unknown_spritesheet = self.metadata_path is None
+
+            with metrics.stage("parse"):
+                if self.background_analysis is not None:
+                    BackgroundAnalysisCache.put(self.atlas_path, self.background_analysis)
+                atlas_processor = AtlasProcessor(
+                    self.atlas_path, self.metadata_path, parent_window, self.keying_action
+                )
+                sprite_processor = SpriteProcessor(atlas_processor.atlas, atlas_processor.sprites)
+                animations = sprite_processor.process_sprites()
+            animation_processor = AnimationProcessor(
+                animations,
+                self.atlas_path,
+                self.output_dir,
+                self.settings_manager,
+                self.current_version,
+                output_cache,
+                source_digest,
+                metrics,
+                self.encode_workers,
+            )
+
+            try:
+                frames_generated, anims_generated = animation_processor.process_animations(
+                    is_unknown_spritesheet
+                )
+                if output_cache is not None:
+                    output_cache.complete(atlas_key, animation_processor.processed_animations)
+            finally:
+                # Keep the entries of the animations that did finish, even if a later one failed.
+                if output_cache is not None:
+                    output_cache.save()
+
+            metrics.finish_spritesheet(frames_generated, anims_generated)
+
+            return {
+                "frames_generated": frames_generated,
+                "anims_generated": anims_generated,
+                "sprites_failed": sprites_failed,
+                "events": metrics.events,
+            }
+
+        except ET.ParseError:
+            sprites_failed += 1
+            raise ET.ParseError(f"Badly formatted XML file:\n\n{self.metadata_path}")
+
+        except Exception as e:
+            ExceptionHandler.handle_exception(
+                e, self.metadata_path if self.metadata_path else self.atlas_path, sprites_failed
+            )
+
+        finally:
+            # The scheduler only accounts for the atlas while its job runs.
+            AtlasCache.discard(self.atlas_path)
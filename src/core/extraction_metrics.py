@@ -0,0 +1,201 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ExtractionMetrics:
+    """
+    Collects timings and counts while a spritesheet is extracted and reports them as events.
+
+    Time is split into the stages listed in STAGES. Stages can be nested (e.g. scaling inside
+    cropping), in which case the time is only charged to the innermost stage, so the stage
+    totals of an animation add up to the time spent in it. Stages can also be timed on several
+    threads at once (e.g. encoders running in parallel); each thread nests its own stages and
+    their times are added up, so the totals can then exceed the elapsed time.
+
+    Every event is a JSON-serializable dict with at least "event", "spritesheet" and "time"
+    (seconds since the epoch). Events are passed to the sink as soon as they happen, or kept
+    in the events list when there is no sink (e.g. in a worker process, where the events are
+    sent back with the job result).
+
+    Events:
+        spritesheet_started: queue_wait (seconds between submitting the job and starting it).
+        animation_finished: animation, timings, frames, animations, bytes, cached.
+        spritesheet_finished: timings, frames, animations, bytes, duration.
+
+    Attributes:
+        STAGES (tuple): The names of the timed stages.
+        spritesheet (str): The spritesheet filename added to every event.
+        sink (callable): Called with every event, or None to collect them in events.
+        events (list): The collected events when there is no sink.
+
+    Methods:
+        emit(event, **fields):
+            Reports an event.
+        stage(name):
+            Context manager that times a block as the given stage.
+        add_bytes(count):
+            Adds written bytes to the current animation and spritesheet.
+        write_file(filename, data, atomic=False):
+            Writes bytes to a file, timed as the write stage and counted in the byte totals.
+            With atomic, the bytes are written to a temporary file that is renamed to filename.
+        start_spritesheet(queue_wait=0.0):
+            Emits spritesheet_started and resets the spritesheet totals.
+        start_animation(animation_name):
+            Resets the totals of the current animation.
+        finish_animation(frames=0, animations=0, cached=False):
+            Emits animation_finished with the totals of the current animation.
+        finish_spritesheet(frames=0, animations=0):
+            Emits spritesheet_finished with the totals of the spritesheet.
+    """
+
+    STAGES = ("parse", "crop", "scale", "encode", "write")
+
+    def __init__(self, spritesheet=None, sink=None):
+        self.spritesheet = spritesheet
+        self.sink = sink
+        self.events = []
+        self._spritesheet_timings = self._empty_timings()
+        self._spritesheet_bytes = 0
+        self._spritesheet_start = time.perf_counter()
+        self._animation_name = None
+        self._animation_timings = self._empty_timings()
+        self._animation_bytes = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        record = {"event": event, "spritesheet": self.spritesheet, "time": time.time()}
+        record.update(fields)
+        if self.sink is not None:
+            self.sink(record)
+        else:
+            self.events.append(record)
+
+    @property
+    def _stage_stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def stage(self, name):
+        stage_stack = self._stage_stack
+        now = time.perf_counter()
+        if stage_stack:
+            # Pause the enclosing stage while this one runs.
+            outer = stage_stack[-1]
+            self._charge(outer[0], now - outer[1])
+        entry = [name, now]
+        stage_stack.append(entry)
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            stage_stack.pop()
+            self._charge(name, now - entry[1])
+            if stage_stack:
+                stage_stack[-1][1] = now
+
+    def add_bytes(self, count):
+        with self._lock:
+            self._animation_bytes += count
+            self._spritesheet_bytes += count
+
+    def write_file(self, filename, data, atomic=False):
+        with self.stage("write"):
+            if not atomic:
+                with open(filename, "wb") as f:
+                    f.write(data)
+            else:
+                # Write next to the target and rename, readers never see a partial file.
+                temp_filename = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+                try:
+                    with open(temp_filename, "wb") as f:
+                        f.write(data)
+                    os.replace(temp_filename, filename)
+                except BaseException:
+                    if os.path.exists(temp_filename):
+                        os.remove(temp_filename)
+                    raise
+        self.add_bytes(len(data))
+
+    def start_spritesheet(self, queue_wait=0.0):
+        self._spritesheet_timings = self._empty_timings()
+        self._spritesheet_bytes = 0
+        self._spritesheet_start = time.perf_counter()
+        self.emit("spritesheet_started", queue_wait=round(max(queue_wait, 0.0), 6))
+
+    def start_animation(self, animation_name):
+        self._animation_name = animation_name
+        self._animation_timings = self._empty_timings()
+        self._animation_bytes = 0
+
+    def finish_animation(self, frames=0, animations=0, cached=False):
+        self.emit(
+            "animation_finished",
+            animation=self._animation_name,
+            timings=self._rounded(self._animation_timings),
+            frames=frames,
+            animations=animations,
+            bytes=self._animation_bytes,
+            cached=cached,
+        )
+        self._animation_name = None
+
+    def finish_spritesheet(self, frames=0, animations=0):
+        self.emit(
+            "spritesheet_finished",
+            timings=self._rounded(self._spritesheet_timings),
+            frames=frames,
+            animations=animations,
+            bytes=self._spritesheet_bytes,
+            duration=round(time.perf_counter() - self._spritesheet_start, 6),
+        )
+
+    def _charge(self, stage, seconds):
+        with self._lock:
+            self._spritesheet_timings[stage] = self._spritesheet_timings.get(stage, 0.0) + seconds
+            if self._animation_name is not None:
+                self._animation_timings[stage] = self._animation_timings.get(stage, 0.0) + seconds
+
+    def _empty_timings(self):
+        return {stage: 0.0 for stage in self.STAGES}
+
+    @staticmethod
+    def _rounded(timings):
+        return {stage: round(seconds, 6) for stage, seconds in timings.items()}
+
+
+class JsonLinesEventLog:
+    """
+    An extraction observer that appends every event as one JSON object per line to a file.
+
+    Attributes:
+        path (str): The log file path.
+
+    Methods:
+        __call__(event):
+            Writes an event to the log.
+        close():
+            Closes the log file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, event):
+        line = json.dumps(event, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
@@ -1,21 +1,18 @@
 import os
 import sys
 import concurrent.futures
+import threading
 import time
 import gc
-import tkinter as tk
-import xml.etree.ElementTree as ET
-from tkinter import messagebox
-from PIL import Image
 import tempfile
 
 # Import our own modules
-from core.atlas_processor import AtlasProcessor
-from core.sprite_processor import SpriteProcessor
-from core.frame_selector import FrameSelector
-from core.animation_processor import AnimationProcessor
-from core.animation_exporter import AnimationExporter
-from core.exception_handler import ExceptionHandler
+from core.animation_preview import PreviewSession
+from core.extraction_job import ExtractionJob
+from core.memory_scheduler import MemoryScheduler
+from core.output_cache import OutputCache
+from parsers.background_analysis_cache import BackgroundAnalysisCache
+from utils.atlas_cache import AtlasCache
 from utils.utilities import Utilities
 
 
@@ -28,14 +25,36 @@ class Extractor:
         current_version (str): The current version of the extractor.
         settings_manager (SettingsManager): Manages global, animation-specific, and spritesheet-specific settings.
         app_config (AppConfig): Configuration for resource limits (CPU/memory).
-        fnf_idle_loop (tk.BooleanVar): A flag to determine if idle animations should have a loop delay of 0.
+        fnf_idle_loop (bool): A flag to determine if idle animations should have a loop delay of 0.
+        background_choices (dict): Background handling choices for unknown spritesheets, keyed by filename.
+        use_output_cache (bool): Skip spritesheets and animations whose outputs are unchanged since the last run.
+            Taken from the resource_limits.use_output_cache config value, enabled without a config.
+        observers (list): Callables receiving every extraction event dict, see add_observer.
 
     Methods:
         process_directory(input_dir, output_dir, progress_var, tk_root, spritesheet_list=None):
             Processes the given directory of spritesheets and metadata files, extracting sprites and generating animations.
             Returns early without processing if the user cancels background color detection dialogs.
-        extract_sprites(atlas_path, metadata_path, output_dir, settings):
+        run_batch(input_dir, output_dir, spritesheet_list, progress_callback=None, error_callback=None, max_workers=None, execution_mode=None, parent_window=None):
+            Extracts a list of spritesheets without any Tk dependency and returns the run statistics.
+            Atlases are processed on a thread pool, or on a process pool when the
+            resource_limits.execution_mode config value is "processes". When
+            resource_limits.memory_limit_mb is set, spritesheets only run concurrently while
+            their estimated peak memory fits the budget, and the AtlasCache is limited to a share
+            of it. The AtlasCache is cleared when the batch is finished.
+        add_observer(observer):
+            Registers a callable that receives the structured events of run_batch: batch_started,
+            spritesheet_started, animation_finished, spritesheet_finished, spritesheet_skipped,
+            spritesheet_failed and batch_finished (see ExtractionMetrics for the per-spritesheet fields).
+            Observers may be called from worker threads.
+        remove_observer(observer):
+            Unregisters an observer.
+        extract_sprites(atlas_path, metadata_path, output_dir, settings, parent_window=None, keying_action=None):
             Extracts sprites from a given atlas and metadata file, and processes the animations.
+        generate_animation_preview(atlas_path, metadata_path, settings, animation_name=None):
+            Prepares the frames and durations of an animation for the preview window without encoding it.
+            Returns an AnimationPreview, or None on failure. Uses the PreviewSession of the animation,
+            so only the stages affected by changed settings are recomputed.
         generate_temp_animation_for_preview(atlas_path, metadata_path, settings, animation_name=None, temp_dir=None):
             Generates a temporary animated image file for preview purposes.
     """
@@ -45,43 +64,153 @@ class Extractor:
         self.progress_bar = progress_bar
         self.current_version = current_version
         self.app_config = app_config
-        self.fnf_idle_loop = tk.BooleanVar()
+        self.fnf_idle_loop = False
+        self.background_choices = {}
+        self.use_output_cache = (
+            bool(app_config.get("resource_limits", {}).get("use_output_cache", True))
+            if app_config
+            else True
+        )
+        self.observers = []
+        self._observer_lock = threading.Lock()
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def remove_observer(self, observer):
+        if observer in self.observers:
+            self.observers.remove(observer)
 
     def process_directory(self, input_dir, output_dir, progress_var, tk_root, spritesheet_list=None):
-        total_frames_generated = 0
-        total_anims_generated = 0
-        total_sprites_failed = 0
+        from tkinter import messagebox
 
         progress_var.set(0)
         total_files = Utilities.count_spritesheets(spritesheet_list)
         self.progress_bar["maximum"] = total_files
 
-        cpu_threads = os.cpu_count() // 4
-        if self.app_config:
-            resource_limits = self.app_config.get("resource_limits", {})
-            cpu_cores_val = resource_limits.get("cpu_cores", "auto")
-            print(f"[Extractor] CPU cores setting from config: {cpu_cores_val}")
-            try:
-                if cpu_cores_val != "auto":
-                    cpu_threads = max(1, min(int(cpu_cores_val), os.cpu_count()))
-                    print(f"[Extractor] Using {cpu_threads} CPU threads (from config)")
-                else:
-                    print(f"[Extractor] Using {cpu_threads} CPU threads (auto: {os.cpu_count()} / 4)")
-            except Exception:
-                cpu_threads = os.cpu_count() // 4
-                print(f"[Extractor] Error reading CPU config, defaulting to {cpu_threads} threads")
-        else:
-            print(f"[Extractor] No app config found, using default {cpu_threads} CPU threads")
-
-        start_time = time.time()
-
         # Handle background color detection for unknown spritesheets before processing
         if self._handle_unknown_spritesheets_background_detection(input_dir, spritesheet_list, tk_root):
             print("[Extractor] Background detection was cancelled - stopping processing")
             return
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=cpu_threads) as executor:
-            futures = []
+        def on_progress(completed, total):
+            tk_root.after(0, progress_var.set, completed)
+            tk_root.after(0, tk_root.update_idletasks)
+
+        def on_error(error):
+            messagebox.showerror("Error", f"Something went wrong!!\n{str(error)}")
+            if not messagebox.askyesno("Continue?", "Do you want to try continue processing?"):
+                sys.exit()
+            return True
+
+        stats = self.run_batch(
+            input_dir,
+            output_dir,
+            spritesheet_list,
+            progress_callback=on_progress,
+            error_callback=on_error,
+            parent_window=tk_root,
+        )
+        minutes, seconds = divmod(stats["duration"], 60)
+
+        tk_root.after(
+            0,
+            messagebox.showinfo,
+            "Information",
+            f"Finished processing all files.\n\n"
+            f"Frames Generated: {stats['frames_generated']}\n"
+            f"Animations Generated: {stats['anims_generated']}\n"
+            f"Sprites Failed: {stats['sprites_failed']}\n\n"
+            f"Processing Duration: {int(minutes)} minutes and {int(seconds)} seconds",
+        )
+
+    def run_batch(
+        self,
+        input_dir,
+        output_dir,
+        spritesheet_list,
+        progress_callback=None,
+        error_callback=None,
+        max_workers=None,
+        execution_mode=None,
+        parent_window=None,
+        memory_limit_mb=None,
+    ):
+        """
+        Extract a list of spritesheets without any user interface.
+
+        Args:
+            input_dir (str): Directory containing the spritesheets and their metadata files.
+            output_dir (str): Directory where a folder per spritesheet is created.
+            spritesheet_list (list): Spritesheet image filenames relative to input_dir.
+            progress_callback (callable, optional): Called as progress_callback(completed, total)
+                every time a spritesheet finishes.
+            error_callback (callable, optional): Called with the exception raised by a spritesheet.
+                Returning False stops submitting further results. Errors are only collected if omitted.
+            max_workers (int, optional): Worker count, overriding the resource_limits config.
+            execution_mode (str, optional): "threads" or "processes", overriding the resource_limits config.
+            parent_window (tk.Tk, optional): Parent window forwarded to the parsers on the thread backend.
+            memory_limit_mb (int, optional): Memory budget for concurrently running spritesheets,
+                overriding the resource_limits config. 0 disables the limit.
+
+        Returns:
+            dict: frames_generated, anims_generated, sprites_failed, spritesheets_processed,
+                spritesheets_skipped (unchanged since the last run according to the output cache),
+                duration (seconds) and errors (list of {"spritesheet", "error"} dicts).
+        """
+        stats = {
+            "frames_generated": 0,
+            "anims_generated": 0,
+            "sprites_failed": 0,
+            "spritesheets_processed": 0,
+            "spritesheets_skipped": 0,
+            "duration": 0.0,
+            "errors": [],
+        }
+        total_files = Utilities.count_spritesheets(spritesheet_list)
+
+        cpu_threads, config_execution_mode, config_memory_limit_mb = self._get_worker_settings()
+        if max_workers:
+            cpu_threads = max(1, int(max_workers))
+        if execution_mode is None:
+            execution_mode = config_execution_mode
+        if memory_limit_mb is None:
+            memory_limit_mb = config_memory_limit_mb
+
+        use_processes = execution_mode == "processes"
+        if use_processes:
+            executor_class = concurrent.futures.ProcessPoolExecutor
+            print(f"[Extractor] Running extraction in a pool of {cpu_threads} worker processes")
+        else:
+            executor_class = concurrent.futures.ThreadPoolExecutor
+
+        scheduler = MemoryScheduler(memory_limit_mb)
+        if scheduler.budget_bytes:
+            print(f"[Extractor] Scheduling spritesheets under a {memory_limit_mb} MB memory budget")
+        if use_processes:
+            # Worker processes decode their own atlases, the ones cached here are of no use to them.
+            AtlasCache.clear()
+        elif scheduler.budget_bytes:
+            # The job estimates cover the atlases being extracted but not the ones cached for later
+            # spritesheets (e.g. by the background pre-scan), so those get a share of the budget.
+            atlas_cache_bytes = min(AtlasCache.MAX_BYTES, scheduler.budget_bytes // 8)
+            AtlasCache.set_max_bytes(atlas_cache_bytes)
+            scheduler.reserve(atlas_cache_bytes)
+
+        start_time = time.time()
+        self._emit(
+            "batch_started",
+            total=total_files,
+            workers=cpu_threads,
+            execution_mode=execution_mode,
+            memory_limit_mb=memory_limit_mb,
+        )
+        # Worker threads report their events live, worker processes send them back with the result.
+        event_sink = self._notify_observers if self.observers and not use_processes else None
+
+        with executor_class(max_workers=cpu_threads) as executor:
+            pending_jobs = []
+            completed = 0
 
             filenames = spritesheet_list
             for filename in filenames:
@@ -93,160 +222,200 @@ class Extractor:
                 sprite_output_dir = os.path.join(output_dir, base_filename)
                 os.makedirs(sprite_output_dir, exist_ok=True)
 
-                settings = self.settings_manager.get_settings(filename)
-
                 if os.path.isfile(xml_path) or os.path.isfile(txt_path):
-                    future = executor.submit(
-                        self.extract_sprites,
-                        os.path.join(input_dir, filename),
-                        xml_path if os.path.isfile(xml_path) else txt_path,
-                        sprite_output_dir,
-                        settings,
-                        tk_root,
-                    )
-                    futures.append(future)
+                    metadata_path = xml_path if os.path.isfile(xml_path) else txt_path
 
                 # Fallback if no metadata file is found or if the spritesheet is not officially supported.
                 elif (os.path.isfile(image_path) and filename.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.webp'))):
-                    future = executor.submit(
-                        self.extract_sprites,
-                        image_path,
-                        None,
-                        sprite_output_dir,
-                        settings,
-                        tk_root,
+                    metadata_path = None
+
+                else:
+                    continue
+
+                keying_action = self.background_choices.get(filename)
+                settings_snapshot = self.settings_manager.snapshot(filename)
+                # Worker processes get a picklable job with a detached copy of the settings.
+                settings_manager = settings_snapshot if use_processes else self.settings_manager
+
+                settings_key = None
+                if self.use_output_cache:
+                    # The job hashes the atlas and metadata files itself, so hashing a large
+                    # batch overlaps the extraction instead of delaying the first job.
+                    settings_key = OutputCache.hash_values(
+                        self.current_version,
+                        settings_snapshot.global_settings,
+                        settings_snapshot.spritesheet_settings,
+                        settings_snapshot.animation_settings,
                     )
-                    futures.append(future)
 
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    result = future.result()
-                    total_frames_generated += result["frames_generated"]
-                    total_anims_generated += result["anims_generated"]
-                    total_sprites_failed += result["sprites_failed"]
+                job = ExtractionJob(
+                    image_path,
+                    metadata_path,
+                    sprite_output_dir,
+                    settings_manager,
+                    self.current_version,
+                    keying_action,
+                    settings_key,
+                    event_sink,
+                    # Worker processes do not share the cache, the job carries the pre-scan result.
+                    BackgroundAnalysisCache.peek(image_path) if metadata_path is None else None,
+                )
+                job.submitted_at = time.time()
+                estimate = (
+                    MemoryScheduler.estimate_job_memory(image_path, metadata_path)
+                    if scheduler.budget_bytes
+                    else 0
+                )
+                pending_jobs.append((job, filename, estimate))
+
+            # The jobs that run at the same time share the CPU threads for encoding, so the batch
+            # never uses more threads than the resource_limits allow.
+            encode_workers = max(1, cpu_threads // max(1, min(cpu_threads, len(pending_jobs))))
+            for job, _, _ in pending_jobs:
+                job.encode_workers = encode_workers
+
+            running = {}
+            cancelled = False
+            while pending_jobs or running:
+                # Start every pending job that fits the worker count and the memory budget,
+                # keeping the list order but letting smaller jobs pass a blocked large one.
+                for pending in list(pending_jobs):
+                    if cancelled or len(running) >= cpu_threads:
+                        break
+                    job, filename, estimate = pending
+                    if not scheduler.can_admit(estimate, len(running)):
+                        continue
+                    if scheduler.budget_bytes and estimate > scheduler.budget_bytes:
+                        print(
+                            f"[Extractor] {filename} needs about {estimate // (1024 * 1024)} MB, "
+                            f"processing it on its own"
+                        )
+                    pending_jobs.remove(pending)
+                    scheduler.admit(estimate)
+                    if use_processes:
+                        future = executor.submit(job.run)
+                    else:
+                        future = executor.submit(job.run, parent_window)
+                    running[future] = (filename, estimate)
+
+                if not running:
+                    break
+
+                done, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    filename, estimate = running.pop(future)
+                    scheduler.release(estimate)
+                    try:
+                        result = future.result()
+                        for event in result.get("events", []):
+                            self._notify_observers(event)
+                        if result.get("skipped"):
+                            print(f"[Extractor] Skipping unchanged spritesheet: {filename}")
+                            self._emit("spritesheet_skipped", filename)
+                            stats["spritesheets_skipped"] += 1
+                        else:
+                            stats["frames_generated"] += result["frames_generated"]
+                            stats["anims_generated"] += result["anims_generated"]
+                            stats["sprites_failed"] += result["sprites_failed"]
+                            stats["spritesheets_processed"] += 1
+
+                    except Exception as e:
+                        stats["sprites_failed"] += 1
+                        stats["errors"].append({"spritesheet": filename, "error": str(e)})
+                        self._emit("spritesheet_failed", filename, error=str(e))
+                        if not cancelled and error_callback is not None and error_callback(e) is False:
+                            cancelled = True
+                            pending_jobs.clear()
+
+                    completed += 1
+                    if progress_callback is not None:
+                        progress_callback(completed, total_files)
+                    gc.collect()
+
+        # Decoded atlases are not kept around between batches.
+        AtlasCache.clear()
+        AtlasCache.set_max_bytes()
+
+        stats["duration"] = time.time() - start_time
+        self._emit("batch_finished", **stats)
+        return stats
+
+    def _emit(self, event, spritesheet=None, **fields):
+        if not self.observers:
+            return
+        record = {"event": event, "spritesheet": spritesheet, "time": time.time()}
+        record.update(fields)
+        self._notify_observers(record)
 
+    def _notify_observers(self, event):
+        with self._observer_lock:
+            for observer in list(self.observers):
+                try:
+                    observer(event)
                 except Exception as e:
-                    total_sprites_failed += 1
-                    messagebox.showerror("Error", f"Something went wrong!!\n{str(e)}")
-                    if not messagebox.askyesno("Continue?", "Do you want to try continue processing?"):
-                        sys.exit()
-
-                tk_root.after(0, progress_var.set, progress_var.get() + 1)
-                tk_root.after(0, tk_root.update_idletasks)
-                gc.collect()
-
-        end_time = time.time()
-        duration = end_time - start_time
-        minutes, seconds = divmod(duration, 60)
+                    print(f"[Extractor] Observer failed on {event.get('event')} event: {e}")
 
-        tk_root.after(
-            0,
-            messagebox.showinfo,
-            "Information",
-            f"Finished processing all files.\n\n"
-            f"Frames Generated: {total_frames_generated}\n"
-            f"Animations Generated: {total_anims_generated}\n"
-            f"Sprites Failed: {total_sprites_failed}\n\n"
-            f"Processing Duration: {int(minutes)} minutes and {int(seconds)} seconds",
+    def _get_worker_settings(self):
+        cpu_threads = max(1, os.cpu_count() // 4)
+        execution_mode = "threads"
+        memory_limit_mb = 0
+        if self.app_config:
+            resource_limits = self.app_config.get("resource_limits", {})
+            cpu_cores_val = resource_limits.get("cpu_cores", "auto")
+            execution_mode = resource_limits.get("execution_mode", "threads")
+            try:
+                memory_limit_mb = max(0, int(resource_limits.get("memory_limit_mb") or 0))
+            except (TypeError, ValueError):
+                print("[Extractor] Error reading memory limit config, running without a memory limit")
+            print(f"[Extractor] CPU cores setting from config: {cpu_cores_val}")
+            try:
+                if cpu_cores_val != "auto":
+                    cpu_threads = max(1, min(int(cpu_cores_val), os.cpu_count()))
+                    print(f"[Extractor] Using {cpu_threads} CPU threads (from config)")
+                else:
+                    print(f"[Extractor] Using {cpu_threads} CPU threads (auto: {os.cpu_count()} / 4)")
+            except Exception:
+                cpu_threads = max(1, os.cpu_count() // 4)
+                print(f"[Extractor] Error reading CPU config, defaulting to {cpu_threads} threads")
+        else:
+            print(f"[Extractor] No app config found, using default {cpu_threads} CPU threads")
+        return cpu_threads, execution_mode, memory_limit_mb
+
+    def extract_sprites(self, atlas_path, metadata_path, output_dir, settings, parent_window=None, keying_action=None):
+        job = ExtractionJob(
+            atlas_path,
+            metadata_path,
+            output_dir,
+            self.settings_manager,
+            self.current_version,
+            keying_action,
+            # A single spritesheet may use all the configured CPU threads.
+            encode_workers=self._get_worker_settings()[0],
         )
+        return job.run(parent_window)
 
-    def extract_sprites(self, atlas_path, metadata_path, output_dir, settings, parent_window=None):
-        frames_generated = 0
-        anims_generated = 0
-        sprites_failed = 0
-
+    def generate_animation_preview(self, atlas_path, metadata_path, settings, animation_name=None):
         try:
-            is_unknown_spritesheet = metadata_path is None
-            
-            atlas_processor = AtlasProcessor(atlas_path, metadata_path, parent_window)
-            sprite_processor = SpriteProcessor(atlas_processor.atlas, atlas_processor.sprites)
-            animations = sprite_processor.process_sprites()
-            animation_processor = AnimationProcessor(
-                animations, atlas_path, output_dir, self.settings_manager, self.current_version
-            )
-
-            frames_generated, anims_generated = animation_processor.process_animations(is_unknown_spritesheet)
-            return {
-                "frames_generated": frames_generated,
-                "anims_generated": anims_generated,
-                "sprites_failed": sprites_failed,
-            }
-
-        except ET.ParseError:
-            sprites_failed += 1
-            raise ET.ParseError(f"Badly formatted XML file:\n\n{metadata_path}")
+            session = PreviewSession.for_animation(atlas_path, metadata_path, animation_name)
+            return session.render(self.settings_manager, self.current_version, settings)
 
         except Exception as e:
-            ExceptionHandler.handle_exception(e, metadata_path if metadata_path else atlas_path, sprites_failed)
+            print(f"Preview animation generation error: {e}")
+            return None
 
     def generate_temp_animation_for_preview(self, atlas_path, metadata_path, settings, animation_name=None, temp_dir=None):
-        try:
-            atlas_processor = AtlasProcessor(atlas_path, metadata_path)
-            sprite_processor = SpriteProcessor(atlas_processor.atlas, atlas_processor.sprites)
-            animations = sprite_processor.process_sprites()
-
-            if animation_name:
-                animations = {animation_name: animations.get(animation_name, [])}
-            else:
-                if animations:
-                    first_anim = next(iter(animations))
-                    animations = {first_anim: animations[first_anim]}
-                else:
-                    return None
+        animation_preview = self.generate_animation_preview(
+            atlas_path, metadata_path, settings, animation_name
+        )
+        if animation_preview is None:
+            return None
 
+        try:
             if temp_dir is None:
                 temp_dir = tempfile.mkdtemp()
-
-            animation_exporter = AnimationExporter(
-                temp_dir,
-                self.current_version,
-                lambda img, size: img.resize(
-                    (round(img.width * abs(size)), round(img.height * abs(size))), Image.NEAREST
-                ),
-            )
-
-            for anim_name, image_tuples in animations.items():
-                spritesheet_name = os.path.basename(atlas_path)
-                preview_settings = self.settings_manager.get_settings(
-                    spritesheet_name, f"{spritesheet_name}/{anim_name}"
-                )
-                merged_settings = {**preview_settings, **settings}
-
-                animation_format = merged_settings.get("animation_format", "GIF")
-                if animation_format == "None":
-                    animation_format = "GIF"
-                merged_settings["animation_format"] = animation_format
-
-                indices = merged_settings.get("indices")
-                if indices:
-                    indices = list(filter(lambda i: ((i < len(image_tuples)) & (i >= 0)), indices))
-                    image_tuples = [image_tuples[i] for i in indices]
-
-                single_frame = FrameSelector.is_single_frame(image_tuples)
-                kept_frames = FrameSelector.get_kept_frames(
-                    merged_settings, single_frame, image_tuples
-                )
-
-                kept_frame_indices = FrameSelector.get_kept_frame_indices(kept_frames, image_tuples)
-                image_tuples = [
-                    img for idx, img in enumerate(image_tuples) if idx in kept_frame_indices
-                ]
-
-                animation_exporter.save_animations(
-                    image_tuples, spritesheet_name, anim_name, merged_settings
-                )
-
-                file_extensions = {
-                    "GIF": ".gif",
-                    "WebP": ".webp", 
-                    "APNG": ".png"
-                }
-                target_extension = file_extensions.get(animation_format, ".gif")
-
-                for file in os.listdir(temp_dir):
-                    if file.endswith(target_extension):
-                        return os.path.join(temp_dir, file)
-            return None
+            return animation_preview.save(temp_dir)
 
         except Exception as e:
             print(f"Preview animation generation error: {e}")
@@ -297,33 +466,33 @@ class Extractor:
 
             from parsers.unknown_parser import UnknownParser
             from gui.background_handler_window import BackgroundHandlerWindow
-            from PIL import Image
 
             BackgroundHandlerWindow.reset_batch_state()
 
             detection_results = []
 
-            for filename in unknown_spritesheets:
-                image_path = os.path.join(input_dir, filename)
-                try:
-                    image = Image.open(image_path)
-                    if image.mode != "RGBA":
-                        image = image.convert("RGBA")
-
-                    has_transparency = UnknownParser._has_transparency(image)
-                    detected_colors = []
+            # Analyse the spritesheets in parallel; parsing them later reuses the cached analyses.
+            cpu_threads = self._get_worker_settings()[0]
+            with concurrent.futures.ThreadPoolExecutor(max_workers=cpu_threads) as executor:
+                analyses = [
+                    executor.submit(
+                        BackgroundAnalysisCache.get,
+                        os.path.join(input_dir, filename),
+                        UnknownParser.analyze_background,
+                    )
+                    for filename in unknown_spritesheets
+                ]
 
-                    if not has_transparency:
-                        detected_colors = UnknownParser._detect_background_colors(
-                            image, max_colors=3
-                        )
+            for filename, analysis in zip(unknown_spritesheets, analyses):
+                try:
+                    analysis = analysis.result()
 
                     # Always add unknown spritesheets to detection results
                     detection_results.append(
                         {
                             "filename": filename,
-                            "colors": detected_colors,
-                            "has_transparency": has_transparency,
+                            "colors": list(analysis.colors),
+                            "has_transparency": analysis.has_transparency,
                         }
                     )
 
@@ -358,6 +527,7 @@ class Extractor:
                     if not hasattr(BackgroundHandlerWindow, "_file_choices"):
                         BackgroundHandlerWindow._file_choices = {}
                     BackgroundHandlerWindow._file_choices.update(background_choices)
+                    self.background_choices.update(background_choices)
                     print(
                         f"Background handling preferences set for {len(background_choices)} files"
                     )
@@ -1,8 +1,15 @@
+import io
 import os
+import queue
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from PIL.PngImagePlugin import PngInfo
 import pillow_avif
 
 # Import our own modules
+from core.extraction_metrics import ExtractionMetrics
+from core.frame_stack import FrameStack
 from utils.utilities import Utilities
 
 
@@ -10,36 +17,68 @@ class FrameExporter:
     """
     Exports individual frames from a spritesheet as images.
 
+    save_frames runs as a pipeline: the calling thread crops and scales the frames, a pool of
+    encode_workers threads encodes them, and a writer thread writes the encoded files in order,
+    each to a temporary file that is renamed into place, so no partially written frame is ever
+    left behind. The stages are connected by a queue of at most QUEUE_SIZE frames, which bounds
+    the frames and encoded files held in memory.
+
     Attributes:
+        QUEUE_SIZE (int):
+            The maximum number of frames waiting to be encoded or written.
         output_dir (str):
             Directory where exported frames will be saved.
         current_version (str):
             Version string to include in metadata.
         scale_image_func (callable):
             Function to scale images before saving.
+        saved_files (list):
+            Paths of the files written so far, in the order they were saved.
+        metrics (ExtractionMetrics):
+            Collects the crop, encode and write timings and the written bytes.
+        encode_workers (int):
+            The number of threads encoding frames, 1 unless the caller grants more of its CPU budget.
 
     Methods:
-        save_frames(image_tuples, kept_frame_indices, spritesheet_name, animation_name, scale, settings, is_unknown_spritesheet=False) -> int
+        save_frames(image_tuples, kept_frame_indices, spritesheet_name, animation_name, scale, settings, is_unknown_spritesheet=False, frame_stack=None) -> int
             Saves selected frames, applying cropping and scaling as specified in settings.
             The is_unknown_spritesheet parameter determines whether to apply extra cropping.
+            Frames with the same identity are encoded once and copied. The bounding boxes are
+            computed on a FrameStack of the frames, which is built unless one is passed.
+            The frame_format setting can be a list of formats; every frame is cropped and scaled
+            once and saved in each of them. The filename_suffix setting is appended to every frame name.
             Returns the number of frames successfully exported.
-        _save_frame_to_image(image, filename, frame_format)
-            Saves the frames in the specified format.
+        _final_frame_image(frame_stack, index, bbox, crop_option, animation_box, frame_scale, is_unknown_spritesheet)
+            Returns a frame cropped and scaled for saving.
+        _encode_frame(image, filename, frame_format, compression_settings=None) -> tuple
+            Encodes a frame in the specified format, or as PNG when that fails.
+            Returns the (filename, bytes, format) to write, or None.
+        _write_frames(write_queue, results)
+            The writer thread: writes or copies the queued frames in order.
+        _copy_saved_frame(source_filename, filename) -> bool
+            Copies an already written frame to a new filename.
         _apply_extra_crop_pass(image)
             Applies extra cropping to remove excessive whitespace around the sprite.
     """
 
-    def __init__(self, output_dir, current_version, scale_image_func):
+    QUEUE_SIZE = 32
+
+    def __init__(self, output_dir, current_version, scale_image_func, metrics=None, encode_workers=None):
         self.output_dir = output_dir
         self.current_version = current_version
         self.scale_image = scale_image_func
+        self.saved_files = []
+        self.metrics = metrics if metrics is not None else ExtractionMetrics()
+        self.encode_workers = max(1, int(encode_workers or 1))
 
-    def save_frames(self, image_tuples, kept_frame_indices, spritesheet_name, animation_name, scale, settings, is_unknown_spritesheet=False):
+    def save_frames(self, image_tuples, kept_frame_indices, spritesheet_name, animation_name, scale, settings, is_unknown_spritesheet=False, frame_stack=None):
         frames_generated = 0
         if len(image_tuples) == 0:
             return frames_generated
 
-        frame_format = settings.get("frame_format", "PNG")
+        frame_formats = Utilities.format_list(settings.get("frame_format", "PNG"))
+        if not frame_formats:
+            return frames_generated
         frame_scale = settings.get("frame_scale", scale)
 
         frames_folder = os.path.join(self.output_dir, animation_name)
@@ -56,85 +95,138 @@ class FrameExporter:
             "TIFF": ".tiff",
             "WebP": ".webp",
         }
-        file_extension = format_extensions.get(frame_format, ".png")
-
-        if crop_option == "Animation based":
-            min_x, min_y, max_x, max_y = float("inf"), float("inf"), 0, 0
-            for index, frame in enumerate(image_tuples):
-                if index in kept_frame_indices:
-                    bbox = frame[1].getbbox()
-                    if bbox:
-                        min_x = min(min_x, bbox[0])
-                        min_y = min(min_y, bbox[1])
-                        max_x = max(max_x, bbox[2])
-                        max_y = max(max_y, bbox[3])
-
-            if min_x > max_x:
-                return frames_generated
-
-        for index, frame in enumerate(image_tuples):
-            if index in kept_frame_indices:
-                formatted_frame_name = Utilities.format_filename(
-                    settings.get("prefix"),
-                    spritesheet_name,
-                    frame[0],
-                    settings.get("filename_format"),
-                    settings.get("replace_rules"),
-                )
-
-                frame_filename = os.path.join(
-                    frames_folder, f"{formatted_frame_name}{file_extension}"
-                )
-                frame_image = frame[1]
-
-                bbox = frame_image.getbbox()
-                if bbox:
-                    if crop_option == "Frame based":
-                        cropped_frame = frame_image.crop(bbox)
-                        if is_unknown_spritesheet:
-                            extra_cropped_frame = self._apply_extra_crop_pass(cropped_frame)
-                            final_frame_image = self.scale_image(
-                                extra_cropped_frame, frame_scale
-                            )
-                        else:
-                            final_frame_image = self.scale_image(
-                                cropped_frame, frame_scale
-                            )
 
-                    elif crop_option == "Animation based":
-                        cropped_frame = frame_image.crop((min_x, min_y, max_x, max_y))
-                        if is_unknown_spritesheet:
-                            extra_cropped_frame = self._apply_extra_crop_pass(cropped_frame)
-                            final_frame_image = self.scale_image(
-                                extra_cropped_frame, frame_scale
-                            )
-                        else:
-                            final_frame_image = self.scale_image(
-                                cropped_frame, frame_scale
-                            )
+        animation_box = None
+        with self.metrics.stage("crop"):
+            if frame_stack is None:
+                frame_stack = FrameStack.from_image_tuples(image_tuples)
+            frame_boxes = frame_stack.bboxes()
+            frame_ids = frame_stack.identities()
+            if crop_option == "Animation based":
+                kept_indices = [index for index in kept_frame_indices if 0 <= index < len(frame_stack)]
+                animation_box = frame_stack.union_bbox(kept_indices)
+                if animation_box is None:
+                    return frames_generated
+
+        # Identical frames look the same after cropping and scaling, so they are encoded once per format and copied.
+        written_by_identity = {}
+        results = {"copies": 0}
+        write_queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        writer = threading.Thread(target=self._write_frames, args=(write_queue, results), daemon=True)
+        writer.start()
 
-                    else:
-                        if is_unknown_spritesheet:
-                            extra_cropped_frame = self._apply_extra_crop_pass(frame_image)
-                            final_frame_image = self.scale_image(
-                                extra_cropped_frame, frame_scale
+        try:
+            with ThreadPoolExecutor(max_workers=self.encode_workers) as executor:
+                for index, frame in enumerate(image_tuples):
+                    if index not in kept_frame_indices:
+                        continue
+                    formatted_frame_name = Utilities.format_filename(
+                        settings.get("prefix"),
+                        spritesheet_name,
+                        frame[0],
+                        settings.get("filename_format"),
+                        settings.get("replace_rules"),
+                    ) + settings.get("filename_suffix", "")
+
+                    frame_id = frame_ids[index]
+                    # Every format encodes the same cropped and scaled frame.
+                    final_frame_image = None
+
+                    for frame_format in frame_formats:
+                        frame_filename = os.path.join(
+                            frames_folder,
+                            f"{formatted_frame_name}{format_extensions.get(frame_format, '.png')}",
+                        )
+
+                        identity_key = (frame_format, frame_id)
+                        if identity_key in written_by_identity:
+                            # The writer handles frames in order, so the source is written by then.
+                            write_queue.put((frame_filename, None, written_by_identity[identity_key]))
+                            continue
+
+                        bbox = frame_boxes[index]
+                        if not bbox:
+                            break
+
+                        if final_frame_image is None:
+                            final_frame_image = image = self._final_frame_image(
+                                frame_stack,
+                                index,
+                                bbox,
+                                crop_option,
+                                animation_box,
+                                frame_scale,
+                                is_unknown_spritesheet,
                             )
                         else:
-                            final_frame_image = self.scale_image(
-                                frame_image, frame_scale
-                            )
-
-                    self._save_frame_to_image(
-                        final_frame_image,
-                        frame_filename,
-                        frame_format,
-                        settings.get("compression_settings"),
-                    )
-                    frames_generated += 1
-                    print(f"Saved frame: {frame_filename}")
-        return frames_generated
-
-    def _save_frame_to_image(self, image, filename, frame_format, compression_settings=None):
+                            # Image.save stores its options on the image, concurrent saves need their own.
+                            image = final_frame_image.copy()
+
+                        encoded = executor.submit(
+                            self._encode_frame,
+                            image,
+                            frame_filename,
+                            frame_format,
+                            settings.get("compression_settings"),
+                        )
+                        written = {"filename": None}
+                        if frame_id is not None:
+                            written_by_identity[identity_key] = written
+                        # Blocks while QUEUE_SIZE frames are waiting, so preparing never runs far ahead.
+                        write_queue.put((frame_filename, encoded, written))
+                        frames_generated += 1
+        finally:
+            write_queue.put(None)
+            writer.join()
+        return frames_generated + results["copies"]
+
+    def _write_frames(self, write_queue, results):
+        while True:
+            item = write_queue.get()
+            if item is None:
+                return
+            frame_filename, encoded, written = item
+            try:
+                if encoded is None:
+                    if written["filename"] and self._copy_saved_frame(written["filename"], frame_filename):
+                        results["copies"] += 1
+                        print(f"Saved frame: {frame_filename}")
+                    continue
+
+                result = encoded.result()
+                if result is not None:
+                    filename, data, saved_format = result
+                    self.metrics.write_file(filename, data, atomic=True)
+                    self.saved_files.append(filename)
+                    written["filename"] = filename
+                    print(f"Successfully saved {filename} as {saved_format}")
+                print(f"Saved frame: {frame_filename}")
+            except Exception as e:
+                print(f"Error writing {frame_filename}: {e}")
+
+    def _final_frame_image(self, frame_stack, index, bbox, crop_option, animation_box, frame_scale, is_unknown_spritesheet):
+        with self.metrics.stage("crop"):
+            if crop_option == "Frame based":
+                box = bbox
+            elif crop_option == "Animation based":
+                box = animation_box
+            else:
+                box = None
+
+            if not is_unknown_spritesheet:
+                # Shared with the animation exporter when it uses the same crop and scale.
+                with self.metrics.stage("scale"):
+                    return frame_stack.scaled_image(index, box, frame_scale, self.scale_image)
+
+            if box is None:
+                cropped_frame = FrameStack.to_image(frame_stack.frame(index))
+            else:
+                left, upper, right, lower = box
+                cropped_frame = FrameStack.to_image(frame_stack.frames[index, upper:lower, left:right])
+            extra_cropped_frame = self._apply_extra_crop_pass(cropped_frame)
+            return self.scale_image(extra_cropped_frame, frame_scale)
+
+    def _encode_frame(self, image, filename, frame_format, compression_settings=None):
         save_kwargs = {}
 
         if compression_settings is None:
@@ -199,9 +291,15 @@ class FrameExporter:
             save_kwargs["alpha_quality"] = compression_settings.get("webp_alpha_quality", 100)
             save_kwargs["exact"] = compression_settings.get("webp_exact", True)
 
+        # Unknown formats are saved as PNG, matching the file extension chosen by save_frames.
+        save_kwargs.setdefault("format", "PNG")
+
         try:
-            image.save(filename, **save_kwargs)
-            print(f"Successfully saved {filename} as {frame_format}")
+            # Encode in memory, the writer thread writes the file.
+            with self.metrics.stage("encode"):
+                buffer = io.BytesIO()
+                image.save(buffer, **save_kwargs)
+            return filename, buffer.getvalue(), frame_format
 
         except Exception as e:
             print(f"Error saving {filename} as {frame_format}: {e}")
@@ -212,16 +310,38 @@ class FrameExporter:
                     "Comment",
                     f"PNG generated by TextureAtlas to GIF and Frames v{self.current_version}",
                 )
-                image.save(
-                    png_filename,
-                    format="PNG",
-                    pnginfo=metadata,
-                    compress_level=9,
-                    optimize=True,
-                )
-                print(f"Fallback: Successfully saved {png_filename} as PNG")
+                with self.metrics.stage("encode"):
+                    buffer = io.BytesIO()
+                    image.save(
+                        buffer,
+                        format="PNG",
+                        pnginfo=metadata,
+                        compress_level=9,
+                        optimize=True,
+                    )
+                print(f"Fallback: Encoded {png_filename} as PNG")
+                return png_filename, buffer.getvalue(), "PNG"
             except Exception as fallback_e:
                 print(f"Critical error: Could not save image even as PNG: {fallback_e}")
+                return None
+
+    def _copy_saved_frame(self, source_filename, filename):
+        # Keep the extension of the encoded file, it differs from the requested one after a PNG fallback.
+        filename = os.path.splitext(filename)[0] + os.path.splitext(source_filename)[1]
+        temp_filename = f"{filename}.{os.getpid()}.tmp"
+        try:
+            if os.path.abspath(filename) != os.path.abspath(source_filename):
+                with self.metrics.stage("write"):
+                    shutil.copyfile(source_filename, temp_filename)
+                    os.replace(temp_filename, filename)
+                self.metrics.add_bytes(os.path.getsize(filename))
+            self.saved_files.append(filename)
+            return True
+        except Exception as e:
+            print(f"Error copying {source_filename} to {filename}: {e}")
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+            return False
 
     def _apply_extra_crop_pass(self, image):
         try:
@@ -0,0 +1,45 @@
+import hashlib
+import numpy
+
+
+class FrameIndex:
+    """
+    Assigns an identity to every frame of an atlas, so that identical frames can be found in O(1).
+
+    One index is created per atlas while its sprites are processed and shared by all of its frame
+    descriptors. Frames cut from the same source rect are identical without looking at their
+    pixels. Frames from different rects are compared by a digest of their pixels, which is
+    computed once per rect when a frame is first materialized, straight from its pixel array.
+    Two frames are identical exactly when their identities are equal.
+
+    Methods:
+        rect_key(descriptor) -> tuple:
+            Returns the key of the source rect a FrameDescriptor is cut from.
+        identify(descriptor, pixels) -> int:
+            Returns the identity of a materialized frame from its (H, W, 4) pixels.
+    """
+
+    def __init__(self):
+        self._rect_identities = {}
+        self._digest_identities = {}
+
+    @staticmethod
+    def rect_key(descriptor):
+        # The source rect plus everything else that shapes the materialized frame.
+        return descriptor.source_rect + (
+            descriptor.frame_width,
+            descriptor.frame_height,
+            descriptor.rotated,
+        )
+
+    def identify(self, descriptor, pixels):
+        key = self.rect_key(descriptor)
+        identity = self._rect_identities.get(key)
+        if identity is None:
+            # Materialized frames are contiguous, so the array memory is hashed without a copy.
+            digest = hashlib.blake2b(numpy.ascontiguousarray(pixels), digest_size=16).digest()
+            identity = self._digest_identities.setdefault(
+                (pixels.shape, digest), len(self._digest_identities)
+            )
+            self._rect_identities[key] = identity
+        return identity
@@ -1,8 +1,15 @@
+import numpy as np
+
+
 class FrameSelector:
     """
     Provides static methods to determine and select frames from a sequence of image tuples,
     supporting various selection strategies and user settings.
 
+    Image tuples produced by SpriteProcessor carry a frame identity as their fourth element,
+    which is used to compare frames without comparing their pixels. Tuples without it are compared
+    by their pixels, held as numpy arrays or PIL images.
+
     Methods:
         is_single_frame(image_tuples):
             Checks if all frames in the provided image_tuples share the same frame and subframe indices,
@@ -20,10 +27,14 @@ class FrameSelector:
 
     @staticmethod
     def is_single_frame(image_tuples):
+        if all(len(i) > 3 for i in image_tuples):
+            return len({i[3] for i in image_tuples}) <= 1
+
         for i in image_tuples:
             if i[2] != image_tuples[0][2]:
+                first_frame = FrameSelector._frame_key(image_tuples[0][1])
                 for i in image_tuples:
-                    if i[1] != image_tuples[0][1]:
+                    if FrameSelector._frame_key(i[1]) != first_frame:
                         return False
                 return True
         return True
@@ -46,16 +57,32 @@ class FrameSelector:
         elif kept_frames == "First, Last":
             return ["0", "-1"]
         elif kept_frames == "No duplicates":
+            if all(len(frame) > 3 for frame in image_tuples):
+                seen_identities = set()
+                unique_indices = []
+                for i, frame in enumerate(image_tuples):
+                    if frame[3] not in seen_identities:
+                        seen_identities.add(frame[3])
+                        unique_indices.append(str(i))
+                return unique_indices
+
             unique_frames = []
             unique_indices = []
             for i, frame in enumerate(image_tuples):
-                if frame[1] not in unique_frames:
-                    unique_frames.append(frame[1])
+                frame_key = FrameSelector._frame_key(frame[1])
+                if frame_key not in unique_frames:
+                    unique_frames.append(frame_key)
                     unique_indices.append(str(i))
             return unique_indices
         else:
             return kept_frames.split(",")
 
+    @staticmethod
+    def _frame_key(frame):
+        if isinstance(frame, np.ndarray):
+            return frame.shape, frame.tobytes()
+        return frame.mode, frame.size, frame.tobytes()
+
     @staticmethod
     def get_kept_frame_indices(kept_frames, image_tuples):
         kept_frame_indices = set()
@@ -0,0 +1,203 @@
+import numpy
+from PIL import Image
+
+# Import our own modules
+from core.gif_encoder import GifEncoder
+
+
+class FrameStack:
+    """
+    The frames of one animation as a single padded (N, H, W, 4) uint8 array.
+
+    Frames of different sizes are padded at the right and bottom with transparent pixels, like
+    the exporters always padded them, and a validity mask records which pixels belong to each
+    frame. Bounding boxes, alpha thresholds, duplicate detection and crops are numpy operations
+    over the whole stack, so the frame and animation exporters share one implementation instead
+    of looping over PIL images. Images are only created again when the exporters encode.
+
+    Cropped and scaled frames are cached per stack by scaled_image(), so when the frame and
+    animation exporters (or several animation formats) ask for the same crop and scale, the
+    frame is only cropped and scaled once. Integer scales of 2 or more (or -2 or less) replicate
+    pixels with numpy instead of calling scale_image; the result is the same as a nearest
+    neighbour resize.
+
+    Attributes:
+        frames (numpy.ndarray): The (N, H, W, 4) RGBA pixels.
+        valid (numpy.ndarray): The (N, H, W) mask of the pixels inside each frame's own size.
+        sizes (list): The (width, height) of every frame before padding.
+        frame_ids (list): The frame identities of the image tuples, or None.
+
+    Methods:
+        from_image_tuples(image_tuples) -> FrameStack:
+            Stacks the frame pixels of the (name, pixels, source_rect, frame_id) tuples made by
+            SpriteProcessor.materialize_frames. Tuples holding PIL images are accepted as well.
+        from_arrays(arrays, frame_ids=None) -> FrameStack:
+            Stacks a list of (H, W, 4) uint8 pixel arrays.
+        from_images(images, frame_ids=None) -> FrameStack:
+            Stacks a list of PIL images.
+        select(indices) -> FrameStack:
+            Returns a stack of the given frames.
+        threshold(threshold) -> numpy.ndarray:
+            Returns the (N, H, W) mask of the pixels that stay opaque at a GIF alpha threshold.
+        binarize(opaque) -> numpy.ndarray:
+            Returns a copy of the frames that is fully opaque where the mask is set and zero elsewhere.
+        bboxes(mask=None) -> list:
+            Returns the (left, upper, right, lower) box of every frame, or None for empty frames.
+        union_bbox(indices=None, mask=None) -> tuple:
+            Returns the box around the given frames, or None when they are all empty.
+        identities() -> list:
+            Returns the frame identities, or equal numbers for frames with identical pixels and size.
+        frame(index) -> numpy.ndarray:
+            Returns the pixels of a frame at its own size.
+        to_image(pixels) -> PIL.Image.Image:
+            Wraps (H, W, 4) pixels in an RGBA image.
+        to_images(box=None) -> list:
+            Returns all frames as RGBA images, cropped to a box when one is given.
+        scaled_image(index, box, scale, scale_image) -> PIL.Image.Image:
+            Returns a frame cropped to a box (or its own size for None) and passed through
+            scale_image(image, scale), computed once per stack.
+        replicate(pixels, factor) -> numpy.ndarray:
+            Upscales (H, W, 4) pixels by an integer factor by repeating every pixel.
+    """
+
+    def __init__(self, frames, sizes, frame_ids=None):
+        self.frames = frames
+        self.sizes = sizes
+        self.frame_ids = frame_ids
+        self._scaled = {}
+
+        height, width = frames.shape[1:3]
+        widths = numpy.array([size[0] for size in sizes], dtype=numpy.intp).reshape(-1, 1, 1)
+        heights = numpy.array([size[1] for size in sizes], dtype=numpy.intp).reshape(-1, 1, 1)
+        self.valid = (numpy.arange(width).reshape(1, 1, -1) < widths) & (
+            numpy.arange(height).reshape(1, -1, 1) < heights
+        )
+
+    @classmethod
+    def from_image_tuples(cls, image_tuples):
+        frame_ids = (
+            [img[3] for img in image_tuples]
+            if all(len(img) > 3 for img in image_tuples)
+            else None
+        )
+        return cls.from_arrays([cls._pixels(img[1]) for img in image_tuples], frame_ids)
+
+    @classmethod
+    def from_arrays(cls, arrays, frame_ids=None):
+        sizes = [(pixels.shape[1], pixels.shape[0]) for pixels in arrays]
+        width = max((size[0] for size in sizes), default=0)
+        height = max((size[1] for size in sizes), default=0)
+
+        frames = numpy.zeros((len(arrays), height, width, 4), dtype=numpy.uint8)
+        for index, pixels in enumerate(arrays):
+            frames[index, : pixels.shape[0], : pixels.shape[1]] = pixels
+        return cls(frames, sizes, frame_ids)
+
+    @classmethod
+    def from_images(cls, images, frame_ids=None):
+        return cls.from_arrays([cls._pixels(image) for image in images], frame_ids)
+
+    @staticmethod
+    def _pixels(frame):
+        if isinstance(frame, Image.Image):
+            return numpy.asarray(frame if frame.mode == "RGBA" else frame.convert("RGBA"))
+        return frame
+
+    def __len__(self):
+        return len(self.frames)
+
+    def select(self, indices):
+        indices = list(indices)
+        frame_ids = [self.frame_ids[i] for i in indices] if self.frame_ids is not None else None
+        return FrameStack(self.frames[indices], [self.sizes[i] for i in indices], frame_ids)
+
+    def threshold(self, threshold):
+        return GifEncoder.threshold_alpha(self.frames, threshold)
+
+    def binarize(self, opaque):
+        # GIF transparency is binary: pixels are either fully opaque or fully transparent.
+        frames = self.frames.copy()
+        frames[..., 3] = numpy.where(opaque, 255, 0)
+        frames[~opaque] = 0
+        return frames
+
+    def bboxes(self, mask=None):
+        if mask is None:
+            mask = self.frames[..., 3] > 0
+        rows = mask.any(axis=2)
+        columns = mask.any(axis=1)
+        present = rows.any(axis=1)
+
+        left = columns.argmax(axis=1)
+        upper = rows.argmax(axis=1)
+        right = columns.shape[1] - columns[:, ::-1].argmax(axis=1)
+        lower = rows.shape[1] - rows[:, ::-1].argmax(axis=1)
+
+        boxes = numpy.stack([left, upper, right, lower], axis=1).tolist()
+        return [tuple(box) if found else None for box, found in zip(boxes, present.tolist())]
+
+    def union_bbox(self, indices=None, mask=None):
+        if mask is None:
+            mask = self.frames[..., 3] > 0
+        if indices is not None:
+            mask = mask[sorted(set(indices))]
+        return GifEncoder.crop_box(mask)
+
+    def identities(self):
+        if self.frame_ids is not None:
+            return list(self.frame_ids)
+        if self.frames.size == 0:
+            return list(range(len(self.frames)))
+        # Compare whole frames as single byte strings; frames of different sizes never match.
+        rows = numpy.ascontiguousarray(self.frames.reshape(len(self.frames), -1))
+        keys = rows.view(numpy.dtype((numpy.void, rows.shape[1]))).reshape(-1)
+        _, inverse = numpy.unique(keys, return_inverse=True)
+        identities = {}
+        return [
+            identities.setdefault((pixels, size), len(identities))
+            for pixels, size in zip(inverse.reshape(-1).tolist(), self.sizes)
+        ]
+
+    def frame(self, index):
+        width, height = self.sizes[index]
+        return self.frames[index, :height, :width]
+
+    @staticmethod
+    def to_image(pixels):
+        pixels = numpy.ascontiguousarray(pixels)
+        height, width = pixels.shape[:2]
+        return Image.frombuffer("RGBA", (width, height), pixels, "raw", "RGBA", 0, 1)
+
+    def to_images(self, box=None):
+        frames = self.frames
+        if box is not None:
+            left, upper, right, lower = box
+            frames = frames[:, upper:lower, left:right]
+        return [self.to_image(frame) for frame in frames]
+
+    def scaled_image(self, index, box, scale, scale_image):
+        key = (index, box, scale, scale_image)
+        image = self._scaled.get(key)
+        if image is None:
+            if box is None:
+                pixels = self.frame(index)
+            else:
+                left, upper, right, lower = box
+                pixels = self.frames[index, upper:lower, left:right]
+            if float(scale).is_integer() and abs(scale) >= 2:
+                if scale < 0:
+                    pixels = pixels[:, ::-1]
+                image = self.to_image(self.replicate(pixels, int(abs(scale))))
+            else:
+                image = scale_image(self.to_image(pixels), scale)
+            self._scaled[key] = image
+        return image
+
+    @staticmethod
+    def replicate(pixels, factor):
+        height, width = pixels.shape[:2]
+        # Repeat whole RGBA words: first along each row, then every row as one block copy.
+        words = numpy.ascontiguousarray(pixels).view(numpy.uint32).reshape(height, width)
+        replicated = numpy.empty((height, factor, width * factor), dtype=numpy.uint32)
+        replicated[:] = numpy.repeat(words, factor, axis=1)[:, None, :]
+        return replicated.view(numpy.uint8).reshape(height * factor, width * factor, 4)
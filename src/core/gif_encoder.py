@@ -0,0 +1,232 @@
+import io
+import numpy
+from PIL import Image, GifImagePlugin
+
+
+class GifEncoder:
+    """
+    Encodes GIF animations with numpy and Pillow only, as an alternative to the Wand backend.
+
+    The frames are handled as one (N, H, W, 4) array: the alpha threshold, the union bounding box
+    crop and the scaling are applied to all frames at once. All frames share a single global
+    palette, and every frame after the first only stores the pixels that changed since the
+    previous one (delta frames), so the encoder never round-trips through ImageMagick.
+
+    Timing matches the Wand backend: every frame keeps its delay in centiseconds, and frames that
+    are identical after the threshold and quantization are merged by adding their delays.
+
+    Attributes:
+        TRANSPARENT_INDEX (int): The palette index used for transparent pixels.
+        PALETTE_SAMPLE_PIXELS (int): The maximum number of pixels used to build a quantized palette.
+
+    Methods:
+        threshold_alpha(frames, threshold) -> numpy.ndarray:
+            Returns a boolean (N, H, W) mask of the pixels that stay opaque.
+        crop_box(opaque) -> tuple:
+            Returns the (left, upper, right, lower) box around all opaque pixels, or None.
+        sample(frames, scale) -> numpy.ndarray:
+            Resizes the frames with nearest neighbour sampling and mirrors them for negative scales.
+            Integer upscales repeat pixels instead of indexing.
+        build_palette(frames, opaque) -> tuple:
+            Returns the global palette and the (N, H, W) palette index frames.
+        merge_repeated(indexed_frames, delays) -> tuple:
+            Merges consecutive identical index frames, adding up their delays.
+        encode_deltas(indexed_frames, delays) -> list:
+            Reduces the index frames to delta frames with their offsets and disposal methods.
+        encode(indexed_frames, delays, palette, comment=None) -> bytes:
+            Returns the GIF file contents of the animation.
+    """
+
+    TRANSPARENT_INDEX = 255
+    PALETTE_SAMPLE_PIXELS = 1 << 20
+
+    @staticmethod
+    def threshold_alpha(frames, threshold):
+        alpha = frames[..., 3]
+        if threshold >= 1:
+            return alpha == 255
+        return alpha > threshold * 255
+
+    @staticmethod
+    def crop_box(opaque):
+        columns = numpy.flatnonzero(opaque.any(axis=(0, 1)))
+        rows = numpy.flatnonzero(opaque.any(axis=(0, 2)))
+        if len(columns) == 0:
+            return None
+        return int(columns[0]), int(rows[0]), int(columns[-1]) + 1, int(rows[-1]) + 1
+
+    @staticmethod
+    def sample(frames, scale):
+        height, width = frames.shape[1:3]
+        new_width = int(width * abs(scale))
+        new_height = int(height * abs(scale))
+        factor = abs(scale)
+        if factor >= 2 and float(factor).is_integer():
+            # Integer upscales repeat every pixel; each row is repeated as one block copy.
+            factor = int(factor)
+            columns = numpy.repeat(frames, factor, axis=2)
+            replicated = numpy.empty(
+                (len(frames), height, factor) + columns.shape[2:], dtype=frames.dtype
+            )
+            replicated[:] = columns[:, :, None]
+            frames = replicated.reshape((len(frames), new_height, new_width) + frames.shape[3:])
+        elif (new_width, new_height) != (width, height):
+            # Pick the source pixel under the centre of every target pixel, like ImageMagick's sample.
+            columns = ((numpy.arange(new_width) + 0.5) * width / new_width).astype(numpy.intp)
+            rows = ((numpy.arange(new_height) + 0.5) * height / new_height).astype(numpy.intp)
+            frames = frames[:, rows][:, :, columns]
+        if scale < 0:
+            frames = frames[:, :, ::-1]
+        return frames
+
+    @staticmethod
+    def build_palette(frames, opaque):
+        # Pack RGB into one integer per pixel so colors can be handled with numpy.unique.
+        rgb = frames[..., :3].astype(numpy.uint32)
+        packed = (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+        colors, inverse = numpy.unique(packed[opaque], return_inverse=True)
+
+        if len(colors) <= GifEncoder.TRANSPARENT_INDEX:
+            color_indices = numpy.arange(len(colors), dtype=numpy.uint8)
+            palette_colors = colors
+        else:
+            opaque_colors = packed[opaque]
+            step = max(1, len(opaque_colors) // GifEncoder.PALETTE_SAMPLE_PIXELS)
+            palette_image = GifEncoder._packed_to_image(opaque_colors[::step]).quantize(
+                colors=GifEncoder.TRANSPARENT_INDEX,
+                method=Image.Quantize.MEDIANCUT,
+                dither=Image.Dither.NONE,
+            )
+            mapped = GifEncoder._packed_to_image(colors).quantize(
+                palette=palette_image, dither=Image.Dither.NONE
+            )
+            color_indices = numpy.asarray(mapped, dtype=numpy.uint8).reshape(-1)
+            palette_rgb = numpy.array(palette_image.getpalette()[: GifEncoder.TRANSPARENT_INDEX * 3])
+            palette_rgb = palette_rgb.reshape(-1, 3).astype(numpy.uint32)
+            palette_colors = (palette_rgb[:, 0] << 16) | (palette_rgb[:, 1] << 8) | palette_rgb[:, 2]
+
+        indexed_frames = numpy.full(opaque.shape, GifEncoder.TRANSPARENT_INDEX, dtype=numpy.uint8)
+        indexed_frames[opaque] = color_indices[inverse.reshape(-1)]
+
+        palette = numpy.zeros((256, 3), dtype=numpy.uint8)
+        palette[: len(palette_colors), 0] = palette_colors >> 16
+        palette[: len(palette_colors), 1] = (palette_colors >> 8) & 0xFF
+        palette[: len(palette_colors), 2] = palette_colors & 0xFF
+        return palette.reshape(-1).tolist(), indexed_frames
+
+    @staticmethod
+    def merge_repeated(indexed_frames, delays):
+        # A frame equal to the previous one is also equal to the last kept frame of its run.
+        repeats = numpy.zeros(len(indexed_frames), dtype=bool)
+        if len(indexed_frames) > 1:
+            axes = tuple(range(1, indexed_frames.ndim))
+            repeats[1:] = (indexed_frames[1:] == indexed_frames[:-1]).all(axis=axes)
+
+        keep = []
+        merged_delays = []
+        for index, (repeat, delay) in enumerate(zip(repeats.tolist(), delays)):
+            if repeat:
+                merged_delays[-1] += delay
+            else:
+                keep.append(index)
+                merged_delays.append(delay)
+        return indexed_frames[keep], merged_delays
+
+    @staticmethod
+    def encode_deltas(indexed_frames, delays):
+        transparent = GifEncoder.TRANSPARENT_INDEX
+        canvas = numpy.full(indexed_frames.shape[1:], transparent, dtype=numpy.uint8)
+        encoded = []
+
+        for frame, delay in zip(indexed_frames, delays):
+            cleared = (canvas != transparent) & (frame == transparent)
+            if encoded and cleared.any():
+                # Pixels can only become transparent by disposing the previous frame to the
+                # background, so grow its rect over them and redraw what is left of the area.
+                GifEncoder._dispose_to_background(encoded[-1], cleared, canvas)
+
+            changed = frame != canvas
+            delta = numpy.where(changed, frame, transparent).astype(numpy.uint8)
+            encoded.append(
+                {
+                    "delta": delta,
+                    "box": GifEncoder._mask_box(changed),
+                    "delay": delay,
+                    "disposal": 1,
+                }
+            )
+            canvas = frame.copy()
+
+        # Clear everything before the animation loops back to the first frame.
+        if encoded:
+            GifEncoder._dispose_to_background(encoded[-1], canvas != transparent, canvas)
+        return encoded
+
+    @staticmethod
+    def encode(indexed_frames, delays, palette, comment=None):
+        height, width = indexed_frames.shape[1:]
+        transparent = GifEncoder.TRANSPARENT_INDEX
+
+        header = (
+            b"GIF89a"
+            + width.to_bytes(2, "little")
+            + height.to_bytes(2, "little")
+            # Global color table with 256 entries, background color is the transparent index.
+            + bytes((0xF7, transparent, 0))
+            + bytes(palette)
+            # Loop forever
+            + b"!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00"
+        )
+        if comment:
+            comment = comment.encode("utf-8")
+            header += b"!\xfe"
+            for start in range(0, len(comment), 255):
+                block = comment[start : start + 255]
+                header += bytes((len(block),)) + block
+            header += b"\x00"
+
+        with io.BytesIO() as f:
+            f.write(header)
+            for frame in GifEncoder.encode_deltas(indexed_frames, delays):
+                left, upper, right, lower = frame["box"]
+                frame_image = Image.fromarray(frame["delta"][upper:lower, left:right])
+                frame_image.putpalette(palette)
+                for data in GifImagePlugin.getdata(
+                    frame_image,
+                    (left, upper),
+                    duration=frame["delay"] * 10,
+                    disposal=frame["disposal"],
+                    transparency=transparent,
+                ):
+                    f.write(data)
+            f.write(b";")
+            return f.getvalue()
+
+    @staticmethod
+    def _dispose_to_background(encoded_frame, area, canvas):
+        if not area.any():
+            return
+        left, upper, right, lower = GifEncoder._mask_box(area)
+        old_left, old_upper, old_right, old_lower = encoded_frame["box"]
+        left, upper = min(left, old_left), min(upper, old_upper)
+        right, lower = max(right, old_right), max(lower, old_lower)
+
+        encoded_frame["box"] = (left, upper, right, lower)
+        encoded_frame["disposal"] = 2
+        canvas[upper:lower, left:right] = GifEncoder.TRANSPARENT_INDEX
+
+    @staticmethod
+    def _mask_box(mask):
+        columns = numpy.flatnonzero(mask.any(axis=0))
+        rows = numpy.flatnonzero(mask.any(axis=1))
+        if len(columns) == 0:
+            # GIF frames need at least one pixel.
+            return 0, 0, 1, 1
+        return int(columns[0]), int(rows[0]), int(columns[-1]) + 1, int(rows[-1]) + 1
+
+    @staticmethod
+    def _packed_to_image(packed):
+        rgb = numpy.stack(
+            [(packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF], axis=-1
+        ).astype(numpy.uint8)
+        return Image.fromarray(rgb.reshape(1, -1, 3))
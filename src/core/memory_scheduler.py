@@ -0,0 +1,95 @@
+import os
+from PIL import Image
+
+# Import our own modules
+from parsers.metadata_cache import MetadataCache
+
+
+class MemoryScheduler:
+    """
+    Decides which extraction jobs may run at the same time under a memory budget.
+
+    Every job gets an estimate of its peak memory use, based on the atlas dimensions and the
+    number of sprites in its metadata. Jobs are admitted while the estimates of all running jobs
+    stay under the budget. A job that is larger than the whole budget on its own is only
+    admitted when nothing else is running, so huge atlases are processed one at a time.
+
+    Attributes:
+        budget_bytes (int): The memory budget in bytes, or 0 for no limit.
+        running_bytes (int): The summed estimates of the jobs currently admitted.
+
+    Methods:
+        estimate_job_memory(atlas_path, metadata_path) -> int:
+            Estimates the peak memory in bytes needed to extract a spritesheet.
+        count_sprites(metadata_path) -> int:
+            Counts the sprite entries in an XML/TXT metadata file without parsing it.
+        can_admit(estimate, running_jobs) -> bool:
+            Returns True if a job with this estimate may start now.
+        admit(estimate):
+            Adds a started job's estimate to the running total.
+        release(estimate):
+            Removes a finished job's estimate from the running total.
+        reserve(nbytes):
+            Sets memory aside from the budget for data no job estimate accounts for.
+    """
+
+    # Decoded atlas, its RGBA copy and the frames of the animation being exported.
+    ATLAS_COPIES = 3
+    # Unknown spritesheets also build boolean masks and label arrays over the whole atlas.
+    UNKNOWN_ATLAS_COPIES = 6
+    # Image objects, export buffers and bookkeeping per sprite.
+    SPRITE_OVERHEAD_BYTES = 64 * 1024
+
+    def __init__(self, memory_limit_mb=0):
+        self.budget_bytes = max(0, int(memory_limit_mb or 0)) * 1024 * 1024
+        self.running_bytes = 0
+
+    @staticmethod
+    def estimate_job_memory(atlas_path, metadata_path):
+        try:
+            with Image.open(atlas_path) as atlas:
+                width, height = atlas.size
+        except Exception:
+            # Unreadable atlases fail quickly in the job itself, fall back to the file size.
+            return os.path.getsize(atlas_path) if os.path.isfile(atlas_path) else 0
+
+        atlas_bytes = width * height * 4
+        if metadata_path is None:
+            return atlas_bytes * MemoryScheduler.UNKNOWN_ATLAS_COPIES
+
+        sprite_count = MemoryScheduler.count_sprites(metadata_path)
+        return (
+            atlas_bytes * MemoryScheduler.ATLAS_COPIES
+            + sprite_count * MemoryScheduler.SPRITE_OVERHEAD_BYTES
+        )
+
+    @staticmethod
+    def count_sprites(metadata_path):
+        cached = MetadataCache.peek(metadata_path)
+        if cached is not None:
+            return len(cached.sprites)
+        try:
+            with open(metadata_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return 0
+        if metadata_path.lower().endswith(".xml"):
+            return data.count(b"<SubTexture")
+        return sum(1 for line in data.splitlines() if line.strip())
+
+    def can_admit(self, estimate, running_jobs):
+        if running_jobs == 0 or not self.budget_bytes:
+            return True
+        if estimate > self.budget_bytes:
+            return False
+        return self.running_bytes + estimate <= self.budget_bytes
+
+    def admit(self, estimate):
+        self.running_bytes += estimate
+
+    def release(self, estimate):
+        self.running_bytes = max(0, self.running_bytes - estimate)
+
+    def reserve(self, nbytes):
+        if self.budget_bytes:
+            self.budget_bytes = max(1, self.budget_bytes - nbytes)
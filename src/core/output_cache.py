@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+
+
+class OutputCache:
+    """
+    An on-disk manifest of the outputs written for one spritesheet, used to skip unchanged work.
+
+    The manifest lives in the spritesheet's output folder. Every animation entry is keyed by a
+    hash of the atlas bytes, the metadata bytes and the resolved settings of that animation, and
+    lists the files it produced together with their sizes. An entry is only considered valid
+    while its key matches and every listed file still exists with the recorded size.
+
+    Attributes:
+        MANIFEST_NAME (str): Filename of the manifest inside the output folder.
+        output_dir (str): The spritesheet output folder holding the manifest.
+        manifest (dict): The loaded manifest data.
+
+    Methods:
+        hash_file(path) -> str:
+            Returns the SHA-256 hex digest of a file's contents, or "" if the path is None.
+        hash_values(*values) -> str:
+            Returns the SHA-256 hex digest of JSON-serializable values (dict keys sorted).
+        source_digest(atlas_path, metadata_path, keying_action=None) -> str:
+            Hashes the atlas and metadata bytes (plus background keying choice) of a spritesheet.
+        is_atlas_fresh(atlas_key) -> bool:
+            Returns True if the whole spritesheet was completed with this key and all outputs are intact.
+        is_fresh(animation_name, key) -> bool:
+            Returns True if an animation's outputs are present and were produced with this key.
+        get_entry(animation_name) -> dict:
+            Returns the manifest entry of an animation, or None.
+        record(animation_name, key, files, frames_generated=0, anims_generated=0):
+            Stores the outputs produced for an animation.
+        complete(atlas_key, animation_names):
+            Marks the spritesheet as fully processed and drops entries of animations that no longer exist.
+        save():
+            Atomically writes the manifest to disk.
+    """
+
+    MANIFEST_NAME = ".tatgf_cache.json"
+    MANIFEST_VERSION = 1
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.manifest_path = os.path.join(output_dir, self.MANIFEST_NAME)
+        self.manifest = self._load()
+
+    @staticmethod
+    def hash_file(path, chunk_size=1024 * 1024):
+        if path is None:
+            return ""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def hash_values(*values):
+        serialized = json.dumps(values, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def source_digest(atlas_path, metadata_path, keying_action=None):
+        return OutputCache.hash_values(
+            OutputCache.hash_file(atlas_path),
+            OutputCache.hash_file(metadata_path),
+            keying_action,
+        )
+
+    def is_atlas_fresh(self, atlas_key):
+        if not atlas_key or self.manifest.get("atlas_key") != atlas_key:
+            return False
+        return all(
+            self._files_valid(entry) for entry in self.manifest["animations"].values()
+        )
+
+    def is_fresh(self, animation_name, key):
+        entry = self.get_entry(animation_name)
+        return entry is not None and entry.get("key") == key and self._files_valid(entry)
+
+    def get_entry(self, animation_name):
+        return self.manifest["animations"].get(animation_name)
+
+    def record(self, animation_name, key, files, frames_generated=0, anims_generated=0):
+        recorded_files = {}
+        for path in files:
+            if os.path.isfile(path):
+                relative_path = os.path.relpath(path, self.output_dir)
+                recorded_files[relative_path] = os.path.getsize(path)
+
+        self.manifest["animations"][animation_name] = {
+            "key": key,
+            "files": recorded_files,
+            "frames_generated": frames_generated,
+            "anims_generated": anims_generated,
+        }
+        # Any change invalidates the whole-spritesheet shortcut until complete() runs again.
+        self.manifest["atlas_key"] = None
+
+    def complete(self, atlas_key, animation_names):
+        animation_names = set(animation_names)
+        self.manifest["animations"] = {
+            name: entry
+            for name, entry in self.manifest["animations"].items()
+            if name in animation_names
+        }
+        self.manifest["atlas_key"] = atlas_key
+
+    def save(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        temp_path = self.manifest_path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self.manifest, f, indent=1)
+            os.replace(temp_path, self.manifest_path)
+        except Exception as e:
+            print(f"[OutputCache] Could not save cache manifest {self.manifest_path}: {e}")
+
+    def _load(self):
+        empty_manifest = {"version": self.MANIFEST_VERSION, "atlas_key": None, "animations": {}}
+        if not os.path.isfile(self.manifest_path):
+            return empty_manifest
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") != self.MANIFEST_VERSION or not isinstance(
+                manifest.get("animations"), dict
+            ):
+                return empty_manifest
+            return manifest
+        except Exception as e:
+            print(f"[OutputCache] Ignoring unreadable cache manifest {self.manifest_path}: {e}")
+            return empty_manifest
+
+    def _files_valid(self, entry):
+        for relative_path, size in entry.get("files", {}).items():
+            path = os.path.join(self.output_dir, relative_path)
+            if not os.path.isfile(path) or os.path.getsize(path) != size:
+                return False
+        return True
@@ -1,13 +1,155 @@
+import numpy as np
 from PIL import Image
 
 # Import our own modules
+from core.frame_index import FrameIndex
+from parsers.sprite_table import SpriteTable
+from utils.atlas_cache import AtlasCache
 from utils.utilities import Utilities
 
 
+class FrameDescriptor:
+    """
+    Describes where a single frame lives in the atlas, without holding any pixels.
+
+    When the atlas pixels are given, the frame is cut as a numpy view of them: rotation is
+    np.rot90 on the view, a new canvas is only allocated when the trim offsets pad the sprite,
+    and the frame pixels are copied once. Each RGBA pixel is handled as one uint32 word, so the
+    rotated copy moves whole pixels. Extraction only uses the pixel array; materialize() wraps it
+    in a PIL image sharing the same memory.
+
+    Attributes:
+        atlas (PIL.Image.Image): The atlas image the frame is cut from.
+        pixels (numpy.ndarray): The (H, W) RGBA pixels of the atlas packed into uint32, or None to crop with PIL.
+        name (str): The name of the sprite.
+        x, y (int): The top-left coordinates of the sprite in the atlas.
+        width, height (int): The dimensions of the sprite in the atlas.
+        frame_x, frame_y (int): The x and y offset for the frame.
+        frame_width, frame_height (int): The width and height of the final frame.
+        rotated (bool): Whether the sprite is rotated 90 degrees clockwise in the atlas.
+        frame_index (FrameIndex): The identity index shared by all frames of the atlas.
+
+    Methods:
+        source_rect -> tuple:
+            The sprite's original metadata (x, y, width, height, frameX, frameY).
+        materialize() -> PIL.Image.Image:
+            Crops, rotates and pads the sprite into a new RGBA frame image.
+        materialize_array() -> numpy.ndarray:
+            Returns the (H, W, 4) RGBA frame pixels as a new contiguous array. Without atlas
+            pixels, the frame is cropped with PIL and converted.
+    """
+
+    __slots__ = (
+        "atlas",
+        "name",
+        "x",
+        "y",
+        "width",
+        "height",
+        "frame_x",
+        "frame_y",
+        "frame_width",
+        "frame_height",
+        "rotated",
+        "frame_index",
+        "pixels",
+    )
+
+    def __init__(self, atlas, name, x, y, width, height, frame_x, frame_y, frame_width, frame_height, rotated, frame_index=None, pixels=None):
+        self.atlas = atlas
+        self.pixels = pixels
+        self.name = name
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.frame_x = frame_x
+        self.frame_y = frame_y
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.rotated = rotated
+        self.frame_index = frame_index if frame_index is not None else FrameIndex()
+
+    @property
+    def source_rect(self):
+        return (self.x, self.y, self.width, self.height, self.frame_x, self.frame_y)
+
+    def materialize(self):
+        if self.pixels is not None:
+            frame = self.materialize_array()
+            return Image.frombuffer("RGBA", (frame.shape[1], frame.shape[0]), frame, "raw", "RGBA", 0, 1)
+
+        x, y, width, height = self.x, self.y, self.width, self.height
+        frameX, frameY = self.frame_x, self.frame_y
+
+        sprite_image = self.atlas.crop((x, y, x + width, y + height))
+        if self.rotated:
+            sprite_image = sprite_image.rotate(90, expand=True)
+            frameWidth = max(height - frameX, self.frame_width, 1)
+            frameHeight = max(width - frameY, self.frame_height, 1)
+        else:
+            frameWidth = max(width - frameX, self.frame_width, 1)
+            frameHeight = max(height - frameY, self.frame_height, 1)
+
+        frame_image = Image.new("RGBA", (frameWidth, frameHeight))
+        frame_image.paste(sprite_image, (-frameX, -frameY))
+        if frame_image.mode != "RGBA":
+            frame_image = frame_image.convert("RGBA")
+        return frame_image
+
+    def materialize_array(self):
+        pixels = self.pixels
+        if pixels is None:
+            return np.asarray(self.materialize())
+        x, y, width, height = self.x, self.y, self.width, self.height
+        frameX, frameY = self.frame_x, self.frame_y
+        atlas_height, atlas_width = pixels.shape
+
+        if x >= 0 and y >= 0 and x + width <= atlas_width and y + height <= atlas_height:
+            sprite = pixels[y : y + height, x : x + width]
+        else:
+            # Like PIL's crop, the parts outside the atlas are transparent.
+            sprite = np.zeros((max(height, 0), max(width, 0)), dtype=np.uint32)
+            left, top = max(x, 0), max(y, 0)
+            right, bottom = min(x + width, atlas_width), min(y + height, atlas_height)
+            if right > left and bottom > top:
+                sprite[top - y : bottom - y, left - x : right - x] = pixels[top:bottom, left:right]
+
+        if self.rotated:
+            sprite = np.rot90(sprite)
+            frameWidth = max(height - frameX, self.frame_width, 1)
+            frameHeight = max(width - frameY, self.frame_height, 1)
+        else:
+            frameWidth = max(width - frameX, self.frame_width, 1)
+            frameHeight = max(height - frameY, self.frame_height, 1)
+
+        sprite_height, sprite_width = sprite.shape
+        if frameX == 0 and frameY == 0 and (frameWidth, frameHeight) == (sprite_width, sprite_height):
+            frame = sprite
+        else:
+            frame = np.zeros((frameHeight, frameWidth), dtype=np.uint32)
+            # The sprite is placed at (-frameX, -frameY); clip whatever falls outside the frame.
+            src_left, src_top = max(frameX, 0), max(frameY, 0)
+            dst_left, dst_top = max(-frameX, 0), max(-frameY, 0)
+            copy_width = min(sprite_width - src_left, frameWidth - dst_left)
+            copy_height = min(sprite_height - src_top, frameHeight - dst_top)
+            if copy_width > 0 and copy_height > 0:
+                frame[dst_top : dst_top + copy_height, dst_left : dst_left + copy_width] = sprite[
+                    src_top : src_top + copy_height, src_left : src_left + copy_width
+                ]
+        # The only copy of an unpadded frame, made on packed pixels so the rotation copies words.
+        frame = np.ascontiguousarray(frame)
+        return frame.view(np.uint8).reshape(frame.shape + (4,))
+
+
 class SpriteProcessor:
     """
     A class for processing sprite data from an atlas image.
 
+    Frames are not cropped up front: process_sprites only groups lightweight frame descriptors
+    into animations, and the pixels of an animation are produced when it is materialized.
+    This keeps peak memory proportional to the largest animation instead of the whole atlas.
+
     Attributes:
         atlas (PIL.Image.Image):
             The atlas image containing all the sprites.
@@ -19,49 +161,91 @@ class SpriteProcessor:
                 - 'frameX', 'frameY' (int, optional): The x and y offset for the frame. Defaults to 0.
                 - 'frameWidth', 'frameHeight' (int, optional): The width and height of the final frame. Defaults to the sprite's dimensions.
                 - 'rotated' (bool, optional): Indicates if the sprite is rotated 90 degrees clockwise in the atlas. Defaults to False.
+            Or a SpriteTable, whose rows are read directly without building the dicts.
+        frame_index (FrameIndex):
+            The identity index of the atlas frames, used to find duplicate frames.
+        atlas_pixels (numpy.ndarray):
+            The RGBA pixels of the atlas packed into uint32, shared with AtlasCache when the atlas came from it.
 
     Methods:
         process_sprites() -> dict:
-            Processes the sprites in the atlas and returns a dictionary of animations.
-            Each animation is a mapping of folder names to lists of sprite data. Sprite data includes:
+            Groups the sprites of the atlas into animations and returns a dictionary mapping
+            folder names to lists of FrameDescriptor objects.
+        materialize_frames(descriptors) -> list:
+            Produces the frame pixels of a list of descriptors, without creating PIL images.
+            Each entry is a tuple of:
                 - Name of the sprite.
-                - Processed frame image (PIL.Image.Image).
+                - Processed frame pixels ((H, W, 4) uint8 numpy.ndarray).
                 - Sprite's original metadata (tuple of x, y, width, height, frameX, frameY).
+                - Frame identity (int), equal for frames with identical pixels.
     """
 
     def __init__(self, atlas, sprites):
         self.atlas = atlas
         self.sprites = sprites
+        self.frame_index = FrameIndex()
+        self.atlas_pixels = None
+        if atlas is not None:
+            pixels = AtlasCache.pixels_of(atlas)
+            self.atlas_pixels = pixels.view(np.uint32).reshape(pixels.shape[:2])
 
     def process_sprites(self):
         animations = {}
-        for sprite in self.sprites:
-            name = sprite["name"]
-            x, y, width, height = sprite["x"], sprite["y"], sprite["width"], sprite["height"]
-            frameX = sprite.get("frameX", 0)
-            frameY = sprite.get("frameY", 0)
-            frameWidth = sprite.get("frameWidth", width)
-            frameHeight = sprite.get("frameHeight", height)
-            rotated = sprite.get("rotated", False)
-
-            print(f"Processing sprite: {name}")
-
-            sprite_image = self.atlas.crop((x, y, x + width, y + height))
-            if rotated:
-                sprite_image = sprite_image.rotate(90, expand=True)
-                frameWidth = max(height - frameX, frameWidth, 1)
-                frameHeight = max(width - frameY, frameHeight, 1)
-            else:
-                frameWidth = max(width - frameX, frameWidth, 1)
-                frameHeight = max(height - frameY, frameHeight, 1)
-
-            frame_image = Image.new("RGBA", (frameWidth, frameHeight))
-            frame_image.paste(sprite_image, (-frameX, -frameY))
-            if frame_image.mode != "RGBA":
-                frame_image = frame_image.convert("RGBA")
+        if isinstance(self.sprites, SpriteTable):
+            rows = self.sprites.rows()
+        else:
+            rows = self._dict_rows(self.sprites)
 
-            folder_name = Utilities.strip_trailing_digits(name)
-            animations.setdefault(folder_name, []).append(
-                (name, frame_image, (x, y, width, height, frameX, frameY))
+        for name, x, y, width, height, frame_x, frame_y, frame_width, frame_height, rotated in rows:
+            descriptor = FrameDescriptor(
+                self.atlas,
+                name,
+                x,
+                y,
+                width,
+                height,
+                frame_x,
+                frame_y,
+                frame_width,
+                frame_height,
+                rotated,
+                self.frame_index,
+                self.atlas_pixels,
             )
+
+            folder_name = Utilities.strip_trailing_digits(name)
+            animations.setdefault(folder_name, []).append(descriptor)
         return animations
+
+    @staticmethod
+    def _dict_rows(sprites):
+        for sprite in sprites:
+            width, height = sprite["width"], sprite["height"]
+            yield (
+                sprite["name"],
+                sprite["x"],
+                sprite["y"],
+                width,
+                height,
+                sprite.get("frameX", 0),
+                sprite.get("frameY", 0),
+                sprite.get("frameWidth", width),
+                sprite.get("frameHeight", height),
+                sprite.get("rotated", False),
+            )
+
+    @staticmethod
+    def materialize_frames(descriptors):
+        image_tuples = []
+        for descriptor in descriptors:
+            print(f"Processing sprite: {descriptor.name}")
+            frame_pixels = descriptor.materialize_array()
+            image_tuples.append(
+                (
+                    descriptor.name,
+                    frame_pixels,
+                    descriptor.source_rect,
+                    descriptor.frame_index.identify(descriptor, frame_pixels),
+                )
+            )
+        return image_tuples
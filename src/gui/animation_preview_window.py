@@ -18,6 +18,11 @@ class AnimationPreviewWindow:
     Methods:
         show(animation_path, settings):
             Opens a preview window for the specified animation file with the given settings.
+        show_preview(animation_preview):
+            Opens a preview window for an AnimationPreview, showing its frames from memory.
+            The animation is only encoded when it is opened externally.
+        preview(app, name, settings_type, ...):
+            Reads the override settings entries and previews the animation with them.
 
     Attributes (within the preview window context):
         animation (PIL.Image): The loaded animation image.
@@ -60,7 +65,6 @@ class AnimationPreviewWindow:
                 ]
 
             frame_count = len(pil_frames)
-            current_frame = [0]
 
             durations = []
             try:
@@ -126,6 +130,50 @@ class AnimationPreviewWindow:
             durations = [base_delay] * frame_count
             durations[-1] += int(delay_setting)
 
+        def cleanup_temp_animation():
+            try:
+                animation.close()
+                if os.path.isfile(animation_path):
+                    os.remove(animation_path)
+            except Exception:
+                pass
+
+        AnimationPreviewWindow._build_window(
+            preview_win,
+            pil_frames,
+            durations,
+            format_name,
+            lambda: animation_path,
+            cleanup_temp_animation,
+        )
+
+    @staticmethod
+    def show_preview(animation_preview):
+        format_name = animation_preview.animation_format
+        preview_win = tk.Toplevel()
+        preview_win.title(f"{format_name} Preview")
+
+        def save_for_external():
+            # Encoding only happens here, the preview itself shows the frames from memory.
+            path = animation_preview.save()
+            if not path:
+                raise RuntimeError(f"Could not encode the {format_name} animation")
+            return path
+
+        AnimationPreviewWindow._build_window(
+            preview_win,
+            animation_preview.frames,
+            animation_preview.durations,
+            format_name,
+            save_for_external,
+            animation_preview.cleanup,
+        )
+
+    @staticmethod
+    def _build_window(preview_win, pil_frames, durations, format_name, get_external_path, on_close):
+        frame_count = len(pil_frames)
+        current_frame = [0]
+
         frame_counter_label = tk.Label(preview_win, text=f"Frame 0 / {frame_count - 1}")
         frame_counter_label.pack()
 
@@ -191,11 +239,12 @@ class AnimationPreviewWindow:
             side=tk.LEFT
         )
 
-        def open_external(path=animation_path):
+        def open_external():
             import subprocess
             import platform
 
             try:
+                path = get_external_path()
                 current_os = platform.system().lower()
                 if current_os == "windows":
                     os.startfile(path)
@@ -372,16 +421,14 @@ class AnimationPreviewWindow:
         precompute_composited_frames()
         show_frame(0)
 
-        def cleanup_temp_animation():
+        def close_preview():
             try:
-                animation.close()
-                if os.path.isfile(animation_path):
-                    os.remove(animation_path)
+                on_close()
             except Exception:
                 pass
             preview_win.destroy()
 
-        preview_win.protocol("WM_DELETE_WINDOW", cleanup_temp_animation)
+        preview_win.protocol("WM_DELETE_WINDOW", close_preview)
 
         note_text = f"Playback speed of {format_name} animations may not be accurately depicted in this preview window. Open the animation externally for accurate playback."
         note_label = tk.Label(
@@ -433,16 +480,6 @@ class AnimationPreviewWindow:
             messagebox.showerror("Invalid input", f"Error: {str(e)}")
             return
 
-        # Check if APNG format is selected and block preview
-        animation_format = settings.get("animation_format", "")
-        if animation_format == "APNG":
-            messagebox.showinfo(
-                "Preview Not Available",
-                "Preview is not available for APNG format due to display limitations.\n\n"
-                "You can still export APNG animations and view them externally.",
-            )
-            return
-
         if settings_type == "animation":
             spritesheet_name, animation_name = name.split("/", 1)
         else:
@@ -461,10 +498,10 @@ class AnimationPreviewWindow:
             app.update_global_settings()
 
             extractor = Extractor(None, app.current_version, app.settings_manager)
-            animation_path = extractor.generate_temp_animation_for_preview(
-                png_path, metadata_path, settings, animation_name, temp_dir=app.temp_dir
+            animation_preview = extractor.generate_animation_preview(
+                png_path, metadata_path, settings, animation_name
             )
-            if not animation_path or not os.path.isfile(animation_path):
+            if animation_preview is None:
                 messagebox.showerror(
                     "Preview Error", "Could not generate preview animation."
                 )
@@ -475,4 +512,4 @@ class AnimationPreviewWindow:
             )
             return
 
-        app.show_animation_preview_window(animation_path, settings)
+        AnimationPreviewWindow.show_preview(animation_preview)
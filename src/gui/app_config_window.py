@@ -26,6 +26,8 @@ class AppConfigWindow:
         max_memory_mb (int): Total physical RAM in megabytes.
         cpu_var (tk.StringVar): Tkinter variable for CPU threads input field.
         mem_var (tk.StringVar): Tkinter variable for memory limit input field.
+        process_pool_var (tk.BooleanVar): Tkinter variable for the 'Process spritesheets in separate processes' checkbox.
+        output_cache_var (tk.BooleanVar): Tkinter variable for the 'Skip spritesheets whose outputs are unchanged' checkbox.
         extraction_fields (dict): Dictionary of extraction settings fields and their types.
         extraction_vars (dict): Dictionary of Tkinter variables for extraction settings.
         compression_vars (dict): Dictionary of Tkinter variables for compression settings.
@@ -240,22 +242,37 @@ class AppConfigWindow:
         self.cpu_entry = tk.Entry(resource_frame, textvariable=self.cpu_var, width=10)
         self.cpu_entry.grid(row=0, column=1, sticky="w", padx=(8, 0))
 
-        # Memory limit is not actually implemented in the app yet as it requires vast code changes but we add it for future use
-        tk.Label(resource_frame, text=f"Memory limit (MB, max: {self.max_memory_mb}):").grid(
-            row=1, column=0, sticky="w", pady=(4, 0)
-        )
-        default_mem = ((self.max_memory_mb // 4 + 9) // 10) * 10
-        mem_default = resource_limits.get("memory_limit_mb", 0)
-
-        if mem_default is None or mem_default == 0:
-            mem_default = str(default_mem)
+        # Spritesheets are only extracted concurrently while their estimated memory use fits this limit
+        suggested_mem = ((self.max_memory_mb // 4 + 9) // 10) * 10
+        tk.Label(
+            resource_frame,
+            text=f"Memory limit (MB, 0 = unlimited, suggested: {suggested_mem}, max: {self.max_memory_mb}):",
+        ).grid(row=1, column=0, sticky="w", pady=(4, 0))
+        mem_default = resource_limits.get("memory_limit_mb") or 0
 
         self.mem_var = tk.StringVar(value=str(mem_default))
-        self.mem_entry = tk.Entry(
-            resource_frame, textvariable=self.mem_var, width=10, state="disabled"
-        )  # Disabled until implemented
+        self.mem_entry = tk.Entry(resource_frame, textvariable=self.mem_var, width=10)
         self.mem_entry.grid(row=1, column=1, sticky="w", padx=(8, 0))
 
+        self.process_pool_var = tk.BooleanVar(
+            value=resource_limits.get("execution_mode", "threads") == "processes"
+        )
+        tk.Checkbutton(
+            resource_frame,
+            text="Process spritesheets in separate processes",
+            variable=self.process_pool_var,
+        ).grid(row=2, column=0, columnspan=2, sticky="w", pady=(4, 0))
+
+        # Unticking this re-exports everything without having to delete the previous outputs
+        self.output_cache_var = tk.BooleanVar(
+            value=resource_limits.get("use_output_cache", True)
+        )
+        tk.Checkbutton(
+            resource_frame,
+            text="Skip spritesheets whose outputs are unchanged",
+            variable=self.output_cache_var,
+        ).grid(row=3, column=0, columnspan=2, sticky="w")
+
         resource_frame.update_idletasks()
         req_width = resource_frame.winfo_reqwidth() + 3
         req_height = resource_frame.winfo_reqheight() + 3
@@ -359,6 +376,7 @@ class AppConfigWindow:
             ),
             "variable_delay": (tk.BooleanVar, None),
             "fnf_idle_loop": (tk.BooleanVar, None),
+            "gif_backend": (tk.StringVar, ["Wand", "Pillow"]),
         }
 
         self.extraction_vars = {}
@@ -690,8 +708,11 @@ class AppConfigWindow:
     def reset_to_defaults(self):
         cpu_default = str((self.max_threads + 1) // 4)
         self.cpu_var.set(cpu_default)
-        default_mem = ((self.max_memory_mb // 4 + 9) // 10) * 10
-        self.mem_var.set(str(default_mem))
+        self.mem_var.set(str(self.app_config.DEFAULTS["resource_limits"]["memory_limit_mb"]))
+        self.process_pool_var.set(
+            self.app_config.DEFAULTS["resource_limits"]["execution_mode"] == "processes"
+        )
+        self.output_cache_var.set(self.app_config.DEFAULTS["resource_limits"]["use_output_cache"])
 
         defaults = self.app_config.DEFAULTS["extraction_defaults"]
 
@@ -799,6 +820,9 @@ class AppConfigWindow:
             tk.messagebox.showerror("Invalid Input", "Memory limit must be a non-negative integer.")
             return
 
+        resource_limits["execution_mode"] = "processes" if self.process_pool_var.get() else "threads"
+        resource_limits["use_output_cache"] = self.output_cache_var.get()
+
         self.app_config.set("resource_limits", resource_limits)
         self.app_config.save()
 
@@ -547,18 +547,8 @@ class OverrideSettingsWindow:
             )
 
     def handle_preview_click(self):
-        from tkinter import messagebox
         from gui.animation_preview_window import AnimationPreviewWindow
 
-        animation_format = self.animation_format_entry.get()
-        if animation_format == "APNG":
-            messagebox.showinfo(
-                "Preview Not Available",
-                "Preview is not available for APNG format due to display limitations.\n\n"
-                "You can still export APNG animations and view them externally.",
-            )
-            return
-
         AnimationPreviewWindow.preview(
             self.app,
             self.name,
@@ -0,0 +1,61 @@
+# Import our own modules
+from utils.file_cache import FileCache
+
+
+class BackgroundAnalysis:
+    """
+    The background analysis of a spritesheet without metadata.
+
+    Attributes:
+        has_transparency (bool): Whether the image already has pixels with alpha < 255.
+        colors (list): The detected background RGB tuples, ordered by dominance. Empty when the image has transparency.
+    """
+
+    __slots__ = ("has_transparency", "colors")
+
+    def __init__(self, has_transparency, colors):
+        self.has_transparency = has_transparency
+        self.colors = colors
+
+
+class BackgroundAnalysisCache:
+    """
+    A process-wide cache of background analyses, shared by the pre-scan of a batch and the parse of each spritesheet.
+
+    The entries are held in a FileCache, keyed by the absolute path, modification time and size
+    of the image, so the parse reuses the analysis the pre-scan made as long as the file did not
+    change. The least recently used entries are dropped once more than MAX_ENTRIES images are cached.
+
+    Attributes:
+        MAX_ENTRIES (int): The maximum number of cached images.
+
+    Methods:
+        get(file_path, analyze_func) -> BackgroundAnalysis:
+            Returns the analysis of an image, calling analyze_func(file_path) on a cache miss.
+        peek(file_path) -> BackgroundAnalysis:
+            Returns the cached analysis of an image without analysing it, or None.
+        put(file_path, analysis):
+            Stores an analysis made elsewhere, e.g. in the process that ran the pre-scan.
+        clear():
+            Drops all cached entries.
+    """
+
+    MAX_ENTRIES = 256
+
+    _cache = FileCache(max_entries=MAX_ENTRIES)
+
+    @classmethod
+    def get(cls, file_path, analyze_func):
+        return cls._cache.get(file_path, analyze_func)
+
+    @classmethod
+    def peek(cls, file_path):
+        return cls._cache.peek(file_path)
+
+    @classmethod
+    def put(cls, file_path, analysis):
+        cls._cache.put(file_path, analysis)
+
+    @classmethod
+    def clear(cls):
+        cls._cache.clear()
@@ -0,0 +1,76 @@
+# Import our own modules
+from parsers.sprite_table import SpriteTable
+from utils.file_cache import FileCache
+from utils.utilities import Utilities
+
+
+class ParsedMetadata:
+    """
+    The parsed contents of a metadata file.
+
+    Attributes:
+        sprites (list): The sprite dicts or SpriteTable returned by the parser. Shared by all readers, must not be modified.
+        animations (dict): Maps every animation name to the indices of its sprites, in file order.
+    """
+
+    __slots__ = ("sprites", "animations")
+
+    def __init__(self, sprites):
+        self.sprites = sprites
+        self.animations = {}
+        if isinstance(sprites, SpriteTable):
+            names = sprites.names
+        else:
+            names = (sprite["name"] for sprite in sprites)
+        for index, sprite_name in enumerate(names):
+            name = Utilities.strip_trailing_digits(sprite_name)
+            self.animations.setdefault(name, []).append(index)
+
+
+class MetadataCache:
+    """
+    A process-wide cache of parsed metadata files, shared by the spritesheet listing, the preview and extraction.
+
+    The entries are held in a FileCache, keyed by the absolute path, modification time and size of
+    the file, so an edited file is parsed again on its next use. The least recently used entries
+    are dropped once more than MAX_ENTRIES files are cached.
+
+    Attributes:
+        MAX_ENTRIES (int): The maximum number of cached files.
+
+    Methods:
+        get(file_path, parse_func) -> ParsedMetadata:
+            Returns the parsed metadata of a file, calling parse_func(file_path) on a cache miss.
+        get_sprites(file_path, parse_func) -> list:
+            Returns the parsed sprite dicts of a file.
+        get_animation_names(file_path, parse_func) -> list:
+            Returns the animation names of a file, in file order.
+        peek(file_path) -> ParsedMetadata:
+            Returns the cached metadata of a file without parsing it, or None.
+        clear():
+            Drops all cached entries.
+    """
+
+    MAX_ENTRIES = 16
+
+    _cache = FileCache(max_entries=MAX_ENTRIES)
+
+    @classmethod
+    def get(cls, file_path, parse_func):
+        return cls._cache.get(file_path, lambda path: ParsedMetadata(parse_func(path)))
+
+    @classmethod
+    def get_sprites(cls, file_path, parse_func):
+        return cls.get(file_path, parse_func).sprites
+
+    @classmethod
+    def get_animation_names(cls, file_path, parse_func):
+        return list(cls.get(file_path, parse_func).animations)
+
+    @classmethod
+    def peek(cls, file_path):
+        return cls._cache.peek(file_path)
+
+    @classmethod
+    def clear(cls):
+        cls._cache.clear()
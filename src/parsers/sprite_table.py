@@ -0,0 +1,56 @@
+import numpy as np
+
+
+class SpriteTable:
+    """
+    A compact, array-backed list of sprites, as returned by XmlParser.parse_xml_data.
+
+    The numeric fields of all sprites are stored in one numpy structured array and the names in
+    a list, instead of one dict per sprite. Indexing or iterating the table still yields sprite
+    dicts with the same keys as the other parsers, so code that expects a list of dicts keeps
+    working; SpriteProcessor reads the rows directly.
+
+    Attributes:
+        DTYPE (numpy.dtype): The record layout of the numeric fields.
+        names (list): The sprite names.
+        records (numpy.ndarray): One DTYPE record per sprite.
+
+    Methods:
+        rows() -> iterator:
+            Yields (name, x, y, width, height, frameX, frameY, frameWidth, frameHeight, rotated) tuples.
+    """
+
+    DTYPE = np.dtype(
+        [
+            ("x", np.int32),
+            ("y", np.int32),
+            ("width", np.int32),
+            ("height", np.int32),
+            ("frameX", np.int32),
+            ("frameY", np.int32),
+            ("frameWidth", np.int32),
+            ("frameHeight", np.int32),
+            ("rotated", np.bool_),
+        ]
+    )
+
+    __slots__ = ("names", "records")
+
+    def __init__(self, names, records):
+        self.names = names
+        self.records = np.asarray(records, dtype=self.DTYPE)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        return dict(zip(("name",) + self.DTYPE.names, (self.names[index],) + self.records[index].item()))
+
+    def __iter__(self):
+        keys = ("name",) + self.DTYPE.names
+        for row in self.rows():
+            yield dict(zip(keys, row))
+
+    def rows(self):
+        # tolist() converts a whole column to Python ints or bools in one call.
+        return zip(self.names, *(self.records[field].tolist() for field in self.DTYPE.names))
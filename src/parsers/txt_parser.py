@@ -1,8 +1,7 @@
 import os
-import tkinter as tk
 
 # Import our own modules
-from utils.utilities import Utilities
+from parsers.metadata_cache import MetadataCache
 
 
 class TxtParser:
@@ -16,8 +15,8 @@ class TxtParser:
         listbox_data: The Tkinter listbox to populate with extracted names.
 
     Methods:
-        get_data(): Parses the TXT file and populates the listbox with names.
-        extract_names(): Extracts names from each line of the TXT file.
+        get_data(): Populates the listbox with the animation names of the TXT file.
+        extract_names(): Returns the animation names of the TXT file, parsing it through the MetadataCache.
         get_names(names): Populates the listbox with the given names.
         parse_txt_packer(file_path): Static method to parse TXT data from a file and return sprite information.
     """
@@ -32,15 +31,13 @@ class TxtParser:
         self.get_names(names)
 
     def extract_names(self):
-        names = set()
-        with open(os.path.join(self.directory, self.txt_filename), "r") as file:
-            for line in file:
-                parts = line.split(" = ")[0]
-                name = Utilities.strip_trailing_digits(parts)
-                names.add(name)
-        return names
+        return MetadataCache.get_animation_names(
+            os.path.join(self.directory, self.txt_filename), TxtParser.parse_txt_packer
+        )
 
     def get_names(self, names):
+        import tkinter as tk
+
         for name in names:
             self.listbox_data.insert(tk.END, name)
 
@@ -49,6 +46,8 @@ class TxtParser:
         sprites = []
         with open(file_path, "r") as file:
             for line in file:
+                if not line.strip():
+                    continue
                 parts = line.split(" = ")
                 name = parts[0].strip()
                 x, y, width, height = map(int, parts[1].split())
@@ -1,8 +1,13 @@
 import os
-import tkinter as tk
 from PIL import Image
 import numpy as np
 
+# Import our own modules
+from parsers.background_analysis_cache import BackgroundAnalysis, BackgroundAnalysisCache
+from utils.atlas_cache import AtlasCache
+from utils.region_labeler import RegionLabeler
+from utils.summed_area_table import SummedAreaTable
+
 GUI_AVAILABLE = True  # We'll check for specific dialog availability in the code
 
 
@@ -12,10 +17,14 @@ class UnknownParser:
 
     This parser analyzes an image to automatically detect individual sprites based on
     connected regions of pixels with opacity >= 1%. Each detected region is treated
-    as a separate sprite and exported as individual frames.
+    as a separate sprite and exported as individual frames. Sheets laid out as a uniform
+    grid of cells are recognised first, and then every non-empty cell is a sprite.
     This is an experimental fallback feature and may not work for all spritesheets.
 
     Attributes:
+        KEYING_BAND_PIXELS (int): The approximate number of pixels keyed or excluded per band.
+        CONTENT_TABLE_MIN_SPRITES (int): The number of sprites from which precise cropping shares one
+            content table per sheet instead of working on every sprite's region on its own.
         directory (str): The directory where the image file is located.
         image_filename (str): The name of the image file to parse.
         listbox_data (tk.Listbox): The Tkinter listbox to populate with detected sprite names.    Methods:
@@ -23,13 +32,21 @@ class UnknownParser:
         extract_names(): Detects sprites in the image and returns their names.
         get_names(names): Populates the listbox with the given names.
         parse_unknown_image(file_path, parent_window=None): Static method to analyze an image and return both processed image and sprite information.
-        _find_connected_regions(alpha_mask): Static method to find connected regions in an alpha mask.
-        _get_bounding_box(region_coords): Static method to calculate the bounding box of a region.
+        analyze_background(file_path): Static method to check an image for transparency and detect its background colors.
+        _parse_grid(image, img_array, mask, file_path): Static method to parse a uniform grid of cells from row and column profiles.
+        _crop_sprite_precisely(image, x, y, width, height, padding=1, content_table=None): Static method to tighten a sprite box to its content.
+        _find_connected_regions(mask, connectivity=4): Static method to find the bounding boxes and sizes of connected regions in a mask.
         _detect_background_color(image): Static method to detect the most common background color.
         _apply_color_keying(image, background_color, tolerance): Static method to make background color transparent.
         _parse_excluding_background(image, file_path, background_color): Static method to parse sprites while excluding background color pixels.
+
+    Color keying and background exclusion work on bands of about KEYING_BAND_PIXELS pixels with
+    int32 squared color distances, so huge scans need no full-size temporary arrays.
     """
 
+    KEYING_BAND_PIXELS = 1 << 20
+    CONTENT_TABLE_MIN_SPRITES = 1024
+
     def __init__(self, directory, image_filename, listbox_data):
         self.directory = directory
         self.image_filename = image_filename
@@ -46,17 +63,22 @@ class UnknownParser:
         return names
 
     def get_names(self, names):
+        import tkinter as tk
+
         for name in names:
             self.listbox_data.insert(tk.END, name)
 
     @staticmethod
-    def parse_unknown_image(file_path, parent_window=None):
+    def parse_unknown_image(file_path, parent_window=None, keying_action=None):
         """
         Analyzes an image file to automatically detect sprite boundaries.
 
         Args:
             file_path (str): Path to the image file to analyze
             parent_window (tk.Tk, optional): Parent window for displaying dialogs
+            keying_action (str, optional): Background handling choice for this file
+                ('key_background', 'exclude_background', 'skip' or 'cancel').
+                When omitted, the choice made in the batch background dialog is used.
 
         Returns:
             tuple: (processed_image, sprite_list) where:
@@ -64,15 +86,19 @@ class UnknownParser:
                 - sprite_list (list): List of sprite dictionaries with keys: name, x, y, width, height
         """
         try:
-            image = Image.open(file_path)
+            image = AtlasCache.get(file_path)
 
-            if image.mode != "RGBA":
-                image = image.convert("RGBA")
-            if not UnknownParser._has_transparency(image):
-                background_colors = UnknownParser._detect_background_colors(
-                    image, max_colors=3
-                )
-                if background_colors:
+            # Analysed once per file version, usually already by the pre-scan of the batch
+            analysis = BackgroundAnalysisCache.get(
+                file_path, UnknownParser.analyze_background
+            )
+            if not analysis.has_transparency:
+                background_colors = list(analysis.colors)
+                if background_colors and keying_action is not None:
+                    print(
+                        f"Using provided background choice for {os.path.basename(file_path)}: {keying_action}"
+                    )
+                elif background_colors:
                     keying_action = "key_background"
 
                     try:
@@ -104,6 +130,7 @@ class UnknownParser:
                             "Background keying dialog not available - defaulting to automatic multi-color keying"
                         )
 
+                if background_colors:
                     if keying_action == "cancel":
                         print("User cancelled processing of unknown atlas")
                         return image, []
@@ -131,17 +158,23 @@ class UnknownParser:
             alpha_channel = img_array[:, :, 3]
             alpha_mask = alpha_channel >= int(255 * 0.01)
 
+            grid_sprites = UnknownParser._parse_grid(
+                image, img_array, alpha_mask, file_path
+            )
+            if grid_sprites is not None:
+                print(
+                    f"Detected {len(grid_sprites)} sprites in unknown spritesheet: {file_path}"
+                )
+                return image, grid_sprites
+
             regions = UnknownParser._find_connected_regions(alpha_mask)
 
             sprites = []
             base_name = os.path.splitext(os.path.basename(file_path))[0]
 
-            for i, region in enumerate(regions):
-                if len(region) == 0:
-                    continue
+            content_table = UnknownParser._shared_content_table(image, len(regions))
 
-                bbox = UnknownParser._get_bounding_box(region)
-                x, y, width, height = bbox
+            for i, (x, y, width, height, _) in enumerate(regions):
 
                 # Skip very small regions (likely noise)
                 if width < 2 or height < 2:
@@ -149,7 +182,9 @@ class UnknownParser:
 
                 # Apply precise cropping to remove remaining background/transparent areas
                 cropped_x, cropped_y, cropped_width, cropped_height = (
-                    UnknownParser._crop_sprite_precisely(image, x, y, width, height)
+                    UnknownParser._crop_sprite_precisely(
+                        image, x, y, width, height, content_table=content_table
+                    )
                 )
 
                 sprite_name = f"unsupported spritesheet - {base_name} - {i + 1:04d}"
@@ -172,90 +207,182 @@ class UnknownParser:
             print(f"Error parsing unknown image {file_path}: {str(e)}")
             # Return the original image and empty sprite list on error
             try:
-                original_image = Image.open(file_path)
-                if original_image.mode != "RGBA":
-                    original_image = original_image.convert("RGBA")
-                return original_image, []
+                return AtlasCache.get(file_path), []
             except Exception:
                 return None, []
 
     @staticmethod
-    def _find_connected_regions(alpha_mask):
+    def analyze_background(file_path):
         """
-        Find connected regions of pixels in a binary mask using flood fill.
+        Check an image for transparency and detect its background colors.
+
+        Use BackgroundAnalysisCache.get(file_path, UnknownParser.analyze_background)
+        to analyse every image only once.
 
         Args:
-            alpha_mask (numpy.ndarray): Binary mask of pixels with sufficient opacity
+            file_path (str): Path to the image file to analyze
 
         Returns:
-            list: List of regions, where each region is a list of (y, x) coordinates
+            BackgroundAnalysis: The transparency flag and the detected background colors
+                (none when the image already has transparency)
         """
-        height, width = alpha_mask.shape
-        visited = np.zeros_like(alpha_mask, dtype=bool)
-        regions = []
-
-        def flood_fill(start_y, start_x):
-            """Flood fill to find all connected pixels in a region."""
-            stack = [(start_y, start_x)]
-            region = []
+        image = AtlasCache.get(file_path)
+        has_transparency = bool(UnknownParser._has_transparency(image))
+        colors = []
+        if not has_transparency:
+            colors = UnknownParser._detect_background_colors(image, max_colors=3)
+        return BackgroundAnalysis(has_transparency, colors)
 
-            while stack:
-                y, x = stack.pop()
-
-                if (
-                    y < 0
-                    or y >= height
-                    or x < 0
-                    or x >= width
-                    or visited[y, x]
-                    or not alpha_mask[y, x]
-                ):
-                    continue
-
-                visited[y, x] = True
-                region.append((y, x))
+    @staticmethod
+    def _parse_grid(image, img_array, mask, file_path):
+        """
+        Parse a spritesheet laid out as a uniform grid without looking for connected regions.
 
-                # Add adjacent pixels (4-connectivity)
-                stack.extend([(y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)])
+        Rows and columns whose pixels are all alike (fully outside the mask, or all of one
+        separator color) are treated as gutters. The sheet is only taken for a grid when
+        both axes have at least two cells of one size, separated by gutters of one size,
+        and the cells tile the whole image: the margins before the first and after the
+        last cell are no wider than a gutter.
 
-            return region
+        Each cell that contains masked pixels is then tightened to its masked pixels and
+        passed through _crop_sprite_precisely, like the regions of the region scan, so
+        the sprite boxes match the region scan whenever every cell holds one region.
 
-        # Find all connected regions
-        for y in range(height):
-            for x in range(width):
-                if alpha_mask[y, x] and not visited[y, x]:
-                    region = flood_fill(y, x)
-                    if region:
-                        regions.append(region)
+        Args:
+            image (PIL.Image): The image the boxes refer to (for precise cropping)
+            img_array (numpy.ndarray): (height, width, 4) uint8 RGBA pixels
+            mask (numpy.ndarray): (height, width) bool mask of the sprite pixels
+            file_path (str): Path to the image file (for naming)
 
-        return regions
+        Returns:
+            list: List of sprite dictionaries with keys: name, x, y, width, height,
+                or None when the image is not a uniform grid
+        """
+        height, width = mask.shape
+        if height == 0 or width == 0:
+            return None
+
+        # Projection profiles: is every pixel of a row or column the same? Pixels outside
+        # the mask all count as one value, whatever their color.
+        uniform_columns = np.ones(width, dtype=bool)
+        uniform_rows = np.empty(height, dtype=bool)
+        first_row = None
+        for y0, y1 in UnknownParser._keying_bands(height, width):
+            words = np.ascontiguousarray(img_array[y0:y1]).view(np.uint32)[..., 0]
+            words = np.where(mask[y0:y1], words, 0)
+            if first_row is None:
+                first_row = words[0].copy()
+            uniform_columns &= (words == first_row).all(axis=0)
+            uniform_rows[y0:y1] = (words == words[:, :1]).all(axis=1)
+
+        columns = UnknownParser._grid_axis(uniform_columns)
+        rows = UnknownParser._grid_axis(uniform_rows)
+        if columns is None or rows is None:
+            return None
+        column_starts, cell_width = columns
+        row_starts, cell_height = rows
+
+        cells = []
+        for y in row_starts.tolist():
+            # Count the masked columns of this row of cells to find its empty cells
+            masked_columns = np.concatenate(
+                ([0], np.cumsum(mask[y : y + cell_height].any(axis=0)))
+            )
+            occupied = masked_columns[column_starts + cell_width] > masked_columns[column_starts]
+            cells.extend((x, y) for x in column_starts[occupied].tolist())
+        if not cells:
+            return None
+
+        print(
+            f"Detected uniform grid: {len(column_starts)}x{len(row_starts)} cells of {cell_width}x{cell_height} pixels"
+        )
+
+        content_table = UnknownParser._shared_content_table(image, len(cells))
+
+        sprites = []
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        for i, (x, y) in enumerate(cells):
+            # Tighten the cell to its masked pixels, the box the region scan would start from
+            cell_mask = mask[y : y + cell_height, x : x + cell_width]
+            masked_rows = np.flatnonzero(cell_mask.any(axis=1))
+            masked_columns = np.flatnonzero(cell_mask.any(axis=0))
+            region_x = x + int(masked_columns[0])
+            region_y = y + int(masked_rows[0])
+            region_width = int(masked_columns[-1] - masked_columns[0]) + 1
+            region_height = int(masked_rows[-1] - masked_rows[0]) + 1
+
+            # Skip very small regions (likely noise)
+            if region_width < 2 or region_height < 2:
+                continue
+
+            cropped_x, cropped_y, cropped_width, cropped_height = (
+                UnknownParser._crop_sprite_precisely(
+                    image,
+                    region_x,
+                    region_y,
+                    region_width,
+                    region_height,
+                    content_table=content_table,
+                )
+            )
+            sprites.append(
+                {
+                    "name": f"unsupported spritesheet - {base_name} - {i + 1:04d}",
+                    "x": cropped_x,
+                    "y": cropped_y,
+                    "width": cropped_width,
+                    "height": cropped_height,
+                }
+            )
+        return sprites
 
     @staticmethod
-    def _get_bounding_box(region_coords):
+    def _grid_axis(gutters):
         """
-        Calculate the bounding box of a region.
+        Find the cells along one axis of a uniform grid.
 
         Args:
-            region_coords (list): List of (y, x) coordinates
+            gutters (numpy.ndarray): Bool flag per row or column, True for gutter lines
 
         Returns:
-            tuple: (x, y, width, height) of the bounding box
+            tuple: (starts, size) array of cell start positions and the cell size, or None
+                unless there are at least two cells of one size, one gutter size between
+                them and margins no wider than a gutter at both ends of the axis
         """
-        if not region_coords:
-            return (0, 0, 0, 0)
-
-        y_coords = [coord[0] for coord in region_coords]
-        x_coords = [coord[1] for coord in region_coords]
+        edges = np.diff(np.concatenate(([1], gutters.view(np.int8), [1])))
+        starts = np.flatnonzero(edges == -1)
+        ends = np.flatnonzero(edges == 1)
+        if len(starts) < 2:
+            return None
+
+        sizes = ends - starts
+        spacing = starts[1:] - ends[:-1]
+        if sizes[0] < 2 or (sizes != sizes[0]).any() or (spacing != spacing[0]).any():
+            return None
+
+        # The cell pitch has to account for the whole axis, not just the span of the content.
+        gutter = int(spacing[0])
+        if starts[0] > gutter or len(gutters) - ends[-1] > gutter:
+            return None
+        return starts, int(sizes[0])
 
-        min_x = min(x_coords)
-        max_x = max(x_coords)
-        min_y = min(y_coords)
-        max_y = max(y_coords)
+    @staticmethod
+    def _find_connected_regions(mask, connectivity=4):
+        """
+        Find connected regions of pixels in a binary mask.
 
-        width = max_x - min_x + 1
-        height = max_y - min_y + 1
+        Args:
+            mask (numpy.ndarray): Binary mask of pixels with sufficient opacity
+            connectivity (int): 4 or 8 neighbour connectivity
 
-        return (min_x, min_y, width, height)
+        Returns:
+            list: List of regions in raster scan order, where each region is a
+                (x, y, width, height, pixel_count) tuple of its bounding box and size
+        """
+        return [
+            tuple(region)
+            for region in RegionLabeler.find_regions(mask, connectivity).tolist()
+        ]
 
     @staticmethod
     def _has_transparency(image):
@@ -271,7 +398,7 @@ class UnknownParser:
         if image.mode != "RGBA":
             return False
 
-        img_array = np.array(image)
+        img_array = AtlasCache.pixels_of(image)
         alpha_channel = img_array[:, :, 3]
         return np.any(alpha_channel < 255)
 
@@ -289,77 +416,26 @@ class UnknownParser:
             list: List of RGB tuples of detected background colors, ordered by dominance
         """
         try:
-            rgb_image = image.convert("RGB")
-            img_array = np.array(rgb_image)
-            height, width = img_array.shape[:2]
-
-            edge_pixels = []
-
-            # 1. Sample all border pixels (most reliable for background detection)
-            # Top and bottom edges - these are most likely to be background
-            edge_pixels.extend(img_array[0, :].reshape(-1, 3))  # Top row
-            edge_pixels.extend(img_array[-1, :].reshape(-1, 3))  # Bottom row
-
-            # Left and right edges (excluding corners to avoid double counting)
-            if height > 2:
-                edge_pixels.extend(img_array[1:-1, 0].reshape(-1, 3))  # Left column
-                edge_pixels.extend(img_array[1:-1, -1].reshape(-1, 3))  # Right column
-
-            # 2. Sample corners (very likely to be background)
-            corner_samples = [
-                img_array[0, 0],
-                img_array[0, -1],
-                img_array[-1, 0],
-                img_array[-1, -1],  # Corners
-            ]
-            edge_pixels.extend(corner_samples)
-
-            # 3. Sample from a coarse grid pattern to catch grid lines/bounding boxes
-            # Use larger steps to avoid over-sampling sprite content
-            grid_step = max(8, min(width, height) // 15)
-            for y in range(0, height, grid_step):
-                for x in range(0, width, grid_step):
-                    # Only sample if we're near edges or corners
-                    edge_distance = min(x, y, width - 1 - x, height - 1 - y)
-                    if edge_distance <= max(5, min(width, height) // 20):
-                        edge_pixels.append(img_array[y, x])
-
-            # 4. Sample from regular grid lines that might represent sprite boundaries
-            # but only near the edges
-            # Vertical lines near edges
-            if width > 20:
-                line_step = width // 8  # Check fewer vertical lines
-                for x in range(line_step, width, line_step):
-                    # Sample points along this vertical line, but prefer edge areas
-                    for y in [0, height // 4, height // 2, 3 * height // 4, height - 1]:
-                        if 0 <= y < height:
-                            edge_pixels.append(img_array[y, x])
-
-            # Horizontal lines near edges
-            if height > 20:
-                line_step = height // 8  # Check fewer horizontal lines
-                for y in range(line_step, height, line_step):
-                    # Sample points along this horizontal line, but prefer edge areas
-                    for x in [0, width // 4, width // 2, 3 * width // 4, width - 1]:
-                        if 0 <= x < width:
-                            edge_pixels.append(img_array[y, x])
-
-            edge_colors = [tuple(int(val) for val in pixel) for pixel in edge_pixels]
-
-            color_counts = {}
-            for color in edge_colors:
-                color_counts[color] = color_counts.get(color, 0) + 1
-
-            if not color_counts:
+            words = UnknownParser._rgb_words(image)
+            height, width = words.shape
+            if height == 0 or width == 0:
                 return []
 
-            # Sort colors by frequency
-            sorted_colors = sorted(
-                color_counts.items(), key=lambda x: x[1], reverse=True
+            ys, xs = UnknownParser._background_sample_points(height, width)
+            samples = words[ys, xs] & 0xFFFFFF
+
+            # Count the sampled colors; ties keep the order in which the samples first meet them
+            keys, first_indices, counts = np.unique(
+                samples, return_index=True, return_counts=True
             )
+            order = np.lexsort((first_indices, -counts))
+            sorted_colors = [
+                (UnknownParser._unpack_rgb(key), count)
+                for key, count in zip(keys[order].tolist(), counts[order].tolist())
+            ]
 
             background_colors = []
-            total_edge_pixels = len(edge_colors)
+            total_edge_pixels = len(samples)
 
             for i, (color, count) in enumerate(sorted_colors[: max_colors * 2]):
                 dominance = count / total_edge_pixels
@@ -392,18 +468,32 @@ class UnknownParser:
 
             # Additional validation: check if detected colors actually appear in large connected regions
             # This helps distinguish background colors from sprite details
+            total_pixels = width * height
+            color_keys = [UnknownParser._pack_color(color) for color in background_colors]
+            color_counts = UnknownParser._count_rgb_keys(words, color_keys)
+
             validated_colors = []
-            for color in background_colors:
-                # Count how many times this color appears in the entire image
-                color_mask = np.all(img_array == color, axis=2)
-                total_occurrences = np.sum(color_mask)
-                total_pixels = width * height
+            for color, color_key, total_occurrences in zip(
+                background_colors, color_keys, color_counts
+            ):
                 overall_dominance = total_occurrences / total_pixels
 
+                # Very dominant colors (>50% of image) are likely background even if fragmented,
+                # so their connected regions are not needed
+                if overall_dominance > 0.5:
+                    validated_colors.append(color)
+                    print(
+                        f"Validated background color {color}: {overall_dominance:.2%} of total image (dominant color)"
+                    )
+                    continue
+
                 # Also check if this color forms large connected regions (typical of backgrounds)
+                color_mask = UnknownParser._rgb_key_mask(words, color_key)
                 regions = UnknownParser._find_connected_regions(color_mask)
+                del color_mask
+                region_sizes = [region[4] for region in regions]
                 if regions:
-                    largest_region_size = max(len(region) for region in regions)
+                    largest_region_size = max(region_sizes)
                     largest_region_ratio = (
                         largest_region_size / total_occurrences
                         if total_occurrences > 0
@@ -411,25 +501,19 @@ class UnknownParser:
                     )
                     total_large_regions = sum(
                         1
-                        for region in regions
-                        if len(region) > min(100, total_occurrences * 0.1)
+                        for region_size in region_sizes
+                        if region_size > min(100, total_occurrences * 0.1)
                     )
                 else:
                     largest_region_ratio = 0
                     total_large_regions = 0
 
                 # Determine if this color is likely a background color based on:
-                # 1. Very dominant colors (>50% of image) are likely background even if fragmented
-                # 2. Colors with large connected regions are likely background
-                # 3. Colors with many medium-sized regions might be background too (e.g., fragmented by grid)
+                # 1. Colors with large connected regions are likely background
+                # 2. Colors with many medium-sized regions might be background too (e.g., fragmented by grid)
                 is_background = False
 
                 if (
-                    overall_dominance > 0.5
-                ):  # Very dominant color is probably background
-                    is_background = True
-                    reason = "dominant color"
-                elif (
                     overall_dominance > 0.02 and largest_region_ratio > 0.7
                 ):  # Large connected region
                     is_background = True
@@ -461,6 +545,151 @@ class UnknownParser:
             print(f"Error detecting background colors: {str(e)}")
             return []
 
+    @staticmethod
+    def _rgb_words(image):
+        """
+        Get the pixels of an image as one uint32 word per pixel, with the RGB key in the low 24 bits.
+
+        Comparing or counting single words is much faster than comparing three channels.
+        RGBA images are viewed in place, without a copy when they came from the AtlasCache;
+        other modes are converted first.
+
+        Args:
+            image (PIL.Image): The image to read
+
+        Returns:
+            numpy.ndarray: (height, width) uint32 array; word & 0xFFFFFF is the r | g << 8 | b << 16 key
+        """
+        if image.mode == "RGBA":
+            pixels = AtlasCache.pixels_of(image)
+            return np.ascontiguousarray(pixels).view("<u4").reshape(pixels.shape[:2])
+        rgb_image = image.convert("RGB")
+        words = np.frombuffer(rgb_image.tobytes("raw", "RGBX"), dtype="<u4")
+        return words.reshape(rgb_image.height, rgb_image.width)
+
+    @staticmethod
+    def _count_rgb_keys(words, keys):
+        """
+        Count the pixels of every RGB key in one banded pass over the image.
+
+        Args:
+            words (numpy.ndarray): The _rgb_words of an image
+            keys (list): The packed colors to count
+
+        Returns:
+            list: The number of pixels of every key
+        """
+        counts = [0] * len(keys)
+        if not keys:
+            return counts
+        height, width = words.shape
+        for y0, y1 in UnknownParser._keying_bands(height, width):
+            band = words[y0:y1] & 0xFFFFFF
+            for i, key in enumerate(keys):
+                counts[i] += int(np.count_nonzero(band == key))
+        return counts
+
+    @staticmethod
+    def _rgb_key_mask(words, key):
+        """
+        Build the mask of the pixels of one RGB key, band by band.
+
+        Args:
+            words (numpy.ndarray): The _rgb_words of an image
+            key (int): The packed color
+
+        Returns:
+            numpy.ndarray: (height, width) bool mask
+        """
+        height, width = words.shape
+        mask = np.empty((height, width), dtype=bool)
+        for y0, y1 in UnknownParser._keying_bands(height, width):
+            np.equal(words[y0:y1] & 0xFFFFFF, key, out=mask[y0:y1])
+        return mask
+
+    @staticmethod
+    def _pack_color(color):
+        """
+        Pack an RGB tuple into the key of _rgb_words.
+        """
+        return color[0] | color[1] << 8 | color[2] << 16
+
+    @staticmethod
+    def _unpack_rgb(key):
+        """
+        Unpack an _rgb_words key into an RGB tuple of ints.
+        """
+        return key & 0xFF, key >> 8 & 0xFF, key >> 16 & 0xFF
+
+    @staticmethod
+    def _background_sample_points(height, width):
+        """
+        Get the pixels sampled for background detection.
+
+        Samples are taken along the borders, at the corners, on a coarse grid near the
+        edges and along a few vertical and horizontal lines. Pixels may be sampled more
+        than once, which weights them accordingly.
+
+        Args:
+            height (int): The image height
+            width (int): The image width
+
+        Returns:
+            tuple: (ys, xs) integer arrays of the sampled coordinates, in sampling order
+        """
+        ys = []
+        xs = []
+
+        def add(y, x):
+            y, x = np.broadcast_arrays(np.asarray(y, dtype=np.intp), np.asarray(x, dtype=np.intp))
+            ys.append(y.ravel())
+            xs.append(x.ravel())
+
+        columns = np.arange(width)
+
+        # 1. All border pixels (most reliable for background detection)
+        # Top and bottom edges - these are most likely to be background
+        add(0, columns)
+        add(height - 1, columns)
+
+        # Left and right edges (excluding corners to avoid double counting)
+        if height > 2:
+            rows = np.arange(1, height - 1)
+            add(rows, 0)
+            add(rows, width - 1)
+
+        # 2. Corners (very likely to be background)
+        add([0, 0, height - 1, height - 1], [0, width - 1, 0, width - 1])
+
+        # 3. A coarse grid pattern to catch grid lines/bounding boxes, only near the edges
+        # Use larger steps to avoid over-sampling sprite content
+        grid_step = max(8, min(width, height) // 15)
+        grid_y, grid_x = np.meshgrid(
+            np.arange(0, height, grid_step), np.arange(0, width, grid_step), indexing="ij"
+        )
+        edge_distance = np.minimum(
+            np.minimum(grid_x, grid_y), np.minimum(width - 1 - grid_x, height - 1 - grid_y)
+        )
+        near_edge = edge_distance <= max(5, min(width, height) // 20)
+        add(grid_y[near_edge], grid_x[near_edge])
+
+        # 4. Regular grid lines that might represent sprite boundaries, sampled near the edges
+        # Vertical lines
+        if width > 20:
+            line_step = width // 8  # Check fewer vertical lines
+            line_xs = np.arange(line_step, width, line_step)
+            line_ys = [0, height // 4, height // 2, 3 * height // 4, height - 1]
+            add(np.tile(line_ys, len(line_xs)), np.repeat(line_xs, len(line_ys)))
+
+        # Horizontal lines
+        if height > 20:
+            line_step = height // 8  # Check fewer horizontal lines
+            line_ys = np.arange(line_step, height, line_step)
+            line_xs = [0, width // 4, width // 2, 3 * width // 4, width - 1]
+            add(np.repeat(line_ys, len(line_xs)), np.tile(line_xs, len(line_ys)))
+
+        return np.concatenate(ys), np.concatenate(xs)
+
     @staticmethod
     def _detect_background_color(image):
         """
@@ -475,6 +704,67 @@ class UnknownParser:
         colors = UnknownParser._detect_background_colors(image, max_colors=1)
         return colors[0] if colors else None
 
+    @staticmethod
+    def _keying_bands(height, width):
+        """
+        Split an image into bands of whole rows for tiled color keying.
+
+        Args:
+            height (int): The image height
+            width (int): The image width
+
+        Yields:
+            tuple: (y0, y1) row range of every band, each covering about KEYING_BAND_PIXELS pixels
+        """
+        rows = max(1, UnknownParser.KEYING_BAND_PIXELS // max(1, width))
+        for y0 in range(0, height, rows):
+            yield y0, min(height, y0 + rows)
+
+    @staticmethod
+    def _squared_tolerance(tolerance):
+        """
+        Get the largest squared distance that is still within a color tolerance.
+
+        Matches sqrt(distance) <= tolerance exactly, so keying can compare integer
+        squared distances instead of taking square roots.
+
+        Args:
+            tolerance (float): Color tolerance (0-255)
+
+        Returns:
+            int: The squared distance limit, -1 if no distance is within the tolerance
+        """
+        if tolerance < 0:
+            return -1
+        limit = int(tolerance * tolerance)
+        while np.sqrt(limit + 1) <= tolerance:
+            limit += 1
+        while limit >= 0 and np.sqrt(limit) > tolerance:
+            limit -= 1
+        return limit
+
+    @staticmethod
+    def _squared_color_distance(pixels, color, out, scratch):
+        """
+        Compute the squared RGB distance of pixels to a color in int32.
+
+        Args:
+            pixels (numpy.ndarray): (height, width, 3 or 4) uint8 pixels
+            color (tuple): RGB tuple to measure the distance to
+            out (numpy.ndarray): (height, width) int32 array receiving the distances
+            scratch (numpy.ndarray): (height, width) int32 work array
+
+        Returns:
+            numpy.ndarray: out
+        """
+        for channel in range(3):
+            target = out if channel == 0 else scratch
+            np.subtract(pixels[..., channel], color[channel], out=target, dtype=np.int32)
+            np.multiply(target, target, out=target)
+            if channel:
+                out += scratch
+        return out
+
     @staticmethod
     def _apply_color_keying(image, background_color, tolerance=30):
         """
@@ -494,26 +784,23 @@ class UnknownParser:
 
             img_array = np.array(image)
             height, width = img_array.shape[:2]
+            limit = UnknownParser._squared_tolerance(tolerance)
 
-            r, g, b = img_array[:, :, 0], img_array[:, :, 1], img_array[:, :, 2]
-            bg_r, bg_g, bg_b = background_color
+            transparent_count = 0
+            for y0, y1 in UnknownParser._keying_bands(height, width):
+                band = img_array[y0:y1]
+                distance = np.empty(band.shape[:2], dtype=np.int32)
+                scratch = np.empty_like(distance)
+                UnknownParser._squared_color_distance(band, background_color, distance, scratch)
 
-            # Calculate color distance from background color
-            color_distance = np.sqrt(
-                (r.astype(int) - bg_r) ** 2
-                + (g.astype(int) - bg_g) ** 2
-                + (b.astype(int) - bg_b) ** 2
-            )
-            # Create mask for pixels that match the background color within tolerance
-            background_mask = color_distance <= tolerance
-
-            # Set alpha to 0 for background pixels
-            img_array[background_mask, 3] = 0
+                # Pixels that match the background color within tolerance become transparent
+                background_mask = distance <= limit
+                band[..., 3][background_mask] = 0
+                transparent_count += np.count_nonzero(background_mask)
 
             # Create new image from modified array
             keyed_image = Image.fromarray(img_array, "RGBA")
 
-            transparent_count = np.sum(background_mask)
             total_pixels = width * height
             percentage = (transparent_count / total_pixels) * 100
 
@@ -533,6 +820,9 @@ class UnknownParser:
         Apply color keying to make multiple background colors transparent.
         Enhanced with improved tolerance handling for better background removal.
 
+        The image is keyed in bands of KEYING_BAND_PIXELS pixels, so apart from the result
+        only the masks and int32 distances of one band are held in memory.
+
         Args:
             image (PIL.Image): The image to process
             background_colors (list): List of RGB tuples of background colors to key out
@@ -551,88 +841,68 @@ class UnknownParser:
             img_array = np.array(image)
             height, width = img_array.shape[:2]
 
-            r, g, b = img_array[:, :, 0], img_array[:, :, 1], img_array[:, :, 2]
-
-            # Create combined mask for all background colors
-            combined_mask = np.zeros((height, width), dtype=bool)
+            # Use adaptive tolerance - higher tolerance for primary background color
+            adaptive_tolerances = [
+                tolerance if i == 0 else max(25, tolerance - 10)
+                for i in range(len(background_colors))
+            ]
+            limits = [UnknownParser._squared_tolerance(t) for t in adaptive_tolerances]
+            # More aggressive tolerance for edge cleanup
+            edge_cleanup_limit = UnknownParser._squared_tolerance(tolerance + 15)
+
+            keyed_counts = [0] * len(background_colors)
+            cleanup_count = 0
+            for y0, y1 in UnknownParser._keying_bands(height, width):
+                # One row of halo on each side, the edge cleanup looks at the neighbours of every pixel
+                top = max(0, y0 - 1)
+                bottom = min(height, y1 + 1)
+                core = slice(y0 - top, y1 - top)
+                band = img_array[top:bottom]
+
+                distance = np.empty(band.shape[:2], dtype=np.int32)
+                scratch = np.empty_like(distance)
+                matched = np.empty(band.shape[:2], dtype=bool)
+                combined_mask = np.zeros(band.shape[:2], dtype=bool)
+                edge_cleanup_mask = np.zeros(band.shape[:2], dtype=bool)
+
+                for i, bg_color in enumerate(background_colors):
+                    UnknownParser._squared_color_distance(band, bg_color, distance, scratch)
+
+                    # Pixels that match this background color within tolerance
+                    np.less_equal(distance, limits[i], out=matched)
+                    combined_mask |= matched
+                    keyed_counts[i] += np.count_nonzero(matched[core])
+
+                    # Pixels "close enough" to any background color, for anti-aliased sprite edges
+                    np.less_equal(distance, edge_cleanup_limit, out=matched)
+                    edge_cleanup_mask |= matched
+
+                # Only apply edge cleanup to pixels that are adjacent (4-connected) to already keyed
+                # pixels. This prevents removing sprite colors that happen to be similar to background
+                dilated_mask = matched
+                np.copyto(dilated_mask, combined_mask)
+                dilated_mask[1:, :] |= combined_mask[:-1, :]
+                dilated_mask[:-1, :] |= combined_mask[1:, :]
+                dilated_mask[:, 1:] |= combined_mask[:, :-1]
+                dilated_mask[:, :-1] |= combined_mask[:, 1:]
+
+                edge_cleanup_mask &= dilated_mask
+                edge_cleanup_mask[combined_mask] = False
+                cleanup_count += np.count_nonzero(edge_cleanup_mask[core])
+                combined_mask |= edge_cleanup_mask
+
+                # Set alpha to 0 for all background pixels of the band, the halo rows belong to its neighbours
+                band[core, :, 3][combined_mask[core]] = 0
 
-            total_keyed = 0
             for i, bg_color in enumerate(background_colors):
-                bg_r, bg_g, bg_b = bg_color
-
-                # Calculate color distance from background color
-                color_distance = np.sqrt(
-                    (r.astype(int) - bg_r) ** 2
-                    + (g.astype(int) - bg_g) ** 2
-                    + (b.astype(int) - bg_b) ** 2
-                )
-
-                # Use adaptive tolerance - higher tolerance for primary background color
-                adaptive_tolerance = tolerance if i == 0 else max(25, tolerance - 10)
-
-                # Create mask for pixels that match this background color within tolerance
-                bg_mask = color_distance <= adaptive_tolerance
-                combined_mask |= bg_mask
-
-                keyed_count = np.sum(bg_mask)
-                total_keyed += keyed_count
                 print(
-                    f"Color {i + 1} {bg_color}: {keyed_count} pixels keyed (tolerance: {adaptive_tolerance})"
+                    f"Color {i + 1} {bg_color}: {keyed_counts[i]} pixels keyed (tolerance: {adaptive_tolerances[i]})"
                 )
 
-            # Additional pass: detect and key out pixels that are "close enough" to any background color
-            # This helps with anti-aliasing and similar colors around sprite edges
-            if len(background_colors) > 0:
-                # Create a more aggressive mask for edge cleanup
-                edge_cleanup_mask = np.zeros((height, width), dtype=bool)
-
-                for bg_color in background_colors:
-                    bg_r, bg_g, bg_b = bg_color
-                    color_distance = np.sqrt(
-                        (r.astype(int) - bg_r) ** 2
-                        + (g.astype(int) - bg_g) ** 2
-                        + (b.astype(int) - bg_b) ** 2
-                    )
-
-                    # More aggressive tolerance for edge cleanup
-                    edge_cleanup_tolerance = tolerance + 15
-                    edge_mask = color_distance <= edge_cleanup_tolerance
-                    edge_cleanup_mask |= edge_mask
-                # Only apply edge cleanup to pixels that are adjacent to already keyed pixels
-                # This prevents removing sprite colors that happen to be similar to background
-                # Using basic numpy operations instead of scipy for edge detection
-
-                # Create a simple dilation by checking neighboring pixels
-                dilated_mask = np.copy(combined_mask)
-                h, w = combined_mask.shape
-
-                # Check 4-connected neighbors (up, down, left, right)
-                for dy, dx in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                    # Shift the mask in each direction to find adjacent pixels
-                    shifted_mask = np.zeros_like(combined_mask)
-
-                    if dy == -1:  # Up
-                        shifted_mask[1:, :] = combined_mask[:-1, :]
-                    elif dy == 1:  # Down
-                        shifted_mask[:-1, :] = combined_mask[1:, :]
-                    elif dx == -1:  # Left
-                        shifted_mask[:, 1:] = combined_mask[:, :-1]
-                    elif dx == 1:  # Right
-                        shifted_mask[:, :-1] = combined_mask[:, 1:]
-
-                    dilated_mask |= shifted_mask
-
-                # Apply edge cleanup only to adjacent pixels
-                additional_cleanup = edge_cleanup_mask & dilated_mask & ~combined_mask
-                combined_mask |= additional_cleanup
-
-                cleanup_count = np.sum(additional_cleanup)
-                if cleanup_count > 0:
-                    print(f"Edge cleanup: {cleanup_count} additional pixels keyed")
-                    total_keyed += cleanup_count
-
-            # Set alpha to 0 for all background pixels
-            img_array[combined_mask, 3] = 0
+            total_keyed = sum(keyed_counts)
+            if cleanup_count > 0:
+                print(f"Edge cleanup: {cleanup_count} additional pixels keyed")
+                total_keyed += cleanup_count
 
             # Create new image from modified array
             keyed_image = Image.fromarray(img_array, "RGBA")
@@ -678,35 +948,32 @@ class UnknownParser:
 
             img_array = np.array(image)
             height, width = img_array.shape[:2]
+            limit = UnknownParser._squared_tolerance(tolerance)
 
-            r, g, b = img_array[:, :, 0], img_array[:, :, 1], img_array[:, :, 2]
+            keyed_counts = [0] * len(background_colors)
+            for y0, y1 in UnknownParser._keying_bands(height, width):
+                band = img_array[y0:y1]
+                distance = np.empty(band.shape[:2], dtype=np.int32)
+                scratch = np.empty_like(distance)
+                matched = np.empty(band.shape[:2], dtype=bool)
+                combined_mask = np.zeros(band.shape[:2], dtype=bool)
 
-            # Create combined mask for all background colors
-            combined_mask = np.zeros((height, width), dtype=bool)
+                for i, bg_color in enumerate(background_colors):
+                    UnknownParser._squared_color_distance(band, bg_color, distance, scratch)
 
-            total_keyed = 0
-            for i, bg_color in enumerate(background_colors):
-                bg_r, bg_g, bg_b = bg_color
+                    # Pixels that match this background color within tolerance
+                    np.less_equal(distance, limit, out=matched)
+                    combined_mask |= matched
+                    keyed_counts[i] += np.count_nonzero(matched)
 
-                # Calculate color distance from background color
-                color_distance = np.sqrt(
-                    (r.astype(int) - bg_r) ** 2
-                    + (g.astype(int) - bg_g) ** 2
-                    + (b.astype(int) - bg_b) ** 2
-                )
-
-                # Create mask for pixels that match this background color within tolerance
-                bg_mask = color_distance <= tolerance
-                combined_mask |= bg_mask
+                # Set alpha to 0 for all background pixels
+                band[..., 3][combined_mask] = 0
 
-                keyed_count = np.sum(bg_mask)
-                total_keyed += keyed_count
+            for i, bg_color in enumerate(background_colors):
                 print(
-                    f"Basic keying - Color {i + 1} {bg_color}: {keyed_count} pixels keyed"
+                    f"Basic keying - Color {i + 1} {bg_color}: {keyed_counts[i]} pixels keyed"
                 )
-
-            # Set alpha to 0 for all background pixels
-            img_array[combined_mask, 3] = 0
+            total_keyed = sum(keyed_counts)
 
             # Create new image from modified array
             keyed_image = Image.fromarray(img_array, "RGBA")
@@ -742,25 +1009,24 @@ class UnknownParser:
             if image.mode != "RGBA":
                 image = image.convert("RGBA")
 
-            img_array = np.array(image)
+            img_array = np.asarray(image)
             height, width = img_array.shape[:2]
-
-            r, g, b = img_array[:, :, 0], img_array[:, :, 1], img_array[:, :, 2]
-            bg_r, bg_g, bg_b = background_color
-
-            # Calculate color distance from background color
-            color_distance = np.sqrt(
-                (r.astype(int) - bg_r) ** 2
-                + (g.astype(int) - bg_g) ** 2
-                + (b.astype(int) - bg_b) ** 2
-            )
+            limit = UnknownParser._squared_tolerance(tolerance)
 
             # Create mask for non-background pixels
             # This includes pixels that don't match the background color AND have some opacity
-            alpha_channel = img_array[:, :, 3]
-            non_background_mask = (color_distance > tolerance) & (
-                alpha_channel >= int(255 * 0.01)
-            )
+            non_background_mask = np.empty((height, width), dtype=bool)
+            background_count = 0
+            for y0, y1 in UnknownParser._keying_bands(height, width):
+                band = img_array[y0:y1]
+                distance = np.empty(band.shape[:2], dtype=np.int32)
+                scratch = np.empty_like(distance)
+                UnknownParser._squared_color_distance(band, background_color, distance, scratch)
+
+                band_mask = non_background_mask[y0:y1]
+                np.greater(distance, limit, out=band_mask)
+                background_count += band_mask.size - np.count_nonzero(band_mask)
+                band_mask &= band[..., 3] >= int(255 * 0.01)
 
             # Find connected regions in the non-background mask
             regions = UnknownParser._find_connected_regions(non_background_mask)
@@ -768,13 +1034,9 @@ class UnknownParser:
             sprites = []
             base_name = os.path.splitext(os.path.basename(file_path))[0]
 
-            for i, region in enumerate(regions):
-                if len(region) == 0:
-                    continue
+            content_table = UnknownParser._shared_content_table(image, len(regions))
 
-                # Calculate bounding box
-                bbox = UnknownParser._get_bounding_box(region)
-                x, y, width, height = bbox
+            for i, (x, y, width, height, _) in enumerate(regions):
 
                 # Skip very small regions (likely noise)
                 if width < 2 or height < 2:
@@ -782,7 +1044,9 @@ class UnknownParser:
 
                 # Apply precise cropping to remove remaining background/transparent areas
                 cropped_x, cropped_y, cropped_width, cropped_height = (
-                    UnknownParser._crop_sprite_precisely(image, x, y, width, height)
+                    UnknownParser._crop_sprite_precisely(
+                        image, x, y, width, height, content_table=content_table
+                    )
                 )
 
                 sprite_name = f"unsupported spritesheet - {base_name} - {i + 1:04d}"
@@ -796,7 +1060,6 @@ class UnknownParser:
                     }
                 )
 
-            background_count = np.sum(color_distance <= tolerance)
             total_pixels = width * height
             percentage = (background_count / total_pixels) * 100
 
@@ -837,55 +1100,50 @@ class UnknownParser:
             if image.mode != "RGBA":
                 image = image.convert("RGBA")
 
-            img_array = np.array(image)
+            img_array = np.asarray(image)
             height, width = img_array.shape[:2]
+            limit = UnknownParser._squared_tolerance(tolerance)
 
-            r, g, b = img_array[:, :, 0], img_array[:, :, 1], img_array[:, :, 2]
-
-            # Create combined mask for all background colors
-            combined_background_mask = np.zeros((height, width), dtype=bool)
+            # Create mask for non-background pixels
+            # This includes pixels that don't match any background color AND have some opacity
+            non_background_mask = np.empty((height, width), dtype=bool)
+            excluded_counts = [0] * len(background_colors)
+            for y0, y1 in UnknownParser._keying_bands(height, width):
+                band = img_array[y0:y1]
+                distance = np.empty(band.shape[:2], dtype=np.int32)
+                scratch = np.empty_like(distance)
+                matched = np.empty(band.shape[:2], dtype=bool)
+                band_mask = non_background_mask[y0:y1]
+                np.greater_equal(band[..., 3], int(255 * 0.01), out=band_mask)
+
+                for i, bg_color in enumerate(background_colors):
+                    UnknownParser._squared_color_distance(band, bg_color, distance, scratch)
+
+                    # Pixels that match this background color within tolerance
+                    np.less_equal(distance, limit, out=matched)
+                    excluded_counts[i] += np.count_nonzero(matched)
+                    band_mask[matched] = False
 
-            total_excluded = 0
             for i, bg_color in enumerate(background_colors):
-                bg_r, bg_g, bg_b = bg_color
-
-                # Calculate color distance from background color
-                color_distance = np.sqrt(
-                    (r.astype(int) - bg_r) ** 2
-                    + (g.astype(int) - bg_g) ** 2
-                    + (b.astype(int) - bg_b) ** 2
-                )
-
-                # Create mask for pixels that match this background color within tolerance
-                bg_mask = color_distance <= tolerance
-                combined_background_mask |= bg_mask
-
-                excluded_count = np.sum(bg_mask)
-                total_excluded += excluded_count
                 print(
-                    f"Background color {i + 1} {bg_color}: {excluded_count} pixels excluded"
+                    f"Background color {i + 1} {bg_color}: {excluded_counts[i]} pixels excluded"
                 )
+            total_excluded = sum(excluded_counts)
 
-            # Create mask for non-background pixels
-            # This includes pixels that don't match any background color AND have some opacity
-            alpha_channel = img_array[:, :, 3]
-            non_background_mask = (~combined_background_mask) & (
-                alpha_channel >= int(255 * 0.01)
+            sprites = UnknownParser._parse_grid(
+                image, img_array, non_background_mask, file_path
             )
-
-            # Find connected regions in the non-background mask
-            regions = UnknownParser._find_connected_regions(non_background_mask)
-
-            sprites = []
+            if sprites is None:
+                # Find connected regions in the non-background mask
+                regions = UnknownParser._find_connected_regions(non_background_mask)
+                sprites = []
+            else:
+                regions = []
             base_name = os.path.splitext(os.path.basename(file_path))[0]
 
-            for i, region in enumerate(regions):
-                if len(region) == 0:
-                    continue
+            content_table = UnknownParser._shared_content_table(image, len(regions))
 
-                # Calculate bounding box
-                bbox = UnknownParser._get_bounding_box(region)
-                x, y, width, height = bbox
+            for i, (x, y, width, height, _) in enumerate(regions):
 
                 # Skip very small regions (likely noise)
                 if width < 2 or height < 2:
@@ -893,7 +1151,9 @@ class UnknownParser:
 
                 # Apply precise cropping to remove remaining background/transparent areas
                 cropped_x, cropped_y, cropped_width, cropped_height = (
-                    UnknownParser._crop_sprite_precisely(image, x, y, width, height)
+                    UnknownParser._crop_sprite_precisely(
+                        image, x, y, width, height, content_table=content_table
+                    )
                 )
 
                 sprite_name = f"unsupported spritesheet - {base_name} - {i + 1:04d}"
@@ -926,65 +1186,141 @@ class UnknownParser:
             return sprites
 
     @staticmethod
-    def _crop_sprite_precisely(image, x, y, width, height, padding=1):
+    def _shared_content_table(image, sprite_count):
+        """
+        Get the content table to share between the precise crops of a sheet, if it pays off.
+
+        The table costs about 5 bytes per pixel of the sheet while it is built and 4 bytes
+        per pixel afterwards. With fewer than CONTENT_TABLE_MIN_SPRITES sprites, every crop
+        scans the rows and columns of its own region instead, which is faster than building
+        the table and keeps memory proportional to the sprites.
+
+        Args:
+            image (PIL.Image): The source image
+            sprite_count (int): The number of sprites that will be cropped
+
+        Returns:
+            SummedAreaTable: The _content_table of the image, or None to crop every sprite on its own
+        """
+        if sprite_count < UnknownParser.CONTENT_TABLE_MIN_SPRITES:
+            return None
+        return UnknownParser._content_table(image)
+
+    @staticmethod
+    def _content_table(image):
+        """
+        Build the summed-area table of the content mask used by _crop_sprite_precisely.
+
+        Memory: a (height, width) bool mask plus the (height + 1, width + 1) int32 table,
+        about 5 bytes per pixel, e.g. 1.25 GiB for a 16384x16384 sheet.
+
+        Args:
+            image (PIL.Image): The source image
+
+        Returns:
+            SummedAreaTable: The table of the content pixels, or None if the image has no channels
+        """
+        content_mask = UnknownParser._content_mask(image)
+        if content_mask is None:
+            return None
+        return SummedAreaTable(content_mask)
+
+    @staticmethod
+    def _content_mask(image):
+        """
+        Build the mask of the pixels _crop_sprite_precisely treats as sprite content.
+
+        Args:
+            image (PIL.Image): The source image or region
+
+        Returns:
+            numpy.ndarray: (height, width) bool mask, or None if the image has no channels
+        """
+        pixels = np.asarray(image)
+        if pixels.ndim != 3:
+            return None
+
+        if pixels.shape[2] >= 4:  # Has alpha channel
+            # Pixels with significant alpha (not transparent)
+            return pixels[:, :, 3] > 10  # More than just barely visible
+        # If no alpha channel, look for non-background colors
+        # Assume white/near-white is background
+        return np.sum(pixels[:, :, :3], axis=2) < (255 * 3 * 0.95)
+
+    @staticmethod
+    def _content_bbox(region):
+        """
+        Find the content of a single region by scanning its rows and columns.
+
+        Args:
+            region (PIL.Image): The region to scan
+
+        Returns:
+            tuple: (left, top, right, bottom) of the content, exclusive of right and bottom,
+                or None if the region has no content
+        """
+        content_mask = UnknownParser._content_mask(region)
+        if content_mask is None:
+            return None
+
+        content_rows = np.flatnonzero(np.any(content_mask, axis=1))
+        if not len(content_rows):
+            return None
+        content_cols = np.flatnonzero(np.any(content_mask, axis=0))
+        return (
+            int(content_cols[0]),
+            int(content_rows[0]),
+            int(content_cols[-1]) + 1,
+            int(content_rows[-1]) + 1,
+        )
+
+    @staticmethod
+    def _crop_sprite_precisely(image, x, y, width, height, padding=1, content_table=None):
         """
         Crop a sprite more precisely by finding the actual content boundaries.
 
+        Pass the _content_table of the image when cropping many sprites, so the content mask
+        is built once per sheet and every crop only reads the table along the sprite's box.
+        Without one, the rows and columns of the padded region are scanned for content.
+
         Args:
             image (PIL.Image): The source image (should have transparent background)
             x, y, width, height (int): Initial bounding box
             padding (int): Extra pixels to add around the content
+            content_table (SummedAreaTable, optional): The _content_table of the whole image
 
         Returns:
             tuple: (new_x, new_y, new_width, new_height) - optimized bounding box
         """
         try:
-            # Extract the region of interest with some padding
+            # Look at the region of interest with some padding
             padded_x = max(0, x - padding)
             padded_y = max(0, y - padding)
             padded_width = min(image.width - padded_x, width + 2 * padding)
             padded_height = min(image.height - padded_y, height + 2 * padding)
+            padded_box = (padded_x, padded_y, padded_x + padded_width, padded_y + padded_height)
 
-            # Crop the region from the image
-            region = image.crop(
-                (padded_x, padded_y, padded_x + padded_width, padded_y + padded_height)
-            )
-
-            # Convert to numpy array and find actual content bounds
-            region_array = np.array(region)
-
-            if region_array.shape[2] >= 4:  # Has alpha channel
-                # Find pixels with significant alpha (not transparent)
-                alpha_channel = region_array[:, :, 3]
-                content_mask = alpha_channel > 10  # More than just barely visible
+            if content_table is not None:
+                # Find the tight bounding box around content
+                content_box = content_table.bbox(padded_box)
             else:
-                # If no alpha channel, look for non-background colors
-                # Assume white/near-white is background
-                rgb_sum = np.sum(region_array[:, :, :3], axis=2)
-                content_mask = rgb_sum < (255 * 3 * 0.95)  # Not near-white
-
-            # Find the actual content boundaries
-            content_rows = np.any(content_mask, axis=1)
-            content_cols = np.any(content_mask, axis=0)
-
-            if not np.any(content_rows) or not np.any(content_cols):
+                content_box = UnknownParser._content_bbox(image.crop(padded_box))
+                if content_box is not None:
+                    left, top, right, bottom = content_box
+                    content_box = (
+                        padded_x + left,
+                        padded_y + top,
+                        padded_x + right,
+                        padded_y + bottom,
+                    )
+            if content_box is None:
                 # No content found, return original bounds
                 return x, y, width, height
 
-            # Find the tight bounding box around content
-            content_y_indices = np.where(content_rows)[0]
-            content_x_indices = np.where(content_cols)[0]
-
-            content_top = content_y_indices[0]
-            content_bottom = content_y_indices[-1]
-            content_left = content_x_indices[0]
-            content_right = content_x_indices[-1]
-
             # Calculate new bounds (relative to original image coordinates)
-            new_x = padded_x + content_left
-            new_y = padded_y + content_top
-            new_width = content_right - content_left + 1
-            new_height = content_bottom - content_top + 1
+            new_x, new_y, content_right, content_bottom = content_box
+            new_width = content_right - new_x
+            new_height = content_bottom - new_y
 
             # Add minimal padding back
             final_x = max(0, new_x - padding // 2)
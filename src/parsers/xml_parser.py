@@ -1,8 +1,9 @@
 import os
 import xml.etree.ElementTree as ET
-import tkinter as tk
 
 # Import our own modules
+from parsers.metadata_cache import MetadataCache
+from parsers.sprite_table import SpriteTable
 from utils.utilities import Utilities
 
 
@@ -18,10 +19,10 @@ class XmlParser:
 
     Methods:
         __init__(directory, xml_filename, listbox_data): Initializes the parser with directory, filename, and listbox.
-        get_data(): Parses the XML file and populates the listbox with names.
+        get_data(): Populates the listbox with the animation names of the XML file, parsing it through the MetadataCache.
         extract_names(xml_root): Extracts names from the XML root element.
         get_names(names): Populates the listbox with the given names.
-        parse_xml_data(file_path): Static method to parse XML data from a file and return sprite information.
+        parse_xml_data(file_path): Static method to stream the XML file and return its sprites as a SpriteTable.
     """
 
     def __init__(self, directory, xml_filename, listbox_data):
@@ -30,9 +31,9 @@ class XmlParser:
         self.listbox_data = listbox_data
 
     def get_data(self):
-        tree = ET.parse(os.path.join(self.directory, self.xml_filename))
-        xml_root = tree.getroot()
-        names = self.extract_names(xml_root)
+        names = MetadataCache.get_animation_names(
+            os.path.join(self.directory, self.xml_filename), XmlParser.parse_xml_data
+        )
         self.get_names(names)
 
     def extract_names(self, xml_root):
@@ -44,26 +45,43 @@ class XmlParser:
         return names
 
     def get_names(self, names):
+        import tkinter as tk
+
         for name in names:
             self.listbox_data.insert(tk.END, name)
 
     @staticmethod
     def parse_xml_data(file_path):
-        tree = ET.parse(file_path)
-        xml_root = tree.getroot()
-        sprites = [
-            {
-                "name": sprite.get("name"),
-                "x": int(sprite.get("x")),
-                "y": int(sprite.get("y")),
-                "width": int(sprite.get("width")),
-                "height": int(sprite.get("height")),
-                "frameX": int(sprite.get("frameX", 0)),
-                "frameY": int(sprite.get("frameY", 0)),
-                "frameWidth": int(sprite.get("frameWidth", sprite.get("width"))),
-                "frameHeight": int(sprite.get("frameHeight", sprite.get("height"))),
-                "rotated": sprite.get("rotated", "false") == "true",
-            }
-            for sprite in xml_root.findall("SubTexture")
-        ]
-        return sprites
+        names = []
+        records = []
+        # Stream the document and drop every SubTexture once read, so the tree is never held in memory.
+        events = ET.iterparse(file_path, events=("start", "end"))
+        _, root = next(events)
+        depth = 1
+        for event, element in events:
+            if event == "start":
+                depth += 1
+                continue
+            depth -= 1
+            if depth != 1:
+                continue
+            if element.tag == "SubTexture":
+                attributes = element.attrib
+                width = int(attributes["width"])
+                height = int(attributes["height"])
+                names.append(attributes.get("name"))
+                records.append(
+                    (
+                        int(attributes["x"]),
+                        int(attributes["y"]),
+                        width,
+                        height,
+                        int(attributes.get("frameX", 0)),
+                        int(attributes.get("frameY", 0)),
+                        int(attributes.get("frameWidth", width)),
+                        int(attributes.get("frameHeight", height)),
+                        attributes.get("rotated", "false") == "true",
+                    )
+                )
+            root.clear()
+        return SpriteTable(names, records)
@@ -41,6 +41,8 @@ class AppConfig:
         "resource_limits": {
             "cpu_cores": "auto",
             "memory_limit_mb": 0,
+            "execution_mode": "threads",
+            "use_output_cache": True,
         },
         "extraction_defaults": {
             "animation_format": "None",
@@ -56,6 +58,7 @@ class AppConfig:
             "frame_scale": 1.0,
             "variable_delay": False,
             "fnf_idle_loop": False,
+            "gif_backend": "Wand",
         },
         "compression_defaults": {
             "png": {
@@ -100,6 +103,7 @@ class AppConfig:
         "frame_scale": float,
         "variable_delay": bool,
         "fnf_idle_loop": bool,
+        "gif_backend": str,
         "check_updates_on_startup": bool,
         "auto_download_updates": bool,
         "png_compress_level": int,
@@ -0,0 +1,81 @@
+import numpy as np
+from PIL import Image
+
+# Import our own modules
+from utils.file_cache import FileCache
+
+
+class AtlasCache:
+    """
+    A process-wide LRU cache of decoded atlas images, shared by the preview, the background
+    detection pre-scan and extraction.
+
+    Atlases are decoded and converted to RGBA once, so sprites are cropped from an image that is
+    already in its final mode. The entries are held in a FileCache, keyed by the absolute path,
+    modification time and size of the file. The cache is bounded by the memory of the decoded
+    pixels (4 bytes per pixel): the least recently used atlases are dropped once the total
+    exceeds the limit, and an atlas larger than the limit on its own is returned without being
+    cached. The limit is MAX_BYTES unless a batch lowers it to fit its memory budget with
+    set_max_bytes.
+
+    The pixels are kept in one (H, W, 4) uint8 numpy array per atlas, and the returned PIL image
+    is a read-only view of the same memory, so SpriteProcessor can slice frames straight out of
+    the array. The returned images and arrays are shared and must not be modified.
+
+    Attributes:
+        MAX_BYTES (int): The default maximum memory of the cached atlases in bytes.
+
+    Methods:
+        get(atlas_path) -> PIL.Image.Image:
+            Returns the decoded RGBA atlas, decoding it on a cache miss.
+        pixels_of(atlas) -> numpy.ndarray:
+            Returns the (H, W, 4) pixel array of an atlas, without a copy when it came from the cache.
+        cached_bytes() -> int:
+            Returns the memory used by the cached atlases in bytes.
+        set_max_bytes(max_bytes=None):
+            Changes the maximum memory of the cached atlases, None restores MAX_BYTES.
+        discard(atlas_path):
+            Drops the cached atlas of a file, e.g. once the job extracting it finished.
+        clear():
+            Drops all cached atlases.
+    """
+
+    MAX_BYTES = 512 * 1024 * 1024
+
+    # Entries are (atlas, pixels) pairs, sized by their pixel memory.
+    _cache = FileCache(max_size=MAX_BYTES, size_func=lambda entry: entry[1].nbytes)
+
+    @classmethod
+    def get(cls, atlas_path):
+        return cls._cache.get(atlas_path, cls._decode)[0]
+
+    @staticmethod
+    def _decode(atlas_path):
+        with Image.open(atlas_path) as decoded:
+            pixels = np.asarray(decoded.convert("RGBA") if decoded.mode != "RGBA" else decoded)
+        return Image.fromarray(pixels), pixels
+
+    @classmethod
+    def pixels_of(cls, atlas):
+        for cached_atlas, pixels in cls._cache.values():
+            if cached_atlas is atlas:
+                return pixels
+        if atlas.mode != "RGBA":
+            atlas = atlas.convert("RGBA")
+        return np.asarray(atlas)
+
+    @classmethod
+    def cached_bytes(cls):
+        return cls._cache.size
+
+    @classmethod
+    def set_max_bytes(cls, max_bytes=None):
+        cls._cache.set_max_size(cls.MAX_BYTES if max_bytes is None else max(0, int(max_bytes)))
+
+    @classmethod
+    def discard(cls, atlas_path):
+        cls._cache.discard(atlas_path)
+
+    @classmethod
+    def clear(cls):
+        cls._cache.clear()
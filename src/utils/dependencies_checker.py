@@ -1,7 +1,6 @@
 import shutil
 import os
 import platform
-import tkinter as tk
 import webbrowser
 
 # Import our own modules
@@ -25,6 +24,8 @@ class DependenciesChecker:
 
     @staticmethod
     def show_error_popup_with_links(message, links):
+        import tkinter as tk
+
         root = tk.Tk()
         root.title("Error")
         root.geometry("300x200")
@@ -0,0 +1,120 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class FileCache:
+    """
+    A thread-safe LRU cache of values loaded from files, the storage shared by the process-wide caches.
+
+    Entries are keyed by the absolute path, modification time and size of the file, so an edited
+    file is loaded again on its next use, and storing a value drops the entries of older versions
+    of the same file. The least recently used entries are dropped once more than max_entries
+    values are cached, or once the summed size_func(value) of the entries exceeds max_size. A
+    value larger than max_size on its own is returned without being cached.
+
+    Attributes:
+        max_entries (int): The maximum number of cached files, or None for no limit.
+        max_size (int): The maximum summed size of the cached values, or None for no limit.
+        size_func (callable): Returns the size of a value, counted against max_size.
+        size (int): The summed size of the cached values.
+
+    Methods:
+        file_key(file_path) -> tuple:
+            Returns the (absolute path, st_mtime_ns, st_size) key of a file.
+        get(file_path, load_func) -> object:
+            Returns the cached value of a file, calling load_func(file_path) on a cache miss.
+        peek(file_path) -> object:
+            Returns the cached value of a file without loading it, or None.
+        put(file_path, value):
+            Stores a value loaded elsewhere.
+        values() -> list:
+            Returns the cached values, least recently used first.
+        set_max_size(max_size):
+            Changes max_size, dropping the least recently used values that no longer fit.
+        discard(file_path):
+            Drops the cached values of a file.
+        clear():
+            Drops all cached values.
+    """
+
+    def __init__(self, max_entries=None, max_size=None, size_func=None):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.size_func = size_func
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def file_key(file_path):
+        stat = os.stat(file_path)
+        return os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size
+
+    def get(self, file_path, load_func):
+        key = self.file_key(file_path)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+
+        # Load outside the lock so other files can be served meanwhile.
+        value = load_func(file_path)
+        self._store(key, value)
+        return value
+
+    def peek(self, file_path):
+        try:
+            key = self.file_key(file_path)
+        except OSError:
+            return None
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, file_path, value):
+        self._store(self.file_key(file_path), value)
+
+    def values(self):
+        with self._lock:
+            return list(self._entries.values())
+
+    def set_max_size(self, max_size):
+        with self._lock:
+            self.max_size = max_size
+            self._evict()
+
+    def discard(self, file_path):
+        path = os.path.abspath(file_path)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == path]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _value_size(self, value):
+        return self.size_func(value) if self.size_func is not None else 0
+
+    def _store(self, key, value):
+        if self.max_size is not None and self._value_size(value) > self.max_size:
+            return
+        with self._lock:
+            # Drop entries of older versions of the same file.
+            for stale_key in [k for k in self._entries if k[0] == key[0]]:
+                self._remove(stale_key)
+            self._entries[key] = value
+            self.size += self._value_size(value)
+            self._evict()
+
+    def _evict(self):
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_size is not None and self.size > self.max_size)
+        ):
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        self.size -= self._value_size(self._entries.pop(key))
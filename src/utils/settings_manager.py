@@ -1,3 +1,6 @@
+import copy
+
+
 class SettingsManager:
     """
     A class to manage global, spritesheet, and animation-specific settings.
@@ -14,6 +17,7 @@ class SettingsManager:
         delete_spritesheet_settings(spritesheet_name): Delete the settings for a specific spritesheet.
         delete_animation_settings(animation_name): Delete the settings for a specific animation.
         get_settings(filename, animation_name=None): Retrieve the settings for a given spritesheet or animation
+        snapshot(filename): Return a detached SettingsManager holding only the settings that apply to a spritesheet.
     """
 
     def __init__(self):
@@ -57,3 +61,19 @@ class SettingsManager:
             settings.update(animation_settings)
 
         return settings
+
+    def snapshot(self, filename):
+        snapshot = SettingsManager()
+        snapshot.global_settings = copy.deepcopy(self.global_settings)
+
+        if filename in self.spritesheet_settings:
+            snapshot.spritesheet_settings[filename] = copy.deepcopy(
+                self.spritesheet_settings[filename]
+            )
+
+        prefix = filename + "/"
+        for animation_name, settings in self.animation_settings.items():
+            if animation_name.startswith(prefix):
+                snapshot.animation_settings[animation_name] = copy.deepcopy(settings)
+
+        return snapshot
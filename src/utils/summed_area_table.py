@@ -0,0 +1,79 @@
+import numpy as np
+
+
+class SummedAreaTable:
+    """
+    A summed-area table (integral image) of a binary mask.
+
+    The table is built once in O(width * height). Afterwards the number of set pixels in any
+    box takes four lookups, and the tight bounding box of the set pixels inside a box takes
+    one lookup per row and column of the box. This avoids cropping or copying the mask for
+    every box, e.g. for every sprite of a sheet with thousands of sprites.
+
+    The table holds one int32 (int64 for masks of 2**31 pixels or more) per pixel plus one
+    row and column, i.e. 4 bytes per pixel of the mask: 1 GiB for a 16384x16384 mask. Build
+    it for a whole image only when enough queries share it.
+
+    Boxes are (left, upper, right, lower) tuples with exclusive right and lower edges, like
+    PIL boxes, and are clipped to the mask.
+
+    Attributes:
+        table (numpy.ndarray): The (height + 1, width + 1) cumulative counts; table[y, x] is the
+            number of set pixels above and left of (x, y).
+        width (int): The mask width.
+        height (int): The mask height.
+
+    Methods:
+        count(box) -> int:
+            Returns the number of set pixels in a box.
+        bbox(box) -> tuple:
+            Returns the tight (left, upper, right, lower) box around the set pixels in a box, or None.
+    """
+
+    __slots__ = ("table", "width", "height")
+
+    def __init__(self, mask):
+        mask = np.asarray(mask, dtype=bool)
+        self.height, self.width = mask.shape
+        dtype = np.int32 if mask.size < 2**31 else np.int64
+
+        self.table = np.zeros((self.height + 1, self.width + 1), dtype=dtype)
+        table = self.table
+        table[1:, 1:] = mask
+        np.cumsum(table, axis=1, out=table)
+        # Accumulating down the rows one row at a time is much faster than cumsum along axis 0.
+        for y in range(2, self.height + 1):
+            np.add(table[y], table[y - 1], out=table[y])
+
+    def _clip(self, box):
+        left, upper, right, lower = box
+        left = min(max(0, left), self.width)
+        upper = min(max(0, upper), self.height)
+        right = min(max(left, right), self.width)
+        lower = min(max(upper, lower), self.height)
+        return left, upper, right, lower
+
+    def count(self, box):
+        left, upper, right, lower = self._clip(box)
+        table = self.table
+        return int(
+            table[lower, right] - table[upper, right] - table[lower, left] + table[upper, left]
+        )
+
+    def bbox(self, box):
+        left, upper, right, lower = self._clip(box)
+        table = self.table
+
+        # Set pixels per row and per column of the box, read from the table edges only.
+        rows = table[upper : lower + 1, right] - table[upper : lower + 1, left]
+        rows = np.flatnonzero(rows[1:] - rows[:-1])
+        if len(rows) == 0:
+            return None
+        columns = table[lower, left : right + 1] - table[upper, left : right + 1]
+        columns = np.flatnonzero(columns[1:] - columns[:-1])
+        return (
+            left + int(columns[0]),
+            upper + int(rows[0]),
+            left + int(columns[-1]) + 1,
+            upper + int(rows[-1]) + 1,
+        )
@@ -16,12 +16,21 @@ class Utilities:
             Determine if the application is running as a Nuitka-compiled executable.
         count_spritesheets(spritesheet_list):
             Count the number of spritesheet data files in a list.
+        list_spritesheets(directory):
+            List the spritesheet images in a directory, those with XML/TXT metadata first.
         replace_invalid_chars(name):
             Replace invalid filename characters (\\, /, :, *, ?, ", <, >, |) with an underscore and strip trailing whitespace.
         strip_trailing_digits(name):
             Remove trailing digits (1 to 4 digits) and optional ".png" extension, then strip any trailing whitespace.
         format_filename(prefix, sprite_name, animation_name, filename_format, replace_rules):
             Formats the filename based on the given parameters and applies find/replace rules.
+        format_list(value):
+            Returns the formats of an animation_format or frame_format setting, which holds one format or a list of them.
+            "None" entries and repeated formats are dropped.
+        scale_list(value):
+            Returns the scales of a scale or frame_scale setting, which holds one scale or a list of them.
+        scale_label(scale):
+            Returns the name of a scale used for its output subfolder or filename suffix, e.g. "2x" or "0.5x".
     """
 
     @staticmethod
@@ -60,6 +69,27 @@ class Utilities:
     def count_spritesheets(spritesheet_list):
         return len(spritesheet_list)
 
+    @staticmethod
+    def list_spritesheets(directory):
+        spritesheets = []
+        processed_files = set()
+
+        for filename in os.listdir(directory):
+            if filename.endswith(".xml") or filename.endswith(".txt"):
+                base_name = os.path.splitext(filename)[0]
+                png_filename = base_name + ".png"
+                if os.path.isfile(os.path.join(directory, png_filename)):
+                    if png_filename not in processed_files:
+                        spritesheets.append(png_filename)
+                    processed_files.add(png_filename)
+
+        for filename in os.listdir(directory):
+            if (filename.lower().endswith((".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".webp"))
+                    and filename not in processed_files):
+                spritesheets.append(filename)
+
+        return spritesheets
+
     @staticmethod
     def replace_invalid_chars(name):
         return re.sub(r'[\\/:*?"<>|]', "_", name).rstrip()
@@ -92,3 +122,32 @@ class Utilities:
             else:
                 base_name = base_name.replace(rule["find"], rule["replace"])
         return base_name
+
+    @staticmethod
+    def format_list(value):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = [value]
+        formats = []
+        for name in value:
+            if name and name != "None" and name not in formats:
+                formats.append(name)
+        return formats
+
+    @staticmethod
+    def scale_list(value):
+        if value is None:
+            return []
+        if isinstance(value, (int, float, str)):
+            value = [value]
+        scales = []
+        for scale in value:
+            scale = float(scale)
+            if scale not in scales:
+                scales.append(scale)
+        return scales
+
+    @staticmethod
+    def scale_label(scale):
+        return f"{scale:g}x"
@@ -0,0 +1,2 @@
+# The application version, shared by the GUI, the command-line interface and the update checker.
+APP_VERSION = "1.9.5.1"